@@ -1,27 +1,151 @@
 import argparse
 import json
-from .matrx_microservice.generator import MicroserviceGenerator
+import os
+import sys
+from .matrx_microservice.post_create import DEFAULT_TIMEOUT
 
 
-def create_microservice(args):
-    """Create microservice from config"""
+def _load_github_access(args):
     github_access = None
     if args.github_access_file:
         with open(args.github_access_file, 'r') as f:
             github_access = json.load(f)
+    return github_access
+
+
+def create_microservice(args):
+    """Create microservice from config"""
+    from .matrx_microservice.generator import MicroserviceGenerator
 
     generator = MicroserviceGenerator(
         config_path=args.config,
         output_dir=args.output_dir,
         create_github_repo=args.create_github_repo,
         github_project_name=args.github_project_name,
-        github_access=github_access,
+        github_access=_load_github_access(args),
         github_project_description=args.github_project_description,
-        debug=args.debug
+        debug=args.debug,
+        format_workers=args.format_workers,
+        use_format_cache=not args.no_format_cache,
+        format_cache_dir=args.format_cache_dir,
+        metrics_path=args.metrics_path,
+        github_push_mode=args.github_push_mode,
+        pipeline_repo_creation=args.pipeline_repo_creation,
+        api_trace_path=args.api_trace_path,
+        use_venv_cache=not args.no_venv_cache,
+        venv_cache_dir=args.venv_cache_dir,
+        use_lock_store=not args.no_lock_store,
+        lock_store_dir=args.lock_store_dir,
+        post_create_timeout=args.post_create_timeout
     )
     generator.generate_microservice()
 
 
+def create_microservices_batch(args):
+    """Create one microservice per config in --config_dir, concurrently"""
+    from .matrx_microservice.batch import find_configs, generate_batch
+
+    config_paths = find_configs(args.config_dir)
+    if not config_paths:
+        print(f"No *.json configs found in {args.config_dir}")
+        sys.exit(1)
+
+    results = generate_batch(
+        config_paths,
+        args.output_dir,
+        workers=args.workers,
+        create_github_repo=args.create_github_repo,
+        github_access=_load_github_access(args),
+        github_project_description=args.github_project_description,
+        debug=args.debug,
+        use_format_cache=not args.no_format_cache,
+        format_cache_dir=args.format_cache_dir,
+        metrics_path=args.metrics_path,
+        github_push_mode=args.github_push_mode,
+        pipeline_repo_creation=args.pipeline_repo_creation,
+        api_trace_path=args.api_trace_path,
+        use_venv_cache=not args.no_venv_cache,
+        venv_cache_dir=args.venv_cache_dir,
+        use_lock_store=not args.no_lock_store,
+        lock_store_dir=args.lock_store_dir,
+        post_create_timeout=args.post_create_timeout
+    )
+
+    failed = [result for result in results if not result['success']]
+    print(f"\n{len(results) - len(failed)}/{len(results)} configs generated")
+    for result in results:
+        status = "ok    " if result['success'] else "failed"
+        print(f"  {status} {result['duration']:>8.2f}s  {result['config']}" +
+              (f"  ({result['error']})" if result['error'] else ""))
+    if failed:
+        sys.exit(1)
+
+
+def run_bench(args):
+    """Benchmark generation on synthetic schemas and compare against a saved baseline"""
+    from .matrx_microservice import bench
+
+    threshold = bench.DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+    if args.startup:
+        budget_ms = bench.DEFAULT_STARTUP_BUDGET_MS if args.startup_budget_ms is None else args.startup_budget_ms
+        startup = bench.measure_startup(runs=args.repeat, budget_ms=budget_ms)
+        bench.print_startup(startup)
+        if not startup['within_budget']:
+            print("\nCLI startup is over budget")
+            sys.exit(1)
+        return
+
+    scales = args.scales.split(',') if args.scales else None
+    results = bench.run_benchmarks(scales, repeat=args.repeat, format_workers=args.format_workers,
+                                   use_format_cache=args.format_cache)
+    bench.print_results(results)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        rows = bench.compare_to_baseline(results, bench.load_results(args.baseline), threshold=threshold)
+        bench.print_comparison(rows, threshold=threshold)
+        regressions = [row for row in rows if row['regression']]
+    elif args.baseline:
+        print(f"\nNo baseline at {args.baseline} yet, saving this run as the baseline")
+        bench.save_results(results, args.baseline)
+
+    if args.save:
+        bench.save_results(results, args.save)
+        print(f"\nResults saved to {args.save}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}")
+        sys.exit(1)
+
+
+def audit_collaborators(args):
+    """Stream the direct collaborators of the org's repos as JSON lines"""
+    from .matrx_microservice.github_utils import audit_collaborators as run_audit
+
+    repo_names = args.repos.split(',') if args.repos else None
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        summary = run_audit(output, repo_names, batch_size=args.batch_size, concurrency=args.concurrency,
+                            cache_dir=args.cache_dir, max_age=args.max_age, changed_only=args.changed_only)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    # The summary goes to stderr so stdout stays valid JSON lines
+    print(f"{summary['repos']} repos audited with {summary['queries']} GraphQL queries, {summary['changed']} changed, "
+          f"{summary['cached']} from cache, {summary['errors']} errors", file=sys.stderr)
+    if summary['errors']:
+        sys.exit(1)
+
+
+def prune_safe_directories(args):
+    """Remove stale safe.directory entries left in the global git config by older versions"""
+    from .matrx_microservice.git_config import prune_safe_directories as prune
+
+    summary = prune(dry_run=args.dry_run)
+    action = "would be removed" if args.dry_run else "removed"
+    print(f"{summary['removed']} of {summary['total']} safe.directory entries {action}, {summary['kept']} kept")
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog='matrx',
@@ -36,17 +160,87 @@ def main():
 
     # Create microservice command
     create_parser = subparsers.add_parser('create-microservice', help='Create a new microservice project')
-    create_parser.add_argument('--config', required=True, help='Path to config JSON file')
-    create_parser.add_argument('--output_dir', required=True, help='Output directory for generated microservice')
+    config_source = create_parser.add_mutually_exclusive_group(required=True)
+    config_source.add_argument('--config', help='Path to config JSON file')
+    config_source.add_argument('--config_dir', '--config-dir', dest='config_dir',
+                               help='Directory of config JSON files, one project is generated per file')
+    create_parser.add_argument('--output_dir', required=True,
+                               help='Output directory for generated microservice (parent directory with --config_dir)')
     create_parser.add_argument('--create_github_repo', action='store_true', help='Create and push to GitHub repo')
     create_parser.add_argument('--github_project_name', type=str,
                                help='Base name for GitHub project (required if creating repo)')
     create_parser.add_argument('--github_project_description', type=str, default='',
                                help='Description for GitHub project')
+    create_parser.add_argument('--github_push_mode', choices=['git', 'api'], default='git',
+                               help='Push with git, or create blobs, tree and commit through the Git Data API')
+    create_parser.add_argument('--pipeline_repo_creation', action='store_true',
+                               help='Look up the name and create the GitHub repo while files are generated')
     create_parser.add_argument('--github_access_file', type=str, help='Path to JSON file for GitHub access/permissions')
+    create_parser.add_argument('--workers', type=int,
+                               help='Projects generated concurrently with --config_dir (default: one per CPU)')
+    create_parser.add_argument('--format_workers', type=int, default=1,
+                               help='Processes used to black-format generated files (0 = one per CPU)')
+    create_parser.add_argument('--format_cache_dir', type=str,
+                               help='Directory of the formatted-output cache (default: ~/.cache/matrx-dream-service/black)')
+    create_parser.add_argument('--no_format_cache', action='store_true',
+                               help='Always run black instead of reusing cached formatted output')
+    create_parser.add_argument('--venv_cache_dir', type=str,
+                               help='Directory of the virtual environment cache (default: ~/.cache/matrx-dream-service/venvs)')
+    create_parser.add_argument('--no_venv_cache', action='store_true',
+                               help='Always run uv sync instead of linking a cached .venv')
+    create_parser.add_argument('--lock_store_dir', type=str,
+                               help='Directory of resolved uv.lock files (default: ~/.cache/matrx-dream-service/locks)')
+    create_parser.add_argument('--no_lock_store', action='store_true',
+                               help='Generate projects without a uv.lock')
+    create_parser.add_argument('--post_create_timeout', type=float, default=DEFAULT_TIMEOUT,
+                               help=f'Seconds each post-create script may run before it is killed '
+                                    f'(default: {DEFAULT_TIMEOUT:g})')
+    create_parser.add_argument('--metrics_path', type=str,
+                               help='Append per-stage timing metrics to this file as JSON lines')
+    create_parser.add_argument('--api_trace_path', type=str,
+                               help='Append a span per GitHub API request (latency, status, retries, rate limit) '
+                                    'to this file as JSON lines')
     create_parser.add_argument('--debug', action='store_true',
                                help='Enable debug mode for this command')  # Command-specific debug
 
+    # Benchmark command
+    bench_parser = subparsers.add_parser('bench', help='Benchmark generation on synthetic schemas')
+    bench_parser.add_argument('--scales', type=str,
+                              help='Comma separated scales to run: tiny, small, medium, large (default: all)')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='Runs per scale, the median is reported')
+    bench_parser.add_argument('--baseline', type=str,
+                              help='Baseline results JSON to compare against (created from this run if missing)')
+    bench_parser.add_argument('--save', type=str, help='Write this run\'s results to a JSON file')
+    bench_parser.add_argument('--threshold', type=float,
+                              help='Relative slowdown counted as a regression (default: 0.2 = 20%%)')
+    bench_parser.add_argument('--format_workers', type=int, default=1,
+                              help='Processes used for black formatting (0 = one per CPU)')
+    bench_parser.add_argument('--format_cache', action='store_true',
+                              help='Measure with the format cache enabled (warm after the first run)')
+    bench_parser.add_argument('--startup', action='store_true',
+                              help='Measure CLI import time instead of generation, fails when over budget')
+    bench_parser.add_argument('--startup_budget_ms', type=float,
+                              help='Import time budget for --startup in milliseconds (default: 250)')
+
+    # Collaborator audit command
+    audit_parser = subparsers.add_parser('audit-collaborators',
+                                         help='Audit direct collaborators of the org\'s repos as JSON lines')
+    audit_parser.add_argument('--repos', type=str, help='Comma separated repo names (default: every repo of the org)')
+    audit_parser.add_argument('--output', type=str, default='-', help='JSON lines output file (default: stdout)')
+    audit_parser.add_argument('--batch_size', type=int, default=25, help='Repositories fetched per GraphQL query')
+    audit_parser.add_argument('--concurrency', type=int, default=8, help='GraphQL queries in flight')
+    audit_parser.add_argument('--cache_dir', type=str,
+                              help='Audit cache directory (default: ~/.cache/matrx-dream-service/audit)')
+    audit_parser.add_argument('--max_age', type=float, default=0,
+                              help='Reuse cached results younger than this many seconds instead of fetching')
+    audit_parser.add_argument('--changed_only', action='store_true',
+                              help='Only output repos whose access changed since the previous audit')
+
+    # Global git config maintenance
+    prune_parser = subparsers.add_parser('prune-safe-directories',
+                                         help='Remove safe.directory entries for deleted directories from ~/.gitconfig')
+    prune_parser.add_argument('--dry_run', action='store_true', help='Only count the entries that would be removed')
+
     # Placeholder for future commands (commented out for now, but structure ready)
     # Example: add_parser = subparsers.add_parser('other-command', help='Description of other command')
     # add_parser.add_argument('--arg1', help='Arg for other command')
@@ -55,9 +249,18 @@ def main():
 
     if args.command == 'create-microservice':
         # Handle required fields for GitHub
+        if args.config_dir:
+            create_microservices_batch(args)
+            return
         if args.create_github_repo and not args.github_project_name:
             create_parser.error('--github_project_name is required when --create_github_repo is set')
         create_microservice(args)
+    elif args.command == 'bench':
+        run_bench(args)
+    elif args.command == 'audit-collaborators':
+        audit_collaborators(args)
+    elif args.command == 'prune-safe-directories':
+        prune_safe_directories(args)
     else:
         parser.print_help()
 
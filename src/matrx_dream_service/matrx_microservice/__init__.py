@@ -1,5 +1,21 @@
-from .github_utils import add_collaborators, list_collaborators, remove_collaborators
-from .generator import MicroserviceGenerator
+__all__ = ["add_collaborators", "list_collaborators", "remove_collaborators", "sync_collaborators",
+           "MicroserviceGenerator", "ConfigValidationError", "validate_config"]
 
-__all__ = ["add_collaborators", "list_collaborators", "remove_collaborators", "MicroserviceGenerator"]
+# Exports resolved on first access: the generator and the validator pull in matrx_utils, the GitHub helpers
+# githubkit, and importing a light submodule (bench, post_create) must not load either
+_LAZY_EXPORTS = {
+    "add_collaborators": "github_utils",
+    "list_collaborators": "github_utils",
+    "remove_collaborators": "github_utils",
+    "sync_collaborators": "github_utils",
+    "MicroserviceGenerator": "generator",
+    "ConfigValidationError": "config_validator",
+    "validate_config": "config_validator",
+}
 
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f"{__name__}.{_LAZY_EXPORTS[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+from matrx_utils import vcprint
+
+_active_trace = ContextVar("matrx_api_trace", default=None)
+_TRACE_EXTENSION = "matrx_api_trace"  # Request extension carrying (trace, start, perf_counter start) to the response
+
+LOW_BUDGET_RATIO = 0.1  # Warn once per trace when less than this share of the primary rate limit is left
+RETRYABLE_STATUSES = {403, 429, 500, 502, 503, 504}
+
+# Concrete path segments replaced by their parameter names, so spans of one endpoint group together
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/orgs/[^/]+"), "/orgs/{org}"),
+    (re.compile(r"/(collaborators)/[^/]+"), r"/\1/{username}"),
+    (re.compile(r"/(invitations)/\d+"), r"/\1/{invitation_id}"),
+    (re.compile(r"/git/(refs|ref)/.+"), r"/git/\1/{ref}"),
+]
+
+
+def endpoint_template(path: str) -> str:
+    """'/repos/acme/billing/collaborators/jane' -> '/repos/{owner}/{repo}/collaborators/{username}'"""
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path, count=1)
+    return path
+
+
+def _rate_limit(headers) -> dict:
+    def number(name):
+        value = headers.get(name)
+        return int(value) if value is not None and value.isdigit() else None
+
+    return {'limit': number('x-ratelimit-limit'), 'remaining': number('x-ratelimit-remaining'),
+            'used': number('x-ratelimit-used'), 'reset': number('x-ratelimit-reset'),
+            'resource': headers.get('x-ratelimit-resource'), 'retry_after': number('retry-after')}
+
+
+class JsonLinesExporter:
+    """Appends every span to a file (path or open text file) as one JSON line"""
+
+    def __init__(self, target):
+        self.target = target
+        self._lock = threading.Lock()
+
+    def export(self, span: dict):
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            if hasattr(self.target, "write"):
+                self.target.write(line)
+                self.target.flush()
+            else:
+                with open(self.target, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+
+class ApiTrace:
+    """
+    In-memory collector of the GitHub API requests made while the trace is active, one span per request.
+
+    A span holds the endpoint template, method, path, status, start time, latency until the response headers,
+    how many times the same request had already been sent after a rate-limit or server error response, and
+    the x-ratelimit-* budget the response reported. Spans are also handed to every exporter as they complete.
+    Requests that fail without a response raise to their caller and leave no span.
+    """
+
+    def __init__(self, exporters: list = (), trace_id: str = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.exporters = list(exporters)
+        self.spans = []
+        self._failed = {}  # Request key -> retries so far, while its last response was retryable
+        self._warned = False
+        self._lock = threading.Lock()
+
+    def record(self, request: httpx.Request, response: httpx.Response, start: float, latency: float):
+        status = response.status_code
+        rate_limit = _rate_limit(response.headers)
+        try:
+            body = request.content
+        except httpx.RequestNotRead:  # Streamed uploads, not sent by the GitHub clients
+            body = b""
+        key = (request.method, str(request.url), hashlib.sha1(body).hexdigest())
+        span = {
+            'trace_id': self.trace_id,
+            'span_id': uuid.uuid4().hex[:16],
+            'endpoint': f"{request.method} {endpoint_template(request.url.path)}",
+            'method': request.method,
+            'path': request.url.path,
+            'status': status,
+            'start': round(start, 6),
+            'latency': round(latency, 6),
+            'retries': 0,
+            'rate_limit': rate_limit,
+        }
+        with self._lock:
+            if key in self._failed:
+                span['retries'] = self._failed.pop(key) + 1
+            if status in RETRYABLE_STATUSES:
+                self._failed[key] = span['retries']
+            self.spans.append(span)
+            warn = not self._warned and self._budget_low(span)
+            self._warned = self._warned or warn
+        if warn:
+            vcprint(f"[matrx-dream-service] GitHub rate limit: {span['endpoint']} answered {status} with "
+                    f"{rate_limit['remaining']}/{rate_limit['limit']} requests left", color="yellow")
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    @staticmethod
+    def _budget_low(span: dict) -> bool:
+        rate_limit = span['rate_limit']
+        if span['status'] in (403, 429) and (rate_limit['retry_after'] is not None or rate_limit['remaining'] == 0):
+            return True
+        return bool(rate_limit['limit'] and rate_limit['remaining'] is not None
+                    and rate_limit['remaining'] < rate_limit['limit'] * LOW_BUDGET_RATIO)
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.spans)
+
+    def summary(self) -> dict:
+        """
+        Totals and spans: {'trace_id', 'round_trips', 'retries', 'latency', 'rate_limit_remaining', 'spans'}.
+
+        retries is the number of requests that were resends, rate_limit_remaining the lowest budget any response
+        reported.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        remaining = [span['rate_limit']['remaining'] for span in spans if span['rate_limit']['remaining'] is not None]
+        return {
+            'trace_id': self.trace_id,
+            'round_trips': len(spans),
+            # A span's retries is its attempt index, every resent span is one retry
+            'retries': sum(1 for span in spans if span['retries'] > 0),
+            'latency': round(sum(span['latency'] for span in spans), 6),
+            'rate_limit_remaining': min(remaining) if remaining else None,
+            'spans': spans,
+        }
+
+
+@contextmanager
+def trace_api_calls(trace: ApiTrace = None, exporters: list = ()):
+    """Record every request of the tracing clients made in this context, threads and tasks started from it"""
+    trace = trace or ApiTrace(exporters)
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+
+
+def _start_span(request: httpx.Request):
+    trace = _active_trace.get()
+    if trace is not None:
+        request.extensions[_TRACE_EXTENSION] = (trace, time.time(), time.perf_counter())
+
+
+def _end_span(response: httpx.Response):
+    # Response hooks run once the headers arrived, before the body is read
+    started = response.request.extensions.get(_TRACE_EXTENSION)
+    if started is not None:
+        trace, start, perf_start = started
+        trace.record(response.request, response, start, time.perf_counter() - perf_start)
+
+
+async def _async_start_span(request: httpx.Request):
+    _start_span(request)
+
+
+async def _async_end_span(response: httpx.Response):
+    _end_span(response)
+
+
+def tracing_hooks() -> dict:
+    """
+    GitHub client keyword arguments recording its sync and async requests through httpx event hooks.
+
+    Hooks leave the connection pool to githubkit, which builds it per client with its own ssl_verify, proxy
+    and trust_env settings. The trace is picked when the request is sent, so each attempt of a retried
+    request is a span of the trace active in its caller's context. githubkit accepts them from 0.15.3,
+    tracing_github() also covers older releases.
+    """
+    return {'event_hooks': {'request': [_start_span], 'response': [_end_span]},
+            'async_event_hooks': {'request': [_async_start_span], 'response': [_async_end_span]}}
+
+
+def _add_hooks(client, hooks: dict):
+    client.event_hooks = {event: [*client.event_hooks.get(event, []), *hooks[event]] for event in hooks}
+    return client
+
+
+def tracing_github(*args, **kwargs):
+    """
+    githubkit GitHub client whose requests are recorded in the active trace, whatever githubkit is installed.
+
+    Releases before 0.15.3 take no event hooks, there the hooks are added to every httpx client githubkit
+    creates for a request.
+    """
+    import inspect
+
+    from githubkit import GitHub
+
+    hooks = tracing_hooks()
+    if 'event_hooks' in inspect.signature(GitHub.__init__).parameters:
+        return GitHub(*args, **kwargs, **hooks)
+
+    class LegacyTracingGitHub(GitHub):
+        # Both factories are plain methods returning the client in these releases
+        def _create_sync_client(self):
+            return _add_hooks(super()._create_sync_client(), hooks['event_hooks'])
+
+        def _create_async_client(self):
+            return _add_hooks(super()._create_async_client(), hooks['async_event_hooks'])
+
+    return LegacyTracingGitHub(*args, **kwargs)
@@ -0,0 +1,92 @@
+import io
+import tarfile
+import time
+import zipfile
+
+ARCHIVE_FORMATS = ("tar.gz", "zip")
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        # zipfile asks for offsets even on streams it can't seek
+        return self.position
+
+    def pending(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _iter_members(files, archive_format: str, sink, root: str = None):
+    """Add every file of the tree to an archive written to sink, yielding after each member"""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {archive_format}. Must be one of {ARCHIVE_FORMATS}.")
+
+    prefix = f"{root.strip('/')}/" if root else ""
+    mtime = time.time()
+
+    if archive_format == "tar.gz":
+        # 'w|gz' writes the archive strictly sequentially, nothing is buffered besides the current member
+        with tarfile.open(fileobj=sink, mode="w|gz") as tar:
+            for rel_path, content in files.items():
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(prefix + rel_path)
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+                yield
+    else:
+        date_time = time.localtime(mtime)[:6]
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for rel_path, content in files.items():
+                info = zipfile.ZipInfo(prefix + rel_path, date_time=date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, content.encode("utf-8"))
+                yield
+    yield
+
+
+def write_archive(files, fileobj, archive_format: str = "tar.gz", root: str = None):
+    """Stream a VirtualFileTree into a writable file object as a tar.gz or zip archive"""
+    for _ in _iter_members(files, archive_format, fileobj, root=root):
+        pass
+
+
+def iter_archive(files, archive_format: str = "tar.gz", root: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield a tar.gz or zip archive of a VirtualFileTree as byte chunks, e.g. for an HTTP response body.
+
+    Output is streamed: compressed bytes are handed out as soon as a chunk's worth is available. Input is held
+    in memory, the whole VirtualFileTree is rendered before the first chunk.
+    """
+    sink = _ChunkSink()
+    for _ in _iter_members(files, archive_format, sink, root=root):
+        if sink.pending() >= chunk_size:
+            data = sink.drain()
+            for start in range(0, len(data), chunk_size):
+                yield data[start:start + chunk_size]
+
+    data = sink.drain()
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from githubkit.exception import GitHubException
+from githubkit.graphql.models import GraphQLResponse
+
+from matrx_dream_service.matrx_microservice.collaborators import DEFAULT_WORKERS, RateLimiter, call_with_retry, \
+    shared_connection
+
+DEFAULT_BATCH_SIZE = 25  # Repositories per GraphQL query
+COLLABORATORS_PER_PAGE = 100
+REPOS_PER_PAGE = 100
+GRAPHQL_PERMISSIONS = {'ADMIN': 'admin', 'MAINTAIN': 'maintain', 'WRITE': 'push', 'TRIAGE': 'triage', 'READ': 'pull'}
+
+_COLLABORATORS = """
+    collaborators(first: %d, affiliation: DIRECT, after: $%s) {
+      pageInfo { hasNextPage endCursor }
+      edges { permission node { login } }
+    }"""
+
+_ORG_REPOS = """
+query($org: String!, $after: String) {
+  organization(login: $org) {
+    repositories(first: %d, after: $after, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name }
+    }
+  }
+}""" % REPOS_PER_PAGE
+
+
+def default_audit_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "matrx-dream-service" / "audit"
+
+
+def collaborators_etag(collaborators: list) -> str:
+    """Entity tag of a repo's access, equal across audits as long as nobody's access changed"""
+    canonical = json.dumps(sorted((c['username'].lower(), c['permission']) for c in collaborators))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class AuditCache:
+    """
+    Last audited collaborators per repo, one JSON file per org.
+
+    GitHub's GraphQL endpoint has no conditional requests, so each entry carries a content ETag instead. An
+    audit reports a repo as changed when its ETag differs from the cached one. Entries younger than max_age
+    seconds are served without asking GitHub at all.
+    """
+
+    def __init__(self, org: str, directory=None, max_age: float = 0):
+        self.path = Path(directory or default_audit_cache_dir()) / f"{org}.json"
+        self.max_age = max_age
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def fresh(self, repo: str):
+        entry = self.entries.get(repo)
+        if entry and self.max_age and time.time() - entry['fetched_at'] < self.max_age:
+            return entry
+        return None
+
+    def update(self, repo: str, collaborators: list) -> dict:
+        """Store a fetched result, returning its ETag and whether it changed since the last audit"""
+        etag = collaborators_etag(collaborators)
+        previous = self.entries.get(repo)
+        self.entries[repo] = {'etag': etag, 'collaborators': collaborators, 'fetched_at': time.time()}
+        return {'etag': etag, 'changed': previous is None or previous['etag'] != etag}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+async def _graphql(client, limiter: RateLimiter, query: str, variables: dict) -> dict:
+    """Run a query through the shared throttle. Repositories that don't exist come back as None"""
+
+    async def post(query: str, variables: dict):
+        response = await client.arequest("POST", "/graphql",
+                                         json=client.graphql.build_graphql_request(query, variables),
+                                         response_model=GraphQLResponse)
+        errors = response.parsed_data.errors or []
+        if any(error.type != 'NOT_FOUND' for error in errors):
+            client.graphql.parse_graphql_response(response)  # Raises rate limit or query errors
+        return response
+
+    response = await call_with_retry(limiter, post, query=query, variables=variables)
+    return response.parsed_data.data or {}
+
+
+async def list_org_repo_names(client, org: str, limiter: RateLimiter) -> list:
+    names = []
+    after = None
+    while True:
+        data = await _graphql(client, limiter, _ORG_REPOS, {'org': org, 'after': after})
+        repositories = data['organization']['repositories']
+        names.extend(node['name'] for node in repositories['nodes'])
+        if not repositories['pageInfo']['hasNextPage']:
+            return names
+        after = repositories['pageInfo']['endCursor']
+
+
+async def _fetch_batch(client, org: str, limiter: RateLimiter, batch: list) -> dict:
+    """Collaborators of up to batch_size repos, one aliased repository field per repo, following every cursor"""
+    results = {name: [] for name in batch}
+    missing = set()
+    cursors = {name: None for name in batch}
+
+    while cursors:
+        pending = list(cursors.items())
+        declarations = ["$org: String!"]
+        fields = []
+        variables = {'org': org}
+        for i, (name, cursor) in enumerate(pending):
+            declarations += [f"$n{i}: String!", f"$a{i}: String"]
+            variables[f"n{i}"] = name
+            variables[f"a{i}"] = cursor
+            collaborators = _COLLABORATORS % (COLLABORATORS_PER_PAGE, f"a{i}")
+            fields.append(f"  r{i}: repository(owner: $org, name: $n{i}) {{{collaborators}\n  }}")
+        query = f"query({', '.join(declarations)}) {{\n" + "\n".join(fields) + "\n}"
+
+        data = await _graphql(client, limiter, query, variables)
+        cursors = {}
+        for i, (name, _) in enumerate(pending):
+            repository = data.get(f"r{i}")
+            if repository is None:
+                missing.add(name)
+                continue
+            page = repository['collaborators']
+            results[name].extend({'username': edge['node']['login'],
+                                  'permission': GRAPHQL_PERMISSIONS.get(edge['permission'], 'pull')}
+                                 for edge in page['edges'])
+            # Repos with more than a page of collaborators are continued in the next, smaller query
+            if page['pageInfo']['hasNextPage']:
+                cursors[name] = page['pageInfo']['endCursor']
+
+    return {name: None if name in missing else collaborators for name, collaborators in results.items()}
+
+
+async def _fetch_batch_or_error(client, org: str, limiter: RateLimiter, batch: list) -> tuple:
+    """(batch, _fetch_batch result, None), or (batch, None, error) when a query of the batch failed"""
+    try:
+        return batch, await _fetch_batch(client, org, limiter, batch), None
+    except GitHubException as e:
+        return batch, None, f"{type(e).__name__}: {e}"
+
+
+async def iter_collaborator_audit(client, org: str, repo_names: list = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                                  concurrency: int = DEFAULT_WORKERS, cache: AuditCache = None,
+                                  limiter: RateLimiter = None):
+    """
+    Yield one record per repo as soon as its batch completes:
+    {'repo', 'collaborators': [{'username', 'permission'}], 'etag', 'changed', 'cached', 'error'}.
+
+    Without repo_names every repo of the org is audited. At most `concurrency` queries are in flight. A failed
+    query only fails its own batch: each of its repos gets a record with the error, the other batches go on.
+    """
+    limiter = limiter or RateLimiter(concurrency)
+    async with shared_connection(client):
+        if repo_names is None:
+            repo_names = await list_org_repo_names(client, org, limiter)
+
+        to_fetch = []
+        for name in repo_names:
+            entry = cache.fresh(name) if cache else None
+            if entry:
+                yield {'repo': name, 'collaborators': entry['collaborators'], 'etag': entry['etag'],
+                       'changed': False, 'cached': True, 'error': None}
+            else:
+                to_fetch.append(name)
+
+        batches = [to_fetch[i:i + batch_size] for i in range(0, len(to_fetch), max(1, batch_size))]
+        tasks = [asyncio.ensure_future(_fetch_batch_or_error(client, org, limiter, batch)) for batch in batches]
+        try:
+            for task in asyncio.as_completed(tasks):
+                batch, results, error = await task
+                if error is not None:
+                    for name in batch:
+                        yield {'repo': name, 'collaborators': [], 'etag': None, 'changed': False, 'cached': False,
+                               'error': error}
+                    continue
+                for name, collaborators in results.items():
+                    if collaborators is None:
+                        yield {'repo': name, 'collaborators': [], 'etag': None, 'changed': False, 'cached': False,
+                               'error': 'not found'}
+                        continue
+                    state = cache.update(name, collaborators) if cache else {
+                        'etag': collaborators_etag(collaborators), 'changed': True}
+                    yield {'repo': name, 'collaborators': collaborators, **state, 'cached': False, 'error': None}
+        finally:
+            for task in tasks:
+                task.cancel()
+            if cache:
+                cache.save()
@@ -0,0 +1,80 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from matrx_utils import vcprint
+
+
+def find_configs(config_dir: str) -> list:
+    """All *.json configs directly inside config_dir, sorted by name"""
+    return sorted(str(path) for path in Path(config_dir).glob("*.json"))
+
+
+def _generate_one(config_path: str, output_dir: str, generator_options: dict) -> dict:
+    # Imported here so worker processes pay for the generator import, not the parent's CLI startup
+    from matrx_dream_service.matrx_microservice.generator import MicroserviceGenerator
+
+    start = time.perf_counter()
+    result = {
+        'config': config_path,
+        'output_dir': output_dir,
+        'success': False,
+        'error': None,
+        'repo': None,
+        'duration': 0.0,
+        'metrics': None,
+    }
+    generator = None
+    try:
+        options = dict(generator_options)
+        if options.get('create_github_repo') and not options.get('github_project_name'):
+            options['github_project_name'] = Path(config_path).stem
+        generator = MicroserviceGenerator(config_path=config_path, output_dir=output_dir, **options)
+        result['repo'] = generator.generate_microservice()
+        result['output_dir'] = str(generator.output_dir)
+        result['success'] = True
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    if generator is not None:
+        result['metrics'] = generator.metrics.report()
+    result['duration'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def generate_batch(config_paths: list, output_root: str, workers: int = None, **generator_options) -> list:
+    """
+    Generate one project per config concurrently on a process pool.
+
+    Each config is rendered into output_root/<config stem>. generator_options are passed to every
+    MicroserviceGenerator. Failures are captured per config so one bad config never aborts the rest.
+    Returns one result dict per config, in input order:
+    {'config', 'output_dir', 'success', 'error', 'repo', 'duration', 'metrics'}.
+    """
+    output_root = Path(output_root)
+    workers = workers or os.cpu_count() or 1
+    # Projects already run in parallel, nested formatting pools would only oversubscribe the CPUs
+    generator_options.setdefault('format_workers', 1)
+
+    jobs = [(str(config_path), str(output_root / Path(config_path).stem)) for config_path in config_paths]
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(jobs)))) as pool:
+        futures = {pool.submit(_generate_one, config_path, output_dir, generator_options): (config_path, output_dir)
+                   for config_path, output_dir in jobs}
+        for future in as_completed(futures):
+            config_path, output_dir = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool), record it like any other failure
+                result = {'config': config_path, 'output_dir': output_dir, 'success': False,
+                          'error': f"{type(e).__name__}: {e}", 'repo': None, 'duration': 0.0, 'metrics': None}
+            results[config_path] = result
+
+            if result['success']:
+                vcprint(f"[matrx-dream-service] ✅ {config_path} generated in {result['duration']}s", color="green")
+            else:
+                vcprint(f"[matrx-dream-service] ❌ {config_path} failed: {result['error']}", color="red")
+
+    return [results[config_path] for config_path, _ in jobs]
@@ -0,0 +1,255 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# name: (services, tasks, fields per definition)
+SCALES = {
+    "tiny": (1, 1, 4),
+    "small": (10, 100, 8),
+    "medium": (50, 1000, 12),
+    "large": (200, 5000, 16),
+}
+DEFAULT_THRESHOLD = 0.2
+NOISE_FLOOR = 0.01  # Seconds, smaller absolute slowdowns are never reported as regressions
+STARTUP_MODULE = "matrx_dream_service.cli"
+DEFAULT_STARTUP_BUDGET_MS = 250
+# Modules the CLI must not import until a command actually needs them
+HEAVY_MODULES = ("githubkit", "black", "matrx_utils")
+
+
+def make_synthetic_config(services: int, tasks: int, fields_per_definition: int = 8) -> dict:
+    """
+    Deterministic config with `tasks` tasks spread over `services` services.
+
+    Every other task references a definition, the rest declare their fields inline, so both field
+    resolution paths are exercised. Definitions carry types, descriptions and defaults to make them large.
+    """
+    definitions = {}
+    schema_tasks = {}
+    per_service = max(1, tasks // max(1, services))
+    remaining = tasks
+
+    for s in range(services):
+        count = remaining if s == services - 1 else min(per_service, remaining)
+        remaining -= count
+        service_tasks = {}
+        for t in range(count):
+            fields = {
+                f"field_{f}": {
+                    "type": ("string", "integer", "boolean", "object")[f % 4],
+                    "description": f"Field {f} of task {t} in service {s}, used for synthetic benchmarking",
+                    "required": f % 3 == 0,
+                    "default": None if f % 3 == 0 else f,
+                }
+                for f in range(fields_per_definition)
+            }
+            if t % 2:
+                def_name = f"BENCH_{s}_{t}_DEFINITION"
+                definitions[def_name] = fields
+                service_tasks[f"TASK_{t}"] = {"$ref": f"definitions/{def_name}"}
+            else:
+                service_tasks[f"TASK_{t}"] = fields
+        schema_tasks[f"BENCH{s}_SERVICE"] = service_tasks
+
+    return {
+        "settings": {"app_name": "matrx-bench", "app_primary_service_name": "bench0"},
+        "schema": {"definitions": definitions, "tasks": schema_tasks},
+    }
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_scale(name: str, repeat: int, format_workers: int, use_format_cache: bool) -> dict:
+    """Benchmark one scale, runs in a fresh process so peak RSS belongs to this scale only"""
+    from matrx_dream_service.matrx_microservice.generator import MicroserviceGenerator
+
+    services, tasks, fields = SCALES[name]
+    config = make_synthetic_config(services, tasks, fields)
+    runs = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        # The first run only warms up imports and black's caches and is discarded
+        # `uv lock` resolves over the network, which is not what the bench measures
+        for i in range(repeat + 1):
+            start = time.perf_counter()
+            generator = MicroserviceGenerator(config_path=config_path, output_dir=os.path.join(tmp, f"out_{i}"),
+                                              format_workers=format_workers, use_format_cache=use_format_cache,
+                                              format_cache_dir=os.path.join(tmp, "format_cache"),
+                                              run_post_create=False, use_lock_store=False)
+            generator.generate_microservice()
+            total = time.perf_counter() - start
+            if i:
+                runs.append((total, generator.last_metrics))
+
+    stage_walls = {}
+    for _, report in runs:
+        for stage in report['stages']:
+            stage_walls.setdefault(stage['stage'], []).append(stage['wall'])
+
+    return {
+        "scale": name,
+        "services": services,
+        "tasks": tasks,
+        "definitions": len(config["schema"]["definitions"]),
+        "files": runs[-1][1]['files'],
+        "bytes": runs[-1][1]['bytes'],
+        "total": round(statistics.median(total for total, _ in runs), 4),
+        "stages": {stage: round(statistics.median(walls), 4) for stage, walls in stage_walls.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(scales: list = None, repeat: int = 3, format_workers: int = 1,
+                   use_format_cache: bool = False) -> dict:
+    """
+    Run end-to-end generation for each scale and collect total and per-stage median wall times plus peak RSS.
+
+    Post-create scripts and GitHub steps are excluded. The format cache is off by default so black is
+    measured on every run.
+    """
+    results = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "format_workers": format_workers,
+        "format_cache": use_format_cache,
+        "scales": {},
+    }
+    for name in scales or list(SCALES):
+        if name not in SCALES:
+            raise ValueError(f"Unknown benchmark scale: {name}. Must be one of {list(SCALES)}.")
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results["scales"][name] = pool.submit(_run_scale, name, repeat, format_workers, use_format_cache).result()
+    return results
+
+
+def _import_times(module: str) -> tuple:
+    """Wall ms of a fresh interpreter importing module, and the set of top-level packages it loaded"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - start) * 1000
+    loaded = set()
+    # stderr lines look like "import time:   self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            if name != "imported package":
+                loaded.add(name.split(".")[0])
+    return wall, loaded
+
+
+def measure_startup(module: str = STARTUP_MODULE, runs: int = 5, budget_ms: float = DEFAULT_STARTUP_BUDGET_MS) -> dict:
+    """
+    Median wall time of importing module in a fresh interpreter, compared with a budget.
+
+    Also reports which of HEAVY_MODULES were imported, the CLI should load none of them at startup.
+    """
+    baseline = statistics.median(_import_times("sys")[0] for _ in range(runs))
+    walls = []
+    loaded = set()
+    for _ in range(runs):
+        wall, modules = _import_times(module)
+        walls.append(wall)
+        loaded |= modules
+    import_ms = round(max(0.0, statistics.median(walls) - baseline), 1)
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    return {
+        "module": module,
+        "runs": runs,
+        "interpreter_ms": round(baseline, 1),
+        "import_ms": import_ms,
+        "budget_ms": budget_ms,
+        "heavy_modules": heavy,
+        "within_budget": import_ms <= budget_ms and not heavy,
+    }
+
+
+def print_startup(startup: dict):
+    print(f"\nstartup: import {startup['module']} {startup['import_ms']}ms "
+          f"(budget {startup['budget_ms']}ms, interpreter {startup['interpreter_ms']}ms)")
+    if startup["heavy_modules"]:
+        print(f"  heavy modules imported at startup: {', '.join(startup['heavy_modules'])}")
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Compare results with a baseline run, returning one row per scale and metric present in both.
+
+    A row is a regression when the current value exceeds the baseline by more than threshold (0.2 = 20%).
+    """
+    rows = []
+    for name, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(name)
+        if not previous:
+            continue
+        metrics = [("total", current["total"], previous["total"]),
+                   ("peak_rss_mb", current.get("peak_rss_mb"), previous.get("peak_rss_mb"))]
+        metrics += [(f"stage:{stage}", wall, previous["stages"].get(stage))
+                    for stage, wall in current["stages"].items()]
+        for metric, value, before in metrics:
+            if value is None or before is None:
+                continue
+            ratio = value / before if before else None
+            rows.append({
+                "scale": name,
+                "metric": metric,
+                "baseline": before,
+                "current": value,
+                "ratio": round(ratio, 3) if ratio is not None else None,
+                # Memory is compared relatively only, timings must also exceed the noise floor
+                "regression": ratio is not None and ratio > 1 + threshold and (
+                    metric == "peak_rss_mb" or value - before > NOISE_FLOOR),
+            })
+    return rows
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def print_results(results: dict):
+    for name, scale in results["scales"].items():
+        print(f"\n{name}: {scale['services']} services, {scale['tasks']} tasks, {scale['definitions']} definitions, "
+              f"{scale['files']} files, {scale['bytes'] // 1024} KiB")
+        print(f"  total {scale['total']:.4f}s   peak rss {scale['peak_rss_mb']} MiB")
+        for stage, wall in sorted(scale["stages"].items(), key=lambda item: -item[1]):
+            print(f"    {stage:<32} {wall:.4f}s")
+
+
+def print_comparison(rows: list, threshold: float = DEFAULT_THRESHOLD):
+    print(f"\nComparison with baseline (regression threshold {threshold:.0%}):")
+    for row in rows:
+        if row["metric"].startswith("stage:") and not row["regression"]:
+            continue
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"  {row['scale']:<8} {row['metric']:<40} {row['baseline']:>10} -> {row['current']:<10} "
+              f"x{row['ratio']}  {flag}")
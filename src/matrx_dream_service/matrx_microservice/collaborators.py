@@ -0,0 +1,339 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from githubkit.exception import RateLimitExceeded, RequestFailed
+from matrx_utils import vcprint
+
+DEFAULT_WORKERS = 8
+MAX_ATTEMPTS = 5
+MIN_REMAINING = 5  # Once the primary limit drops this low every worker waits for the reset
+# Highest to lowest, GitHub's own role hierarchy. Both desired permission dicts and the `permissions` GitHub
+# reports for a collaborator (a push user also has triage and pull) are ranked by it
+PERMISSION_ORDER = ['admin', 'maintain', 'push', 'triage', 'pull']
+PER_PAGE = 100
+# Invitations name roles the way the web UI does
+INVITATION_ROLES = {'read': 'pull', 'write': 'push', 'triage': 'triage', 'maintain': 'maintain', 'admin': 'admin'}
+INVITATION_PERMISSIONS = {role: name for name, role in INVITATION_ROLES.items()}
+
+
+def permission_from_dict(perm_dict: dict):
+    """Highest role enabled in a permission dict, None if none is"""
+    for perm in PERMISSION_ORDER:
+        if perm_dict.get(perm, False):
+            return perm
+    return None
+
+
+class RateLimiter:
+    """
+    Throttle shared by the requests of one provisioning run, allowing at most `workers` in flight.
+
+    It reads GitHub's x-ratelimit-* headers from every response and pauses all requests until the reset when
+    the remaining budget runs low. A rate limited response (403/429) pauses everyone for its retry-after and
+    halves the concurrency, which grows back by one after as many successes as the current limit, up to just
+    below the level that was refused.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, min_remaining: int = MIN_REMAINING):
+        self.max_limit = max(1, workers)
+        self.limit = self.max_limit
+        self.min_remaining = min_remaining
+        self.active = 0
+        self.resume_at = 0.0
+        self.remaining = None
+        self.backoffs = 0
+        self.requests = 0
+        self._successes = 0
+        self._epoch = 0  # Bumped on every cut so one burst of 403s only halves the limit once
+        self._condition = None
+
+    async def acquire(self) -> int:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        while True:
+            delay = self.resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with self._condition:
+                if self.resume_at > time.monotonic():
+                    continue
+                if self.active < self.limit:
+                    self.active += 1
+                    self.requests += 1
+                    return self._epoch
+                await self._condition.wait()
+
+    async def release(self, epoch: int, rate_limited: bool = False):
+        async with self._condition:
+            self.active -= 1
+            if rate_limited:
+                if epoch == self._epoch:
+                    # Never climb back to a concurrency GitHub already refused
+                    self.max_limit = max(1, self.limit - 1)
+                    self.limit = max(1, self.limit // 2)
+                    self._successes = 0
+                    self._epoch += 1
+            elif self.limit < self.max_limit:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def observe(self, headers):
+        remaining = headers.get('x-ratelimit-remaining')
+        if remaining is None:
+            return
+        self.remaining = int(remaining)
+        reset = headers.get('x-ratelimit-reset')
+        if self.remaining <= self.min_remaining and reset:
+            self.pause(max(0.0, int(reset) - time.time()))
+
+
+def _is_rate_limited(e: RequestFailed) -> bool:
+    if isinstance(e, RateLimitExceeded):
+        return True
+    # Secondary limits are not always flagged by headers, only by status and message
+    return e.response.status_code in (403, 429) and 'rate limit' in e.response.text.lower()
+
+
+async def call_with_retry(limiter: RateLimiter, method, **kwargs):
+    """Await a githubkit async method within the limiter, retrying rate limited calls with backoff"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        epoch = await limiter.acquire()
+        rate_limited = False
+        try:
+            response = await method(**kwargs)
+            limiter.observe(response.headers)
+            return response
+        except RequestFailed as e:
+            limiter.observe(e.response.headers)
+            rate_limited = _is_rate_limited(e)
+            if attempt == MAX_ATTEMPTS or not rate_limited:
+                raise
+            if isinstance(e, RateLimitExceeded):
+                delay = e.retry_after.total_seconds()
+            else:
+                delay = min(60, 2 ** attempt)
+            limiter.backoffs += 1
+            limiter.pause(delay + random.uniform(0, 1))
+            vcprint(f"[matrx-dream-service] Rate limited ({e.response.status_code}), retrying in {delay:.0f}s",
+                    color="yellow")
+        finally:
+            await limiter.release(epoch, rate_limited)
+
+
+@asynccontextmanager
+async def shared_connection(client):
+    """Reuse one connection pool for every call of a run, unless the caller already opened one"""
+    try:
+        await client.__aenter__()
+    except RuntimeError:  # Already inside `async with client`
+        yield
+        return
+    try:
+        yield
+    finally:
+        await client.__aexit__()
+
+
+async def add_collaborators_concurrently(client, org: str, repo_name: str, access: list,
+                                         workers: int = DEFAULT_WORKERS, limiter: RateLimiter = None,
+                                         default_permission: str = None) -> dict:
+    """
+    Invite every collaborator in access with at most `workers` requests in flight.
+
+    Entries without any permission are skipped unless default_permission is given.
+    """
+    limiter = limiter or RateLimiter(workers)
+
+    async def add(username: str, permission: str) -> bool:
+        try:
+            await call_with_retry(limiter, client.rest.repos.async_add_collaborator, owner=org, repo=repo_name,
+                                  username=username, permission=permission)
+        except RequestFailed as e:
+            vcprint(f"[matrx-dream-service] Error adding User {username} as collaborator: "
+                    f"{e.response.status_code} - {e.response.text}", color="red")
+            return False
+        vcprint(f"[matrx-dream-service] User {username} added as collaborator with {permission} permission.",
+                color="green")
+        return True
+
+    jobs = []
+    for entry in access:
+        username = entry.get('username')
+        if not username:
+            jobs.append((username, None))
+            continue
+        permission = permission_from_dict(entry.get('permission', {})) or default_permission
+        if permission:
+            jobs.append((username, add(username, permission)))
+
+    async with shared_connection(client):
+        outcomes = await asyncio.gather(*(job for _, job in jobs if job is not None))
+
+    success, failed = [], []
+    outcomes = iter(outcomes)
+    for username, job in jobs:
+        (success if job is not None and next(outcomes) else failed).append(username)
+    return {'success': success, 'failed': failed}
+
+
+async def remove_collaborators_concurrently(client, org: str, repo_name: str, usernames: list,
+                                            workers: int = DEFAULT_WORKERS, limiter: RateLimiter = None) -> dict:
+    limiter = limiter or RateLimiter(workers)
+
+    async def remove(username: str) -> bool:
+        try:
+            await call_with_retry(limiter, client.rest.repos.async_remove_collaborator, owner=org, repo=repo_name,
+                                  username=username)
+        except RequestFailed:
+            return False
+        vcprint(f"[matrx-dream-service] User {username} removed as collaborator.", color="green")
+        return True
+
+    async with shared_connection(client):
+        outcomes = await asyncio.gather(*(remove(username) for username in usernames))
+
+    return {'success': [username for username, ok in zip(usernames, outcomes) if ok],
+            'failed': [username for username, ok in zip(usernames, outcomes) if not ok]}
+
+
+def _granted_permission(permissions: dict) -> str:
+    """GitHub's permissions hash is cumulative (a push collaborator also has triage and pull), read it top down"""
+    return permission_from_dict(permissions) or 'pull'
+
+
+async def _iter_pages(limiter: RateLimiter, method, **kwargs):
+    """Yield every item of a paginated list endpoint as raw JSON, one page in memory at a time"""
+    page = 1
+    while True:
+        response = await call_with_retry(limiter, method, per_page=PER_PAGE, page=page, **kwargs)
+        items = response.json()
+        for item in items:
+            yield item
+        if len(items) < PER_PAGE:
+            return
+        page += 1
+
+
+async def fetch_collaborators(client, org: str, repo_name: str, limiter: RateLimiter = None,
+                              include_invitations: bool = True) -> dict:
+    """
+    Current direct access of a repo across all pages: {login: {'username', 'permission', 'invitation_id'}}.
+
+    Pending invitations count as access too, with their invitation id, so they aren't re-sent on every sync.
+    """
+    limiter = limiter or RateLimiter()
+    current = {}
+    async for collab in _iter_pages(limiter, client.rest.repos.async_list_collaborators, owner=org, repo=repo_name,
+                                    affiliation='direct'):
+        current[collab['login'].lower()] = {'username': collab['login'],
+                                            'permission': _granted_permission(collab.get('permissions') or {}),
+                                            'invitation_id': None}
+    if include_invitations:
+        async for invitation in _iter_pages(limiter, client.rest.repos.async_list_invitations, owner=org,
+                                            repo=repo_name):
+            login = (invitation.get('invitee') or {}).get('login')
+            if login and login.lower() not in current:
+                current[login.lower()] = {'username': login,
+                                          'permission': INVITATION_ROLES.get(invitation['permissions'], 'pull'),
+                                          'invitation_id': invitation['id']}
+    return current
+
+
+def diff_collaborators(current: dict, desired_access: list) -> dict:
+    """
+    Minimal changes turning current access (from fetch_collaborators) into desired_access.
+
+    Returns {'add', 'update', 'remove', 'unchanged'}. Usernames compare case-insensitively, a later entry for
+    the same user wins and entries without a permission default to pull.
+    """
+    desired = {}
+    for entry in desired_access:
+        username = entry.get('username')
+        if username:
+            desired[username.lower()] = (username, permission_from_dict(entry.get('permission', {})) or 'pull')
+
+    plan = {'add': [], 'update': [], 'remove': [], 'unchanged': []}
+    for login, (username, permission) in desired.items():
+        existing = current.get(login)
+        if existing is None:
+            plan['add'].append({'username': username, 'permission': permission})
+        elif existing['permission'] != permission:
+            plan['update'].append({'username': existing['username'], 'from': existing['permission'],
+                                   'to': permission, 'invitation_id': existing['invitation_id']})
+        else:
+            plan['unchanged'].append(existing['username'])
+    for login, existing in current.items():
+        if login not in desired:
+            plan['remove'].append({'username': existing['username'], 'permission': existing['permission'],
+                                   'invitation_id': existing['invitation_id']})
+    return plan
+
+
+async def sync_collaborators_concurrently(client, org: str, repo_name: str, desired_access: list,
+                                          dry_run: bool = False, workers: int = DEFAULT_WORKERS,
+                                          limiter: RateLimiter = None) -> dict:
+    """
+    Reconcile a repo's direct collaborators with desired_access using the fewest API calls.
+
+    Only additions, permission changes and removals are sent, concurrently. With dry_run nothing is changed
+    and the report lists the planned actions. Report: {'repo', 'dry_run', 'added', 'updated', 'removed',
+    'unchanged', 'failed'}, where failed holds {'username', 'action', 'error'} for calls that were refused.
+    """
+    limiter = limiter or RateLimiter(workers)
+    report = {'repo': repo_name, 'dry_run': dry_run, 'added': [], 'updated': [], 'removed': [], 'unchanged': [],
+              'failed': []}
+
+    async def apply(action: str, change: dict):
+        """Send one change, returning the error text if GitHub refused it"""
+        username = change['username']
+        try:
+            if action == 'removed' and change['invitation_id']:
+                await call_with_retry(limiter, client.rest.repos.async_delete_invitation, owner=org,
+                                      repo=repo_name, invitation_id=change['invitation_id'])
+            elif action == 'removed':
+                await call_with_retry(limiter, client.rest.repos.async_remove_collaborator, owner=org,
+                                      repo=repo_name, username=username)
+            elif action == 'updated' and change['invitation_id']:
+                await call_with_retry(limiter, client.rest.repos.async_update_invitation, owner=org,
+                                      repo=repo_name, invitation_id=change['invitation_id'],
+                                      permissions=INVITATION_PERMISSIONS[change['to']])
+            else:
+                permission = change['to'] if action == 'updated' else change['permission']
+                await call_with_retry(limiter, client.rest.repos.async_add_collaborator, owner=org,
+                                      repo=repo_name, username=username, permission=permission)
+        except RequestFailed as e:
+            return f"{e.response.status_code} - {e.response.text}"
+        return None
+
+    async with shared_connection(client):
+        current = await fetch_collaborators(client, org, repo_name, limiter)
+        plan = diff_collaborators(current, desired_access)
+        report['unchanged'] = plan['unchanged']
+        changes = [('added', change) for change in plan['add']] + \
+                  [('updated', change) for change in plan['update']] + \
+                  [('removed', change) for change in plan['remove']]
+
+        if dry_run:
+            errors = [None] * len(changes)
+        else:
+            errors = await asyncio.gather(*(apply(action, change) for action, change in changes))
+
+    for (action, change), error in zip(changes, errors):
+        if error:
+            report['failed'].append({'username': change['username'], 'action': action, 'error': error})
+        else:
+            report[action].append({key: value for key, value in change.items() if key != 'invitation_id'})
+
+    vcprint(f"[matrx-dream-service] {'Planned' if dry_run else 'Synced'} collaborators of {repo_name}: "
+            f"{len(report['added'])} added, {len(report['updated'])} updated, {len(report['removed'])} removed, "
+            f"{len(report['unchanged'])} unchanged, {len(report['failed'])} failed", color="blue")
+    return report
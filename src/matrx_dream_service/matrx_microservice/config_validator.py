@@ -0,0 +1,158 @@
+import json
+import keyword
+from functools import lru_cache
+
+from matrx_utils import RESTRICTED_SERVICE_NAMES, \
+    RESTRICTED_ENV_VAR_NAMES, RESTRICTED_TASK_AND_DEFINITIONS, RESTRICTED_FIELD_NAMES
+from matrx_dream_service.matrx_microservice.schema_ir import parse_ref, clean_service_name
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a config fails validation, .errors holds the structured errors"""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        super().__init__(
+            "Configuration validation failed:\n" + "\n".join(f"  - {error['message']}" for error in errors))
+
+
+def _child(path: str, key) -> str:
+    key = str(key)
+    if key.isidentifier():
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key)}]"
+
+
+def _is_identifier(name) -> bool:
+    return isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name)
+
+
+class ConfigValidator:
+    """
+    Validates a user config in one linear pass over env, definitions and tasks.
+
+    Restricted names are lowercased into frozensets once when the validator is built. Each error is a dict
+    with a JSON path into the config, an error code and a human readable message.
+    """
+
+    def __init__(self, restricted_env_vars, restricted_services, restricted_tasks_and_definitions,
+                 restricted_fields):
+        self.restricted_env_vars = frozenset(restricted_env_vars)  # Case sensitive
+        self.restricted_services = frozenset(name.lower() for name in restricted_services)
+        self.restricted_tasks_and_definitions = frozenset(name.lower() for name in restricted_tasks_and_definitions)
+        self.restricted_fields = frozenset(name.lower() for name in restricted_fields)
+
+    def validate(self, config: dict) -> list:
+        errors = []
+
+        def error(path, code, message):
+            errors.append({'path': path, 'code': code, 'message': message})
+
+        env_vars = config.get("env") or {}
+        for env_name in env_vars:
+            if env_name in self.restricted_env_vars:
+                error(_child("$.env", env_name), "restricted_env_var",
+                      f"Environment variable '{env_name}' is restricted")
+
+        schema = config.get("schema") or {}
+        definitions = schema.get("definitions") or {}
+        for def_name, fields in definitions.items():
+            def_path = _child("$.schema.definitions", def_name)
+            if def_name.lower() in self.restricted_tasks_and_definitions:
+                error(def_path, "restricted_definition_name",
+                      f"Schema definition '{def_name}' is restricted (case insensitive)")
+            if not isinstance(fields, dict):
+                error(def_path, "invalid_definition", f"Schema definition '{def_name}' must be an object of fields")
+                continue
+            self._validate_fields(fields, def_path, f"definition '{def_name}'", error)
+
+        tasks = schema.get("tasks") or {}
+        class_names = {}
+        for service_name, service_tasks in tasks.items():
+            service_path = _child("$.schema.tasks", service_name)
+            if service_name.lower() in self.restricted_services:
+                error(service_path, "restricted_service_name",
+                      f"Service name '{service_name}' is restricted (case insensitive)")
+
+            # The cleaned name becomes a package, a module and the prefix of the generated class names
+            clean_name = clean_service_name(service_name)
+            if not _is_identifier(clean_name):
+                error(service_path, "invalid_service_name",
+                      f"Service name '{service_name}' does not produce a valid python identifier ('{clean_name}')")
+            elif clean_name in class_names:
+                error(service_path, "duplicate_service_class",
+                      f"Service name '{service_name}' produces the same class names as '{class_names[clean_name]}'")
+            else:
+                class_names[clean_name] = service_name
+
+            if not isinstance(service_tasks, dict):
+                error(service_path, "invalid_service", f"Service '{service_name}' must be an object of tasks")
+                continue
+
+            method_names = {}
+            for task_name, task_def in service_tasks.items():
+                task_path = _child(service_path, task_name)
+                method_name = task_name.lower()
+                if method_name in self.restricted_tasks_and_definitions:
+                    error(task_path, "restricted_task_name",
+                          f"Task name '{task_name}' in service '{service_name}' is restricted (case insensitive)")
+                if not _is_identifier(method_name):
+                    error(task_path, "invalid_task_name",
+                          f"Task name '{task_name}' in service '{service_name}' is not a valid python identifier")
+                elif method_name in method_names:
+                    error(task_path, "duplicate_task_method",
+                          f"Task name '{task_name}' in service '{service_name}' produces the same method as "
+                          f"'{method_names[method_name]}'")
+                else:
+                    method_names[method_name] = task_name
+
+                if not isinstance(task_def, dict):
+                    error(task_path, "invalid_task", f"Task '{task_name}' in service '{service_name}' must be an object")
+                elif "$ref" in task_def:
+                    ref = task_def["$ref"]
+                    if parse_ref(ref) not in definitions:
+                        error(_child(task_path, "$ref"), "dangling_ref",
+                              f"Task '{task_name}' in service '{service_name}' references unknown definition '{ref}'")
+                else:
+                    self._validate_fields(task_def, task_path, f"task '{task_name}' of service '{service_name}'",
+                                          error)
+
+        for index, script in enumerate(config.get("post_create_scripts") or []):
+            script_path = f"$.post_create_scripts[{index}]"
+            if isinstance(script, str):
+                continue
+            if not isinstance(script, dict) or not isinstance(script.get("command"), str):
+                error(script_path, "invalid_post_create_script",
+                      "Post-create script must be a command string or an object with a command")
+            elif not isinstance(script.get("timeout", 1), (int, float)) or script.get("timeout", 1) <= 0:
+                error(_child(script_path, "timeout"), "invalid_post_create_timeout",
+                      f"Timeout of post-create script '{script['command']}' must be a positive number of seconds")
+
+        return errors
+
+    def _validate_fields(self, fields: dict, path: str, owner: str, error):
+        for field_name in fields:
+            if field_name.lower() in self.restricted_fields:
+                error(_child(path, field_name), "restricted_field_name",
+                      f"Field name '{field_name}' in {owner} is restricted (case insensitive)")
+            elif not _is_identifier(field_name):
+                error(_child(path, field_name), "invalid_field_name",
+                      f"Field name '{field_name}' in {owner} is not a valid python identifier")
+
+    def check(self, config: dict):
+        """Raise ConfigValidationError if the config has any errors"""
+        errors = self.validate(config)
+        if errors:
+            raise ConfigValidationError(errors)
+
+
+@lru_cache(maxsize=None)
+def get_config_validator() -> ConfigValidator:
+    """Process-wide validator built from the matrx_utils restricted name sets"""
+    return ConfigValidator(RESTRICTED_ENV_VAR_NAMES, RESTRICTED_SERVICE_NAMES, RESTRICTED_TASK_AND_DEFINITIONS,
+                           RESTRICTED_FIELD_NAMES)
+
+
+def validate_config(config: dict) -> list:
+    """Return the structured validation errors of a user config, an empty list when it is valid"""
+    return get_config_validator().validate(config)
@@ -0,0 +1,110 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+PRUNE_INTERVAL = 256  # Writes between directory scans while the estimated size stays under max_bytes
+STALE_TMP_AGE = 3600  # A temporary entry this old was left behind by a writer that died before its rename
+
+
+def default_store_dir(env_var: str, name: str) -> Path:
+    """env_var if set, else <XDG cache>/matrx-dream-service/<name>"""
+    configured = os.environ.get(env_var)
+    if configured:
+        return Path(configured)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "matrx-dream-service" / name
+
+
+class ContentStore:
+    """
+    Entries keyed by a sha256 hex digest, stored as <directory>/<key[:2]>/<key><suffix> and shared by every
+    process using the directory.
+
+    _write() goes through a temporary file and a rename, so readers never see a partial entry. prune() deletes
+    temporary files older than STALE_TMP_AGE, then evicts the least recently used entries until the store fits
+    in max_bytes. maybe_prune() scans only on its first call, every PRUNE_INTERVAL writes, or when the size seen
+    by the last scan plus the bytes written since exceeds max_bytes. Subclasses with another entry layout
+    override _entries() and _remove().
+    """
+
+    suffix = ""
+    tmp_pattern = "*/.*.tmp"
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Total entry size at the last prune, None before the first
+        self._writes = 0
+        self._written = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def _write(self, key: str, data: bytes) -> bool:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent generations never read a partial entry
+            tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return False
+        self._added(len(data))
+        return True
+
+    def _added(self, size: int):
+        self._writes += 1
+        self._written += size
+
+    @staticmethod
+    def _last_used(stat) -> float:
+        return stat.st_mtime
+
+    def _entries(self):
+        """(last used, size, entry) of every entry"""
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield self._last_used(stat), stat.st_size, path
+
+    def _remove(self, entry):
+        entry.unlink()
+
+    def maybe_prune(self) -> int:
+        """prune() when one is due, returns the number of entries removed"""
+        if self._size is not None and self._writes < PRUNE_INTERVAL and self._size + self._written <= self.max_bytes:
+            return 0
+        return self.prune()
+
+    def prune(self) -> int:
+        """Evict least recently used entries until the store fits in max_bytes, returns the number removed"""
+        stale_before = time.time() - STALE_TMP_AGE
+        for path in self.directory.glob(self.tmp_pattern):
+            try:
+                if path.lstat().st_mtime < stale_before:
+                    self._remove(path)
+            except OSError:
+                continue
+
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        entries.sort(key=lambda entry: entry[:2])
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                self._remove(entry)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size, self._writes, self._written = total, 0, 0
+        return removed
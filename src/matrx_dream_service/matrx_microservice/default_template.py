@@ -34,6 +34,10 @@ default_config = {
         ".env.example",
         ".gitignore",
         "README.md"
+    ],
+    "post_create_scripts": [
+        "uv sync",
+        "uv run --active generate_model_files.py --create-all true"
     ]
 
 }
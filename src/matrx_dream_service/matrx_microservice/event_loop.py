@@ -0,0 +1,19 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_sync(coroutine):
+    """
+    asyncio.run for the sync API, also from a thread whose event loop is already running (Jupyter, async servers).
+
+    asyncio.run refuses to nest, so under a running loop the coroutine gets its own loop in a worker thread and
+    the caller blocks until it's done, like any other sync call. The caller's context variables (API traces)
+    are carried over. Async callers should await the async_* variants instead of blocking their loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import uuid
+from pathlib import Path, PurePosixPath
+
+
+class VirtualFileTree:
+    """In-memory project tree that every generation stage renders into before a single flush to disk"""
+
+    def __init__(self):
+        self.files = {}
+        # Running totals of what stages rendered, used for per-stage metrics
+        self.writes = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def _key(path) -> str:
+        return PurePosixPath(str(path).replace('\\', '/')).as_posix()
+
+    def write(self, path, content: str):
+        self.files[self._key(path)] = content
+        self.writes += 1
+        self.bytes_written += len(content.encode("utf-8"))
+
+    def append(self, path, content: str):
+        key = self._key(path)
+        self.files[key] = self.files.get(key, "") + content
+        self.writes += 1
+        self.bytes_written += len(content.encode("utf-8"))
+
+    def touch(self, path):
+        """Create an empty file unless one is already present"""
+        if self._key(path) not in self.files:
+            self.files[self._key(path)] = ""
+            self.writes += 1
+
+    def size(self) -> int:
+        """Total size of the tree in bytes once encoded"""
+        return sum(len(content.encode("utf-8")) for content in self.files.values())
+
+    def read(self, path, default: str = None) -> str:
+        return self.files.get(self._key(path), default)
+
+    def exists(self, path) -> bool:
+        return self._key(path) in self.files
+
+    def paths(self, suffix: str = None) -> list:
+        if suffix is None:
+            return list(self.files)
+        return [path for path in self.files if path.endswith(suffix)]
+
+    def items(self):
+        return self.files.items()
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def _write_to(self, root: Path):
+        created_dirs = set()
+        for rel_path, content in self.files.items():
+            full_path = root / rel_path
+            parent = full_path.parent
+            if parent not in created_dirs:
+                parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(parent)
+            with open(full_path, 'w', encoding="utf-8") as f:
+                f.write(content)
+
+    @staticmethod
+    def _link_existing(source: Path, target: Path):
+        """Hardlink (or copy) everything in source that the staged tree doesn't replace into target"""
+        for dirpath, dirnames, filenames in os.walk(source):
+            rel = Path(dirpath).relative_to(source)
+            for name in list(dirnames) + filenames:
+                src, dst = Path(dirpath) / name, target / rel / name
+                if src.is_symlink():
+                    if name in dirnames:
+                        dirnames.remove(name)
+                    if not os.path.lexists(dst):
+                        os.symlink(os.readlink(src), dst)
+                elif name in dirnames:
+                    if dst.exists() and not dst.is_dir():
+                        dirnames.remove(name)  # A generated file replaces this directory
+                    else:
+                        dst.mkdir(exist_ok=True)
+                elif not os.path.lexists(dst):
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copy2(src, dst)
+
+    def flush(self, output_dir) -> Path:
+        """
+        Write the whole tree to output_dir with one write per file, all or nothing.
+
+        Files are rendered into a staging directory next to output_dir first. Files already in output_dir
+        that the tree doesn't replace (.venv, .git, ...) are hardlinked into the staging directory, which
+        then swaps places with output_dir. The old directory is kept until the swap has succeeded, a
+        failure at any point leaves output_dir as it was.
+        """
+        output_dir = Path(output_dir)
+        output_dir.parent.mkdir(parents=True, exist_ok=True)
+        staging_dir = output_dir.parent / f".{output_dir.name}.staging-{uuid.uuid4().hex}"
+        backup_dir = output_dir.parent / f".{output_dir.name}.previous-{uuid.uuid4().hex}"
+        staging_dir.mkdir()
+
+        try:
+            self._write_to(staging_dir)
+
+            if output_dir.is_dir() and not any(output_dir.iterdir()):
+                output_dir.rmdir()
+
+            if not output_dir.exists():
+                os.rename(staging_dir, output_dir)
+                return output_dir
+
+            self._link_existing(output_dir, staging_dir)
+            os.rename(output_dir, backup_dir)
+            try:
+                os.rename(staging_dir, output_dir)
+            except OSError:
+                os.rename(backup_dir, output_dir)
+                raise
+            shutil.rmtree(backup_dir, ignore_errors=True)
+            return output_dir
+        finally:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
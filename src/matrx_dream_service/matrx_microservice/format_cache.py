@@ -0,0 +1,57 @@
+import hashlib
+import os
+from pathlib import Path
+
+from matrx_dream_service.matrx_microservice.content_store import ContentStore, default_store_dir
+from matrx_dream_service.matrx_microservice.formatting import get_black_mode, import_black
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """MATRX_FORMAT_CACHE_DIR if set, else <XDG cache>/matrx-dream-service/black"""
+    return default_store_dir("MATRX_FORMAT_CACHE_DIR", "black")
+
+
+class FormatCache(ContentStore):
+    """
+    On-disk cache of black output keyed by (source hash, black version, mode).
+
+    Entries hold a sha256 line of the output followed by the output, so a damaged entry reads as a miss. A hit
+    bumps the file's mtime, which is what prune() evicts by once the cache grows past max_bytes.
+    """
+
+    suffix = ".py"
+
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES, mode=None):
+        super().__init__(directory or default_cache_dir(), max_bytes)
+        self.mode = mode
+        self._salt = None
+
+    def key(self, code: str) -> str:
+        if self._salt is None:
+            # Resolved on first lookup so building a generator doesn't import black
+            black = import_black()
+            mode = self.mode or get_black_mode()
+            self._salt = f"{black.__version__}\0{mode.get_cache_key()}\0".encode("utf-8")
+        return hashlib.sha256(self._salt + code.encode("utf-8")).hexdigest()
+
+    def get(self, code: str):
+        path = self._path(self.key(code))
+        try:
+            with open(path, "rb") as f:
+                checksum, _, data = f.read().partition(b"\n")
+            # A truncated or damaged entry is a miss, put() writes a good one over it
+            if checksum != hashlib.sha256(data).hexdigest().encode("ascii"):
+                raise ValueError("corrupt cache entry")
+            formatted = data.decode("utf-8")
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return formatted
+
+    def put(self, code: str, formatted: str):
+        data = formatted.encode("utf-8")
+        self._write(self.key(code), hashlib.sha256(data).hexdigest().encode("ascii") + b"\n" + data)
@@ -0,0 +1,159 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing.util import Finalize
+
+POOL_MIN_FILES = 8  # Fewer files are formatted in the calling process, a pool round trip costs more
+
+_black_import_lock = threading.Lock()
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def import_black():
+    """
+    black, imported on first format since it is one of the slowest imports of the package.
+
+    Generations on other threads may format at the same time, the lock keeps them from seeing a half-imported
+    module (import deadlock avoidance hands one out when black's submodules are imported from two threads).
+    """
+    with _black_import_lock:
+        import black
+    return black
+
+
+@lru_cache(maxsize=None)
+def get_black_mode():
+    black = import_black()
+    return black.FileMode(
+        target_versions={black.TargetVersion.PY38},
+        line_length=80,
+    )
+
+
+def format_source(code: str) -> str:
+    """Format python source with black, returning it untouched if black has nothing to change or can't parse it"""
+    black = import_black()
+
+    try:
+        return black.format_file_contents(
+            code,
+            fast=False,  # Run in safe mode to ensure correctness
+            mode=get_black_mode(),
+        )
+    except black.NothingChanged:
+        return code
+    except (black.InvalidInput, ValueError):
+        return code
+
+
+def _format_item(item):
+    # The CPU time is measured in the worker so the caller can attribute it to its own generation
+    path, code = item
+    cpu_start = time.process_time()
+    formatted = format_source(code)
+    return path, formatted, time.process_time() - cpu_start
+
+
+def resolve_format_workers(workers: int = 1) -> int:
+    """0 or None means one worker per CPU"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def _reset_after_fork():
+    # A child forked while another thread held one of the locks would otherwise inherit it locked
+    global _black_import_lock, _pool, _pool_workers, _pool_lock
+    _black_import_lock = threading.Lock()
+    _pool, _pool_workers, _pool_lock = None, 0, threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):  # Windows has no fork, its pools spawn fresh interpreters
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _map_in_pool(items: list, workers: int, chunksize: int):
+    """
+    Submit items to the process-wide format pool, created on first use and replaced by a larger one when a
+    caller asks for more workers. Returns the pool.map iterator of their results.
+
+    All workers of a fork pool are forked on its first submit, so a pool forks once, whichever thread uses it
+    later. black is imported before that, the workers inherit it instead of each importing it.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # Work other generations already submitted still completes
+            import_black()
+            _pool, _pool_workers = ProcessPoolExecutor(max_workers=workers), workers
+            # A multiprocessing child (batch, bench) skips atexit and joins its children on exit. Its exit
+            # finalizers run first, this one before the queues' (priority 10) so the workers get their stop
+            Finalize(None, _shutdown_pool, exitpriority=20)
+        return _pool.map(_format_item, items, chunksize=chunksize)
+
+
+def format_sources(sources: dict, workers: int = 1, cache=None, use_pool: bool = False, stats: dict = None) -> dict:
+    """
+    Format a {path: source} mapping and return {path: formatted_source}.
+
+    With more than one worker the files are spread across the process-wide format pool, sized by the largest
+    workers asked for so far and shut down at exit. Fewer than POOL_MIN_FILES files are formatted in the
+    calling process. Every file goes through format_source either way, so the parallel result is
+    byte-identical to the serial one. When a FormatCache is given, cached sources skip black entirely and only
+    the misses are formatted. use_pool sends the files to the pool even for a single worker, so black never
+    holds the caller's GIL. When a stats dict is given, stats['worker_cpu'] is set to the CPU time the pool
+    workers report for these sources, 0.0 when they were formatted in the calling process.
+    """
+    formatted = {}
+    pending = sources
+    if cache is not None:
+        pending = {}
+        for path, code in sources.items():
+            cached = cache.get(code)
+            if cached is None:
+                pending[path] = code
+            else:
+                formatted[path] = cached
+
+    workers = resolve_format_workers(workers)
+    worker_cpu = 0.0
+    if len(pending) < POOL_MIN_FILES or (workers <= 1 and not use_pool):
+        results = {path: code for path, code, _ in map(_format_item, pending.items())}
+    else:
+        chunksize = max(1, len(pending) // (min(workers, len(pending)) * 4))
+        results = {}
+        try:
+            for path, code, cpu in _map_in_pool(list(pending.items()), workers, chunksize):
+                results[path] = code
+                worker_cpu += cpu
+        except BrokenProcessPool:
+            _shutdown_pool()  # A worker died, the next call starts a fresh pool
+            raise
+    if stats is not None:
+        stats['worker_cpu'] = worker_cpu
+
+    if cache is not None and results:
+        for path, code in results.items():
+            cache.put(pending[path], code)
+        cache.maybe_prune()
+
+    formatted.update(results)
+    return {path: formatted[path] for path in sources}
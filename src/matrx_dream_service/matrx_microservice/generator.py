@@ -1,25 +1,40 @@
+import asyncio
+import copy
 import json
 from pathlib import Path
 from typing import Dict, Any
 
-import black
-import os, subprocess, sys
+import os
 from matrx_utils import FileManager, vcprint
 from matrx_dream_service.matrx_microservice.contents import get_gitignore_content, get_conversions_content, \
     get_validation_content, get_app_py_content, get_settings_content, get_system_logger_content, \
     get_docker_file_content, get_entrypoint_sh_content, get_run_py_content, get_migrations_content, \
     get_admin_service_content, generate_readme
-from matrx_utils import RESTRICTED_SERVICE_NAMES, \
-    RESTRICTED_ENV_VAR_NAMES, RESTRICTED_TASK_AND_DEFINITIONS, RESTRICTED_FIELD_NAMES
 from matrx_dream_service.matrx_microservice.default_template import default_config
 from matrx_dream_service.matrx_microservice.merge_config import TemplateMerger
-from matrx_dream_service.matrx_microservice.github_utils import orchestrate_repo_creation
+from matrx_dream_service.matrx_microservice.file_tree import VirtualFileTree
+from matrx_dream_service.matrx_microservice.metrics import GenerationMetrics
+from matrx_dream_service.matrx_microservice.archive import write_archive, iter_archive, DEFAULT_CHUNK_SIZE
+from matrx_dream_service.matrx_microservice.formatting import format_sources
+from matrx_dream_service.matrx_microservice.format_cache import FormatCache
+from matrx_dream_service.matrx_microservice.venv_cache import VenvCache, environment_key
+from matrx_dream_service.matrx_microservice.lock_store import LockStore
+from matrx_dream_service.matrx_microservice.post_create import PostCreateRunner, DEFAULT_TIMEOUT, default_log_path, \
+    script_command
+from matrx_dream_service.matrx_microservice.schema_ir import compile_schema
+from matrx_dream_service.matrx_microservice.config_validator import get_config_validator
+from matrx_dream_service.matrx_microservice.git_writer import init_repository
 
 
 class MicroserviceGenerator:
     def __init__(self, config_path: str = None, output_dir: str = None, create_github_repo: bool = False,
                  github_project_name: str = None, github_access: list[dict] = None, config: dict = None,
-                 github_project_description: str = None, debug: bool = False):
+                 github_project_description: str = None, debug: bool = False, format_workers: int = 1,
+                 use_format_cache: bool = True, format_cache_dir: str = None, metrics_path: str = None,
+                 run_post_create: bool = True, github_push_mode: str = 'git', pipeline_repo_creation: bool = False,
+                 api_trace_path: str = None, use_venv_cache: bool = True, venv_cache_dir: str = None,
+                 use_lock_store: bool = True, lock_store_dir: str = None,
+                 post_create_timeout: float = DEFAULT_TIMEOUT, post_create_log_path: str = None):
         self.config_path = config_path
         self.output_dir = Path(output_dir) if output_dir else None
         self.config = self._load_config() if config_path else None
@@ -27,74 +42,46 @@ class MicroserviceGenerator:
         self.create_github_repo = create_github_repo
         self.github_project_name = github_project_name
         self.github_access = github_access
+        self.github_push_mode = github_push_mode  # 'git' pushes with git, 'api' through the Git Data API
+        # Look up the name and create the repo while the files are generated, push once they're flushed
+        self.pipeline_repo_creation = pipeline_repo_creation
+        self.api_trace_path = api_trace_path  # Optional JSON lines sink for the spans of every GitHub API call
         self.file_manager = FileManager("microservices")
         self.github_project_description = github_project_description
         self.debug = debug
+        self.format_workers = format_workers  # 0 spreads black over one process per CPU
+        self.format_cache = FormatCache(format_cache_dir) if use_format_cache else None
+        self.venv_cache = VenvCache(venv_cache_dir) if use_venv_cache else None
+        self.lock_store = LockStore(lock_store_dir) if use_lock_store else None
 
         self.is_local = True
+        self.run_post_create = run_post_create
+        self.post_create_timeout = post_create_timeout  # Seconds per script without its own timeout
+        self.post_create_log_path = post_create_log_path  # Full script output, defaults to default_log_path()
+        self.post_create_runner = None
+        self.post_create_results = []
+        self.files = VirtualFileTree()
+        self.schema_ir = None
+        self.metrics_path = metrics_path  # Optional JSON lines sink for per-stage metrics
+        self.metrics = GenerationMetrics(self.files, jsonl_path=metrics_path)
+        self.last_metrics = None  # Report of the last completed generation, as metrics.finish() returned it
 
         if self.create_github_repo:
             self.is_local = False
             self.set_output_path(self.github_project_name)
-            if not self.config:
-                self.config = self.load_config_direct(config)
+        if not self.config and config is not None:
+            self.config = self.load_config_direct(config)
 
     def load_config_direct(self, config: dict):
         self._validate_config(config)
-        system_config = default_config.copy()
-        merger = TemplateMerger()
-        merged_config = merger.merge(system_config, config)
-        return merged_config
+        return self._merge_with_defaults(config)
 
     def set_output_path(self, github_project_name: str):
         dirname = self.file_manager.generate_directoryname(random=True)
         self.output_dir = self.file_manager.get_full_path_from_base(root="temp", path=dirname)
 
     def _validate_config(self, config):
-        conflicts = []
-
-        # Validate environment variables (CASE SENSITIVE)
-        env_vars = config.get("env", {})
-        for env_name in env_vars.keys():
-            if env_name in RESTRICTED_ENV_VAR_NAMES:
-                conflicts.append(
-                    f"Environment variable '{env_name}' is restricted")
-
-        # Convert restricted sets to lowercase for case-insensitive comparison
-        restricted_services_lower = {name.lower()
-                                     for name in RESTRICTED_SERVICE_NAMES}
-        restricted_tasks_defs_lower = {name.lower()
-                                       for name in RESTRICTED_TASK_AND_DEFINITIONS}
-        restricted_field_names = {name.lower()
-                                  for name in RESTRICTED_FIELD_NAMES}
-        # Validate schema definitions (CASE INSENSITIVE)
-        schema = config.get("schema", {})
-        definitions = schema.get("definitions", {})
-        for def_name in definitions.keys():
-            if def_name.lower() in restricted_tasks_defs_lower:
-                conflicts.append(
-                    f"Schema definition '{def_name}' is restricted (case insensitive)")
-
-        # Validate schema tasks (services and task names) (CASE INSENSITIVE)
-        tasks = schema.get("tasks", {})
-        for service_name, service_tasks in tasks.items():
-            if service_name.lower() in restricted_services_lower:
-                conflicts.append(
-                    f"Service name '{service_name}' is restricted (case insensitive)")
-
-            for task_name, task_def in service_tasks.items():
-                if task_name.lower() in restricted_tasks_defs_lower:
-                    conflicts.append(
-                        f"Task name '{task_name}' in service '{service_name}' is restricted (case insensitive)")
-                for field_name in task_def.keys():
-                    if field_name.lower() in restricted_field_names:
-                        conflicts.append(
-                            f"Field name '{field_name}' in service '{task_name}' is restricted (case insensitive)")
-
-        # Raise error if any conflicts found
-        if conflicts:
-            raise ValueError(
-                "Configuration validation failed:\n" + "\n".join(f"  - {conflict}" for conflict in conflicts))
+        get_config_validator().check(config)
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file"""
@@ -103,11 +90,14 @@ class MicroserviceGenerator:
 
         self._validate_config(config)
 
-        system_config = default_config.copy()
-        merger = TemplateMerger()
-        merged_config = merger.merge(system_config, config)
+        return self._merge_with_defaults(config)
 
-        return merged_config
+    @staticmethod
+    def _merge_with_defaults(config: dict) -> Dict[str, Any]:
+        # Deep copy, nested settings and lists of one generation must not leak into other instances
+        system_config = copy.deepcopy(default_config)
+        merger = TemplateMerger()
+        return merger.merge(system_config, config)
 
     def generate_microservice(self):
         """Main function to generate the complete microservice"""
@@ -116,42 +106,194 @@ class MicroserviceGenerator:
             f"[matrx-dream-service] 📁 Target Directory: {self.output_dir}", color="bright_yellow", verbose=self.debug)
         vcprint(f"[matrx-dream-service] 📄 Config File: {self.config_path}", color="bright_yellow", verbose=self.debug)
 
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        vcprint("\n[matrx-dream-service] 🔄 Starting microservice generation",
+                color="bright_cyan", style="bold")
+
+        if self.create_github_repo and self.pipeline_repo_creation:
+            from matrx_dream_service.matrx_microservice.github_utils import orchestrate_repo_creation
+
+            created_repo = orchestrate_repo_creation(self.github_project_name, self.github_project_description,
+                                                     self.output_dir, access=self.github_access,
+                                                     push_mode=self.github_push_mode, build=self._build_project,
+                                                     stage=self._stage, trace_exporters=self._trace_exporters())
+            self.last_metrics = self.metrics.finish()
+            return created_repo
+
+        self._build_project()
+
+        if self.is_local and self.run_post_create:
+            with self.metrics.stage("run_post_create_scripts") as stage:
+                stage.update(scripts=self._run_post_create_scripts())
+
+        created_repo = None
+
+        if self.create_github_repo:
+            # githubkit is only imported when a repo is actually created
+            from matrx_dream_service.matrx_microservice.github_utils import orchestrate_repo_creation
+
+            with self.metrics.stage("orchestrate_repo_creation"):
+                created_repo = orchestrate_repo_creation(self.github_project_name, self.github_project_description,
+                                                         self.output_dir, access=self.github_access,
+                                                         push_mode=self.github_push_mode,
+                                                         trace_exporters=self._trace_exporters())
+
+        self.last_metrics = self.metrics.finish()
+        return created_repo
+
+    async def generate_microservice_async(self):
+        """
+        asyncio counterpart of generate_microservice for callers running inside an event loop.
+
+        Rendering and the disk flush run in worker threads, black runs in a process pool, post-create scripts
+        run as asyncio subprocesses and GitHub calls go through githubkit's async client.
+        """
+        vcprint(
+            f"[matrx-dream-service] 📁 Target Directory: {self.output_dir}", color="bright_yellow", verbose=self.debug)
+        vcprint(f"[matrx-dream-service] 📄 Config File: {self.config_path}", color="bright_yellow", verbose=self.debug)
 
         vcprint("\n[matrx-dream-service] 🔄 Starting microservice generation",
                 color="bright_cyan", style="bold")
 
-        self._generate_files()
-        self._generate_gitignore()
-        self._handle_databases()
-        self._handle_env()
-        self._handle_settings()
-        self._generate_app_files()
-        self._generate_other_schema_files()
-        self._generate_service_directories()
-        self._generate_core_files()
-        self._generate_mcp()
-        self._generate_docker_files()
-        self._generate_root_files()
-        self._format_project()
-        self._generate_readme()
-
-        if self.is_local:
-            self._run_post_create_scripts()
+        if self.create_github_repo and self.pipeline_repo_creation:
+            from matrx_dream_service.matrx_microservice.github_utils import async_orchestrate_repo_creation
+
+            created_repo = await async_orchestrate_repo_creation(self.github_project_name,
+                                                                 self.github_project_description, self.output_dir,
+                                                                 access=self.github_access,
+                                                                 push_mode=self.github_push_mode,
+                                                                 build=self._build_project_async, stage=self._stage,
+                                                                 trace_exporters=self._trace_exporters())
+            self.last_metrics = self.metrics.finish()
+            return created_repo
+
+        await self._build_project_async()
+
+        if self.is_local and self.run_post_create:
+            with self.metrics.stage("run_post_create_scripts") as stage:
+                stage.update(scripts=await self._run_post_create_scripts_async())
 
         created_repo = None
 
         if self.create_github_repo:
-            created_repo = orchestrate_repo_creation(self.github_project_name, self.github_project_description,
-                                                     self.output_dir, access=self.github_access)
+            from matrx_dream_service.matrx_microservice.github_utils import async_orchestrate_repo_creation
+
+            with self.metrics.stage("orchestrate_repo_creation"):
+                created_repo = await async_orchestrate_repo_creation(self.github_project_name,
+                                                                     self.github_project_description,
+                                                                     self.output_dir, access=self.github_access,
+                                                                     push_mode=self.github_push_mode,
+                                                                     trace_exporters=self._trace_exporters())
 
+        self.last_metrics = self.metrics.finish()
         return created_repo
 
+    def _trace_exporters(self) -> list:
+        from matrx_dream_service.matrx_microservice.api_trace import JsonLinesExporter
+
+        return [JsonLinesExporter(self.api_trace_path)] if self.api_trace_path else []
+
+    def _stage(self, name: str):
+        # Resolved on use, rendering replaces self.metrics
+        return self.metrics.stage(name)
+
+    def _build_project(self):
+        """Render the project and write it to output_dir"""
+        self._render_files()
+        with self.metrics.stage("flush_files") as stage:
+            self._flush_files()
+            stage.update(files=len(self.files), bytes=self.files.size())
+
+    async def _build_project_async(self):
+        await self._render_files_async()
+        with self.metrics.stage("flush_files") as stage:
+            await asyncio.to_thread(self._flush_files)
+            stage.update(files=len(self.files), bytes=self.files.size())
+
+    def _archive_root(self, root: str = None) -> str:
+        return root or self.config['settings'].get('app_name', 'microservice')
+
+    def generate_archive(self, fileobj, archive_format: str = "tar.gz", root: str = None):
+        """
+        Render the project straight into a tar.gz or zip archive written to fileobj.
+
+        Nothing is written to output_dir and no post-create scripts, uv or GitHub steps run, so the archive
+        ships without a uv.lock. Files are placed under root (default: the app name) inside the archive.
+        """
+        self._render_files(with_lock=False)
+        write_archive(self.files, fileobj, archive_format, root=self._archive_root(root))
+
+    def iter_archive(self, archive_format: str = "tar.gz", root: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Render the project and yield it as archive byte chunks, e.g. for an HTTP response body"""
+        self._render_files(with_lock=False)
+        yield from iter_archive(self.files, archive_format, root=self._archive_root(root), chunk_size=chunk_size)
+
+    async def aiter_archive(self, archive_format: str = "tar.gz", root: str = None,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Async iterator of archive byte chunks, rendering and compression run off the event loop"""
+        await self._render_files_async(with_lock=False)
+
+        chunks = iter_archive(self.files, archive_format, root=self._archive_root(root), chunk_size=chunk_size)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    def _render_files(self, with_lock: bool = True):
+        """Run every generation stage against a fresh in-memory tree"""
+        self._render_sources(with_lock)
+        with self.metrics.stage("format_project") as stage:
+            stage['worker_cpu'] = self._format_project()
+        with self.metrics.stage("generate_readme"):
+            self._generate_readme()
+
+    async def _render_files_async(self, with_lock: bool = True):
+        """_render_files with rendering in a worker thread and black in a process pool"""
+        await asyncio.to_thread(self._render_sources, with_lock)
+        with self.metrics.stage("format_project") as stage:
+            # The long-lived format pool of formatting.py, forked once rather than from this thread per call
+            stage['worker_cpu'] = await asyncio.to_thread(self._format_project, True)
+        with self.metrics.stage("generate_readme"):
+            self._generate_readme()
+
+    def _render_sources(self, with_lock: bool = True):
+        """Run the content generation stages, everything before formatting, archives leave out the uv.lock"""
+        # Every stage renders into memory, the tree hits the disk once in _flush_files
+        self.files = VirtualFileTree()
+        self.metrics = GenerationMetrics(self.files, jsonl_path=self.metrics_path)
+
+        with self.metrics.stage("compile_schema"):
+            # Services, tasks, resolved fields and class names are derived once and shared by every emitter
+            self.schema_ir = compile_schema(self.config)
+
+        stages = (
+            self._generate_files,
+            self._generate_gitignore,
+            self._handle_databases,
+            self._handle_env,
+            self._handle_settings,
+            *((self._handle_lock,) if with_lock else ()),
+            self._generate_app_files,
+            self._generate_other_schema_files,
+            self._generate_service_directories,
+            self._generate_core_files,
+            self._generate_mcp,
+            self._generate_docker_files,
+            self._generate_root_files,
+        )
+        for stage in stages:
+            with self.metrics.stage(stage.__name__.lstrip('_')):
+                stage()
+
     def _generate_readme(self):
         readme_content = generate_readme(self.config['settings'].get('app_name', 'Matrx'))
-        full_path = self.output_dir / "README.md"
-        with open(full_path, 'w') as f:
-            f.write(readme_content)
+        self.files.write("README.md", readme_content)
+
+    def _flush_files(self):
+        """Write the in-memory project tree to output_dir"""
+        self.files.flush(self.output_dir)
+        vcprint(f"[matrx-dream-service] ✅ {len(self.files)} files written to {self.output_dir}", color="green",
+                verbose=self.debug)
 
     def _generate_files(self):
         """Generate all files listed in the files array"""
@@ -160,18 +302,13 @@ class MicroserviceGenerator:
             return
 
         for file_path in files:
-            full_path = self.output_dir / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            full_path.touch()
+            self.files.touch(file_path)
 
         vcprint("[matrx-dream-service] ✅ Base files created", color="green", verbose=self.debug)
 
     def _generate_gitignore(self):
         gitignore_content = get_gitignore_content()
-        full_path = self.output_dir / ".gitignore"
-
-        with open(full_path, 'w') as f:
-            f.write(gitignore_content)
+        self.files.write(".gitignore", gitignore_content)
 
         vcprint("[matrx-dream-service] ✅ .gitignore file generated", color="green", verbose=self.debug)
 
@@ -180,12 +317,7 @@ class MicroserviceGenerator:
         if not databases:
             return
 
-        env_path = self.output_dir / '.env'
-        env_content = ""
-
-        if env_path.exists():
-            with open(env_path, 'r') as f:
-                env_content = f.read()
+        env_content = self.files.read('.env', "")
 
         for index, db in enumerate(databases):
             db_name = db.get('db_name', f'database_{index}')
@@ -195,14 +327,9 @@ class MicroserviceGenerator:
             env_content += f"DB_HOST_{index}={db.get('host')}\n"
             env_content += f"DB_NAME_{index}={db.get('database_name')}\n"
 
-        # Write .env file
-        with open(env_path, 'w') as f:
-            f.write(env_content)
+        self.files.write('.env', env_content)
 
         # Generate database_registry.py
-        db_conf_path = self.output_dir / 'database_registry.py'
-        db_conf_path.parent.mkdir(parents=True, exist_ok=True)
-
         db_conf_content = '''from matrx_orm import DatabaseProjectConfig, register_database
 from matrx_utils import settings
 
@@ -276,8 +403,7 @@ from matrx_utils import settings
 register_database(my_db_{index})
 '''
 
-        with open(db_conf_path, 'w') as f:
-            f.write(db_conf_content)
+        self.files.write('database_registry.py', db_conf_content)
 
         vcprint("[matrx-dream-service] ✅ Database configuration completed", color="green", verbose=self.debug)
 
@@ -285,16 +411,8 @@ register_database(my_db_{index})
         env_vars = self.config.get('env', {})
         settings = self.config.get('settings', {})
 
-        # Create .env file
-        env_path = self.output_dir / '.env'
-
-        # Read existing content if file exists
-        existing_content = ""
-        if env_path.exists():
-            with open(env_path, 'r') as f:
-                existing_content = f.read()
-
-        env_content = existing_content
+        # Extend the .env rendered by _handle_databases, if any
+        env_content = self.files.read('.env', "")
 
         # Add environment variables from env section
         if env_vars:
@@ -322,15 +440,13 @@ register_database(my_db_{index})
             if app_primary_service_name:
                 env_content += f"APP_PRIMARY_SERVICE_NAME={app_primary_service_name}_service\n"
 
-        with open(env_path, 'w') as f:
-            f.write(env_content)
+        self.files.write('.env', env_content)
 
         vcprint("[matrx-dream-service] ✅ Environment variables completed", color="green", verbose=self.debug)
 
     def _handle_settings(self):
         """Handle settings and generate pyproject.toml"""
         settings = self.config.get('settings', {})
-        pyproject_path = self.output_dir / 'pyproject.toml'
         dependencies = self.config.get('dependencies', [])
 
         app_name = settings.get('app_name', 'microservice')
@@ -353,64 +469,47 @@ dependencies = [
 
             content += ']\n'
 
-        with open(pyproject_path, 'w') as f:
-            f.write(content)
+        self.files.write('pyproject.toml', content)
 
         vcprint("[matrx-dream-service] ✅ pyproject.toml generated", color="green", verbose=self.debug)
 
+    def _handle_lock(self):
+        """Ship a uv.lock from the lock store, resolving with `uv lock` only for a new dependency set"""
+        if self.lock_store is None or not self.files.exists('pyproject.toml'):
+            return
+        settings = self.config.get('settings', {})
+        lock = self.lock_store.lock_for(self.files.read('pyproject.toml'), self.config.get('dependencies', []),
+                                        settings.get('requires_python', '>=3.8'),
+                                        settings.get('app_name', 'microservice'), settings.get('app_version', '0.1.1'))
+        if lock is None:
+            vcprint("[matrx-dream-service] ⚠️ uv lock failed, the project ships without a uv.lock", color="yellow",
+                    verbose=self.debug)
+            return
+        self.files.write('uv.lock', lock)
+
+        vcprint(f"[matrx-dream-service] ✅ uv.lock generated ({self.lock_store.hits} lock store hits, "
+                f"{self.lock_store.misses} misses)", color="green", verbose=self.debug)
+
     def _generate_app_files(self):
         """Generate app files based on schema configuration"""
         settings = self.config.get('settings', {})
-        schema = self.config.get('schema', {})
+        schema = self.schema_ir.schema
 
         app_name = settings.get('app_name', 'microservice')
-        app_primary_service_name = settings.get(
-            'app_primary_service_name', 'default')
-
-        # Use user schema directly - no merging
-        schema = schema
-        tasks_by_service = schema.get('tasks', {})
 
-        # Create app_schema directory and schema.py
-        app_schema_dir = self.output_dir / 'app_schema'
-        app_schema_dir.mkdir(parents=True, exist_ok=True)
-
-        schema_file_path = app_schema_dir / 'schema.py'
+        # Render app_schema/schema.py
         schema_content = f'''from matrx_connect.socket.schema import register_schema
 schema = {schema}
 register_schema(schema)
     '''
 
-        with open(schema_file_path, 'w') as f:
-            f.write(schema_content)
-
-        # Create services directory
-        services_dir = self.output_dir / 'services'
-        services_dir.mkdir(parents=True, exist_ok=True)
-
-        for service_name, tasks in tasks_by_service.items():
-            service_file_name = service_name.lower().replace('_service', '') + '_service.py'
-            service_class_name = service_name.lower().replace(
-                '_service', '').capitalize() + 'Service'
-            clean_service_name = service_name.lower().replace('_service', '')
-            orchestrator_class_name = clean_service_name.capitalize() + 'Orchestrator'
-
-            # Collect fields from tasks (both direct fields and referenced definitions)
-            all_fields = set()
-            all_fields.add('mic_check_message')  # Always add mic_check_message
-
-            for task_name, task_def in tasks.items():
-                if isinstance(task_def, dict) and "$ref" not in task_def:
-                    # Direct field definitions
-                    all_fields.update(task_def.keys())
-                elif isinstance(task_def, dict) and "$ref" in task_def:
-                    # Resolve reference to get fields from definition
-                    ref_path = task_def["$ref"].split("/")
-                    if len(ref_path) == 2 and ref_path[0] == "definitions":
-                        def_name = ref_path[1]
-                        definitions = schema.get("definitions", {})
-                        if def_name in definitions:
-                            all_fields.update(definitions[def_name].keys())
+        self.files.write('app_schema/schema.py', schema_content)
+
+        for service in self.schema_ir:
+            service_name = service.name
+            service_class_name = service.class_name
+            clean_service_name = service.clean_name
+            orchestrator_class_name = service.orchestrator_class_name
 
             # Generate service file content
             service_content = f'''from matrx_connect.socket.core import SocketServiceBase
@@ -422,8 +521,8 @@ class {service_class_name}(SocketServiceBase):
         self.stream_handler = None
 '''
 
-            # Add all field parameters to init
-            for field in sorted(all_fields):
+            # Add all field parameters to init (direct fields and referenced definitions)
+            for field in service.field_names:
                 service_content += f'        self.{field} = None\n'
 
             service_content += f'''
@@ -449,9 +548,10 @@ class {service_class_name}(SocketServiceBase):
 '''
 
             # Generate async methods for each task
-            for task_name in tasks.keys():
-                method_name = task_name.lower()
-                if method_name != "mic_check":  # Skip mic_check as it's already added
+            for task in service.tasks:
+                task_name = task.name
+                method_name = task.method_name
+                if not task.is_mic_check:  # Skip mic_check as it's already added
                     service_content += f'''
     async def {method_name}(self):
         """Execute {task_name.lower()} task"""
@@ -476,24 +576,17 @@ class {service_class_name}(SocketServiceBase):
             await self.stream_handler.send_end()
 '''
 
-            # Write service file
-            service_file_path = services_dir / service_file_name
-            with open(service_file_path, 'w') as f:
-                f.write(service_content)
+            self.files.write(f'services/{service.file_name}', service_content)
 
         # Generate app_factory.py
-        app_factory_path = services_dir / 'app_factory.py'
         app_factory_content = '''from matrx_connect.socket import ServiceFactory
 from matrx_connect.socket import configure_factory
 from .admin_service import AdminService
 '''
 
         # Import all service classes
-        for service_name in tasks_by_service.keys():
-            service_file_name = service_name.lower().replace('_service', '') + '_service'
-            service_class_name = service_name.lower().replace(
-                '_service', '').capitalize() + 'Service'
-            app_factory_content += f'from .{service_file_name} import {service_class_name}\n'
+        for service in self.schema_ir:
+            app_factory_content += f'from .{service.module_name} import {service.class_name}\n'
 
         app_factory_content += '''
 
@@ -503,14 +596,11 @@ class AppServiceFactory(ServiceFactory):
 '''
 
         # Register all services
-        for service_name in tasks_by_service.keys():
-            service_class_name = service_name.lower().replace(
-                '_service', '').capitalize() + 'Service'
-            service_key = service_name.lower()
-            if service_name == f"{app_primary_service_name.upper()}_SERVICE":
-                app_factory_content += f'        self.register_service("default_service", {service_class_name})\n'
+        for service in self.schema_ir:
+            if service.is_primary:
+                app_factory_content += f'        self.register_service("default_service", {service.class_name})\n'
             else:
-                app_factory_content += f'        self.register_service("{service_key}", {service_class_name})\n'
+                app_factory_content += f'        self.register_service("{service.key}", {service.class_name})\n'
 
         app_factory_content += '''
         self.register_service(service_name="admin_service", service_class=AdminService)
@@ -521,38 +611,25 @@ class AppServiceFactory(ServiceFactory):
         # self.register_multi_instance_service(service_name="worker_service", service_class=WorkerService)
     '''
 
-        with open(app_factory_path, 'w') as f:
-            f.write(app_factory_content)
-
-        admin_service_file_name = services_dir / "admin_service.py"
-        with open(admin_service_file_name, 'w') as f:
-            f.write(get_admin_service_content())
+        self.files.write('services/app_factory.py', app_factory_content)
+        self.files.write('services/admin_service.py', get_admin_service_content())
 
         vcprint("[matrx-dream-service] ✅ Application schema and services generated", color="green", verbose=self.debug)
 
     def _generate_service_directories(self):
-        schema = self.config.get('schema', {})
-        tasks_by_service = schema.get('tasks', {})
-
-        if not tasks_by_service:
+        if not self.schema_ir:
             return
 
-        src_dir = self.output_dir / 'src'
-        src_dir.mkdir(parents=True, exist_ok=True)
-
-        for service_name, tasks in tasks_by_service.items():
-            # Convert SERVICE_NAME to service_name format
-            clean_service_name = service_name.lower().replace('_service', '')
-            service_dir = src_dir / clean_service_name
-            service_dir.mkdir(parents=True, exist_ok=True)
+        for service in self.schema_ir:
+            clean_service_name = service.clean_name
+            service_dir = f'src/{clean_service_name}'
 
             # Generate __init__.py
-            orchestrator_class_name = clean_service_name.capitalize() + 'Orchestrator'
+            orchestrator_class_name = service.orchestrator_class_name
             init_content = f'''from .{clean_service_name}_orchestrator import {orchestrator_class_name}
 __all__ = ["{orchestrator_class_name}"]
     '''
-            with open(service_dir / '__init__.py', 'w') as f:
-                f.write(init_content)
+            self.files.write(f'{service_dir}/__init__.py', init_content)
 
             # Generate orchestrator class
             orchestrator_content = f'''class {orchestrator_class_name}:
@@ -570,9 +647,10 @@ __all__ = ["{orchestrator_class_name}"]
     '''
 
             # Generate method for each task
-            for task_name in tasks.keys():
-                method_name = task_name.lower()
-                if method_name != "mic_check":  # Don't generate mic_check in orchestrator
+            for task in service.tasks:
+                task_name = task.name
+                method_name = task.method_name
+                if not task.is_mic_check:  # Don't generate mic_check in orchestrator
                     orchestrator_content += f'''
     async def {method_name}(self):
         """
@@ -587,33 +665,25 @@ __all__ = ["{orchestrator_class_name}"]
         }}
     '''
 
-            with open(service_dir / f'{clean_service_name}_orchestrator.py', 'w') as f:
-                f.write(orchestrator_content)
+            self.files.write(f'{service_dir}/{clean_service_name}_orchestrator.py', orchestrator_content)
 
         vcprint("[matrx-dream-service] ✅ Service directories and orchestrators generated", color="green",
                 verbose=self.debug)
 
     def _generate_other_schema_files(self):
-        # Create app_schema directory
-        app_schema_dir = self.output_dir / 'app_schema'
-        app_schema_dir.mkdir(parents=True, exist_ok=True)
-
         # Generate conversion_functions.py
         conversion_content = get_conversions_content()
-        with open(app_schema_dir / 'conversion_functions.py', 'w') as f:
-            f.write(conversion_content)
+        self.files.write('app_schema/conversion_functions.py', conversion_content)
 
         # Generate validation_functions.py
         validation_content = get_validation_content()
-        with open(app_schema_dir / 'validation_functions.py', 'w') as f:
-            f.write(validation_content)
+        self.files.write('app_schema/validation_functions.py', validation_content)
 
         init_content = '''from .schema import *
 from .conversion_functions import *
 from .validation_functions import *
 '''
-        with open(app_schema_dir / '__init__.py', 'w') as f:
-            f.write(init_content)
+        self.files.write('app_schema/__init__.py', init_content)
 
         vcprint("[matrx-dream-service] ✅ Schema validation and conversion functions generated", color="green",
                 verbose=self.debug)
@@ -624,38 +694,24 @@ from .validation_functions import *
         app_description = settings.get('app_description')
         app_version = settings.get('app_version')
 
-        # Create core directory
-        core_dir = self.output_dir / 'core'
-        core_dir.mkdir(parents=True, exist_ok=True)
-
         # Generate app.py
         app_content = get_app_py_content()
-        with open(core_dir / 'app.py', 'w', encoding="utf-8") as f:
-            f.write(app_content)
+        self.files.write('core/app.py', app_content)
 
         # Generate settings.py
         settings_content = get_settings_content(app_name)
-        with open(core_dir / 'settings.py', 'w') as f:
-            f.write(settings_content)
+        self.files.write('core/settings.py', settings_content)
 
         # Generate system_logger.py
         system_logger_content = get_system_logger_content()
-        with open(core_dir / 'system_logger.py', 'w') as f:
-            f.write(system_logger_content)
+        self.files.write('core/system_logger.py', system_logger_content)
 
         vcprint("[matrx-dream-service] ✅ Core application files generated", color="green", verbose=self.debug)
 
     def _generate_mcp(self):
-        schema = self.config.get('schema', {})
-        tasks_by_service = schema.get('tasks', {})
-        definitions = schema.get('definitions', {})
-
-        if not tasks_by_service:
+        if not self.schema_ir:
             return
 
-        mcp_dir = self.output_dir / 'mcp_server'
-        mcp_dir.mkdir(parents=True, exist_ok=True)
-
         init_content = '''from matrx_connect.mcp_server import tool_registry
 from matrx_connect.mcp_server.tools import register_default_tools
 
@@ -663,13 +719,11 @@ from matrx_connect.mcp_server.tools import register_default_tools
 
         register_functions = []
 
-        for service_name, tasks in tasks_by_service.items():
-            if 'admin' in service_name.lower():
+        for service in self.schema_ir:
+            if service.is_admin:
                 continue  # Skip admin service
 
-            clean_service_name = service_name.lower().replace('_service', '')
-            service_mcp_dir = mcp_dir / clean_service_name
-            service_mcp_dir.mkdir(parents=True, exist_ok=True)
+            clean_service_name = service.clean_name
 
             tool_content = '''import traceback
 from typing import Any, Dict, Union
@@ -677,24 +731,18 @@ from typing import Any, Dict, Union
 from src.{clean_service_name} import {orchestrator_class_name}
 
 '''.format(clean_service_name=clean_service_name,
-           orchestrator_class_name=clean_service_name.capitalize() + 'Orchestrator')
+           orchestrator_class_name=service.orchestrator_class_name)
 
             tool_functions = []
             register_calls = []
 
-            for task_name, task_def in tasks.items():
-                if task_name.lower() == 'mic_check':
+            for task in service.tasks:
+                if task.is_mic_check:
                     continue  # Skip mic_check
 
-                method_name = task_name.lower()
+                method_name = task.method_name
                 tool_name = f'{clean_service_name}_{method_name}_tool'
-
-                # Get fields
-                if '$ref' in task_def:
-                    ref_def_name = task_def['$ref'].split('/')[-1]
-                    fields = definitions.get(ref_def_name, {})
-                else:
-                    fields = task_def
+                fields = task.fields
 
                 # Generate tool function
                 tool_content += f'async def {tool_name}(args: Dict[str, Any]) -> Dict[str, Any]:\n'
@@ -708,8 +756,7 @@ from src.{clean_service_name} import {orchestrator_class_name}
                 tool_content += '        Dictionary with status and result/error information\n'
                 tool_content += '    """\n'
                 tool_content += '    try:\n'
-                tool_content += '        orchestrator = {orchestrator_class_name}()\n'.format(
-                    orchestrator_class_name=clean_service_name.capitalize() + 'Orchestrator')
+                tool_content += f'        orchestrator = {service.orchestrator_class_name}()\n'
                 tool_content += f'        result = await orchestrator.{method_name}()\n'
                 tool_content += '        return {\n'
                 tool_content += '            "status": "success",\n'
@@ -772,9 +819,7 @@ from src.{clean_service_name} import {orchestrator_class_name}
             tool_content += f'__all__ = {all_items}\n'
 
             # Write tool file
-            tool_file_path = service_mcp_dir / f'{clean_service_name}.py'
-            with open(tool_file_path, 'w') as f:
-                f.write(tool_content)
+            self.files.write(f'mcp_server/{clean_service_name}/{clean_service_name}.py', tool_content)
 
             # Add to init
             init_content += f'from .{clean_service_name}.{clean_service_name} import {register_func_name}\n'
@@ -786,8 +831,7 @@ from src.{clean_service_name} import {orchestrator_class_name}
         for reg_func in register_functions:
             init_content += f'    {reg_func}(tool_registry)\n'
 
-        with open(mcp_dir / '__init__.py', 'w') as f:
-            f.write(init_content)
+        self.files.write('mcp_server/__init__.py', init_content)
 
         vcprint("[matrx-dream-service] ✅ MCP directories and tools generated", color="green", verbose=self.debug)
 
@@ -797,18 +841,15 @@ from src.{clean_service_name} import {orchestrator_class_name}
 
         # Generate .python-version
         python_version_content = "3.13"
-        with open(self.output_dir / '.python-version', 'w') as f:
-            f.write(python_version_content)
+        self.files.write('.python-version', python_version_content)
 
         # Generate Dockerfile
         dockerfile_content = get_docker_file_content(app_name)
-        with open(self.output_dir / 'Dockerfile', 'w') as f:
-            f.write(dockerfile_content)
+        self.files.write('Dockerfile', dockerfile_content)
 
         # Generate entrypoint.sh
         entrypoint_content = get_entrypoint_sh_content()
-        with open(self.output_dir / 'entrypoint.sh', 'w') as f:
-            f.write(entrypoint_content)
+        self.files.write('entrypoint.sh', entrypoint_content)
 
         vcprint("[matrx-dream-service] ✅ Docker configuration files generated", color="green", verbose=self.debug)
 
@@ -817,96 +858,108 @@ from src.{clean_service_name} import {orchestrator_class_name}
         app_name = settings.get('app_name')
 
         migrations_content = get_migrations_content(app_name)
-        with open(self.output_dir / 'generate_model_files.py', 'w') as f:
-            f.write(migrations_content)
+        self.files.write('generate_model_files.py', migrations_content)
 
         run_content = get_run_py_content()
-        with open(self.output_dir / 'run.py', 'w') as f:
-            f.write(run_content)
+        self.files.write('run.py', run_content)
 
         vcprint("[matrx-dream-service] ✅ Root level files generated", color="green", verbose=self.debug)
 
-    def _format_py_file(self, fp):
-        file_path = Path(fp)
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-        try:
-            formatted_code = black.format_file_contents(
-                code,
-                fast=False,  # Run in safe mode to ensure correctness
-                mode=black.FileMode(
-                    target_versions={black.TargetVersion.PY38},
-                    line_length=80,
-                ),
-            )
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(formatted_code)
-
-        except black.NothingChanged:
-            pass
-
-    def _format_project(self):
-        directory = self.output_dir
+    def _format_project(self, use_pool: bool = False) -> float:
+        """Format every python file of the tree, returning the CPU time the format pool workers spent"""
+        sources = {path: self.files.read(path) for path in self.files.paths(".py")}
+        stats = {}
+        formatted = format_sources(sources, workers=self.format_workers, cache=self.format_cache, use_pool=use_pool,
+                                   stats=stats)
+        for path, code in formatted.items():
+            self.files.write(path, code)
 
-        for fp in directory.glob("**/*.py"):
-            try:
-                self._format_py_file(fp)
-            except (black.InvalidInput, ValueError) as e:
-                pass
+        if self.format_cache is not None:
+            vcprint(f"[matrx-dream-service] Format cache: {self.format_cache.hits} hits, "
+                    f"{self.format_cache.misses} misses", color="light_blue", verbose=self.debug)
 
         vcprint("[matrx-dream-service] ✅ Project formatted", color="green", verbose=self.debug)
+        return stats['worker_cpu']
 
-    def _run_post_create_scripts(self):
+    def _post_create_scripts(self):
+        # default_config provides uv sync and model generation, TemplateMerger appends the user's scripts
+        return list(self.config.get('post_create_scripts', default_config['post_create_scripts']))
 
-        scripts = ["uv sync",
-                   "uv run --active generate_model_files.py --create-all true",
-                   "git init ."
-                   ]
-
-        original_dir = os.getcwd()
+    def _venv_key(self) -> str:
+        settings = self.config.get('settings', {})
+        return environment_key(self.config.get('dependencies', []), settings.get('requires_python', '>=3.8'),
+                               self.files.read('.python-version'))
+
+    def _restore_venv(self) -> bool:
+        """Link a cached .venv for this dependency set into output_dir, True when `uv sync` can be skipped"""
+        if self.venv_cache is None:
+            return False
+        restored = self.venv_cache.restore(self._venv_key(), self.output_dir / '.venv')
+        if restored:
+            vcprint("[matrx-dream-service] ✅ Reused cached virtual environment, skipping uv sync", color="green")
+        return restored
+
+    def _store_venv(self):
+        if self.venv_cache is not None:
+            self.venv_cache.store(self._venv_key(), self.output_dir / '.venv')
+
+    def _init_git_repository(self, path):
+        # Replaces a `git init .` script, the repository is written in-process
+        if not (Path(path) / '.git').exists():
+            init_repository(path)
+            vcprint("✅ Initialized empty git repository", color="green", style="bold")
+
+    def _post_create_env(self):
         env = os.environ.copy()
         env['PYTHONIOENCODING'] = 'utf-8'
         env['PYTHONLEGACYWINDOWSFSENCODING'] = '0'
-
-        try:
-            os.chdir(self.output_dir)
-            vcprint(f"📁 Changed working directory to: {self.output_dir}", color="light_blue")
-
-            for i, script in enumerate(scripts, 1):
-                vcprint(f"\n{'─' * 60}", color="bright_cyan")
-                vcprint(f"⚡ Executing script {i}/{len(scripts)}: {script}", color="bright_cyan", style="bold")
-                vcprint(f"{'─' * 60}", color="bright_cyan")
-
-                cmd_parts = script.split()
-                try:
-                    process = subprocess.Popen(
-                        cmd_parts,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1,
-                        env=env,
-                        encoding='utf-8',
-                        errors='replace'
-                    )
-                    while True:
-                        output = process.stdout.readline()
-                        if output == '' and process.poll() is not None:
-                            break
-                        if output:
-                            print(output.strip())
-                            sys.stdout.flush()
-                    return_code = process.poll()
-
-                    if return_code == 0:
-                        vcprint(f"✅ Script {i} completed successfully: {script}", color="green", style="bold")
-                    else:
-                        vcprint(f"❌ Script {i} failed with return code {return_code}: {script}", color="red",
-                                style="bold")
-                except FileNotFoundError:
-                    vcprint(f"❌ Command not found: {script}", color="red")
-                except Exception as e:
-                    vcprint(f"❌ Error executing script '{script}': {e}", "red")
-        finally:
-            os.chdir(original_dir)
+        return env
+
+    def _post_create_runner(self) -> PostCreateRunner:
+        log_path = Path(self.post_create_log_path or default_log_path(self.output_dir))
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.post_create_runner = PostCreateRunner(self.output_dir, env=self._post_create_env(), log_path=log_path,
+                                                   default_timeout=self.post_create_timeout, echo=self.debug)
+        return self.post_create_runner
+
+    def cancel_post_create(self):
+        """Kill the running post-create scripts and skip the rest, safe to call from another thread"""
+        if self.post_create_runner is not None:
+            self.post_create_runner.cancel()
+
+    def _report_post_create(self, results: list, venv_restored: bool) -> list:
+        self.post_create_results = results
+        for result in results:
+            if result['success']:
+                vcprint(f"✅ {result['command']} ({result['duration']:.2f}s)", color="green", style="bold")
+                continue
+            reason = ("timed out" if result['timed_out'] else "cancelled" if result['cancelled']
+                      else f"failed with return code {result['returncode']}")
+            vcprint(f"❌ {result['command']} {reason} ({result['duration']:.2f}s)", color="red", style="bold")
+            for line in result['output'][-20:]:
+                vcprint(f"    {line}", color="red")
+        if not venv_restored and any(script_command(r) == "uv sync" and r['success'] for r in results):
+            self._store_venv()
+        return [{'command': r['command'], 'duration': r['duration'], 'returncode': r['returncode'],
+                 'success': r['success']} for r in results]
+
+    def _scripts_to_run(self, venv_restored: bool) -> list:
+        scripts = self._post_create_scripts()
+        if venv_restored:
+            scripts = [script for script in scripts if script_command(script) != "uv sync"]
+        return scripts
+
+    async def _run_post_create_scripts_async(self) -> list:
+        """Run the post-create scripts with output_dir as their cwd, returns per-script durations"""
+        venv_restored = await asyncio.to_thread(self._restore_venv)
+        results = await self._post_create_runner().run(self._scripts_to_run(venv_restored))
+        summary = await asyncio.to_thread(self._report_post_create, results, venv_restored)
+        await asyncio.to_thread(self._init_git_repository, self.output_dir)
+        return summary
+
+    def _run_post_create_scripts(self) -> list:
+        venv_restored = self._restore_venv()
+        results = self._post_create_runner().run_sync(self._scripts_to_run(venv_restored))
+        summary = self._report_post_create(results, venv_restored)
+        self._init_git_repository(self.output_dir)
+        return summary
@@ -0,0 +1,95 @@
+import os
+import shutil
+import subprocess
+
+
+def _git_config(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(['git', 'config', '--global', *args], capture_output=True, text=True, encoding='utf-8')
+
+
+def global_config_path() -> str:
+    """The file `git config --global` writes: GIT_CONFIG_GLOBAL, else ~/.gitconfig unless only the XDG one exists"""
+    configured = os.environ.get('GIT_CONFIG_GLOBAL')
+    if configured:
+        return configured
+    home = os.path.join(os.path.expanduser('~'), '.gitconfig')
+    xdg = os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config'),
+                       'git', 'config')
+    if not os.path.exists(home) and os.path.exists(xdg):
+        return xdg
+    return home
+
+
+def _rewrite_safe_directories(entries: list):
+    """
+    Replace every safe.directory entry of the global config with entries in one rename.
+
+    Like git itself, the new file is built in <config>.lock, created exclusively so a concurrent git config
+    write fails instead of being lost, and renamed over the config. Readers see the old file or the new one,
+    never a config without its entries.
+    """
+    path = os.path.realpath(global_config_path())  # Replace a symlinked config's target, not the link
+    lock_path = path + '.lock'
+    fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as lock, open(path, 'rb') as config:
+            shutil.copyfileobj(config, lock)
+        shutil.copymode(path, lock_path)
+
+        def edit(*args):
+            result = subprocess.run(['git', 'config', '--file', lock_path, *args], capture_output=True, text=True,
+                                    encoding='utf-8')
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+
+        edit('--unset-all', 'safe.directory')
+        for entry in entries:
+            edit('--add', 'safe.directory', entry)
+        os.replace(lock_path, path)
+    except BaseException:
+        try:
+            os.unlink(lock_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def safe_directories() -> list:
+    """safe.directory entries of the global git config (honours GIT_CONFIG_GLOBAL), in file order"""
+    result = _git_config('--get-all', 'safe.directory')
+    if result.returncode == 1:  # The key isn't set
+        return []
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+    return result.stdout.splitlines()
+
+
+def is_stale(entry: str) -> bool:
+    """An entry for a directory that no longer exists. Wildcards, empty resets and %(prefix)/ paths are kept."""
+    if entry in ('', '*') or entry.startswith('%(prefix)/'):
+        return False
+    path = entry[:-2] if entry.endswith('/*') else entry
+    return not os.path.exists(path)
+
+
+def prune_safe_directories(dry_run: bool = False) -> dict:
+    """
+    Drop stale and duplicate safe.directory entries from the global git config.
+
+    Older versions of push_code_to_repo added one entry per generated temp directory, and every git command
+    on the host parses all of them. Kept entries are written back in their original order, replacing the
+    config file in one rename. Returns {'total', 'kept', 'removed'}; with dry_run nothing is written.
+    """
+    entries = safe_directories()
+    kept = []
+    seen = set()
+    for entry in entries:
+        if is_stale(entry) or (entry and entry in seen):
+            continue
+        seen.add(entry)
+        kept.append(entry)
+
+    removed = len(entries) - len(kept)
+    if removed and not dry_run:
+        _rewrite_safe_directories(kept)
+    return {'total': len(entries), 'kept': len(kept), 'removed': removed}
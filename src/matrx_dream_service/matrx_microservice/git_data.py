@@ -0,0 +1,114 @@
+import asyncio
+import base64
+import json
+
+from githubkit.exception import RequestFailed
+from matrx_utils import vcprint
+
+from matrx_dream_service.matrx_microservice.collaborators import DEFAULT_WORKERS, RateLimiter, call_with_retry, \
+    shared_connection
+from matrx_dream_service.matrx_microservice.git_writer import collect_files, hash_object
+
+
+def blob_sha(data: bytes) -> str:
+    """Git blob id of data, the sha GitHub returns for a blob created from it"""
+    return hash_object(data)[0]
+
+
+def _blob_payload(data: bytes) -> dict:
+    # Text goes up as is, only binary content pays the base64 overhead
+    try:
+        return {'content': data.decode('utf-8'), 'encoding': 'utf-8'}
+    except UnicodeDecodeError:
+        return {'content': base64.b64encode(data).decode('ascii'), 'encoding': 'base64'}
+
+
+class PushStats:
+    """Requests sent and JSON body bytes uploaded by one Git Data API push"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blobs_created = 0
+        self.blobs_reused = 0
+
+    def record(self, payload: dict):
+        self.requests += 1
+        self.bytes += len(json.dumps(payload))
+
+    def as_dict(self) -> dict:
+        return {'requests': self.requests, 'bytes': self.bytes, 'blobs_created': self.blobs_created,
+                'blobs_reused': self.blobs_reused}
+
+
+async def push_files_via_api(client, org: str, repo_name: str, files: list, message: str, author: dict,
+                             branches=('main', 'dev'), workers: int = DEFAULT_WORKERS,
+                             limiter: RateLimiter = None) -> dict:
+    """
+    Commit files to a repo through the Git Data API and point every branch in branches at the commit.
+
+    files are (posix path, mode, stat, content) as returned by git_writer.collect_files. Blob ids are computed
+    locally, so identical contents are uploaded once.
+    The blobs are created concurrently, then the tree, a parentless commit and the refs. The repo must have a
+    default branch, GitHub refuses Git Data writes to empty repositories, so create it with auto_init; the
+    first branch is force-moved onto the new commit and the others are created.
+
+    Returns {'commit', 'tree', 'branches', 'stats'}.
+    """
+    limiter = limiter or RateLimiter(workers)
+    stats = PushStats()
+
+    entries, uploads = [], {}
+    for rel_path, mode, _, data in files:
+        sha = blob_sha(data)
+        entries.append({'path': rel_path, 'mode': f"{mode:o}", 'type': 'blob', 'sha': sha})
+        if sha in uploads:
+            stats.blobs_reused += 1
+        else:
+            uploads[sha] = data
+
+    async def create_blob(sha: str, data: bytes):
+        payload = _blob_payload(data)
+        stats.record(payload)
+        response = await call_with_retry(limiter, client.rest.git.async_create_blob, owner=org, repo=repo_name,
+                                         data=payload)
+        created = response.json()['sha']
+        if created != sha:
+            raise ValueError(f"Blob id mismatch: computed {sha}, GitHub stored {created}")
+        stats.blobs_created += 1
+
+    async def send(method, **payload):
+        stats.record(payload)
+        response = await call_with_retry(limiter, method, owner=org, repo=repo_name, **payload)
+        return response.json()
+
+    async with shared_connection(client):
+        await asyncio.gather(*(create_blob(sha, data) for sha, data in uploads.items()))
+        tree = (await send(client.rest.git.async_create_tree, data={'tree': entries}))['sha']
+        commit = (await send(client.rest.git.async_create_commit,
+                             data={'message': message, 'tree': tree, 'parents': [], 'author': author}))['sha']
+        # The auto_init commit is replaced rather than kept as a parent, history starts at our commit
+        first, *others = branches
+        await send(client.rest.git.async_update_ref, ref=f"heads/{first}", data={'sha': commit, 'force': True})
+        await asyncio.gather(*(send(client.rest.git.async_create_ref, data={'ref': f"refs/heads/{branch}",
+                                                                            'sha': commit})
+                               for branch in others))
+
+    vcprint(f"[matrx-dream-service] Pushed {len(files)} files to {repo_name} via the Git Data API: "
+            f"{stats.blobs_created} blobs created, {stats.blobs_reused} reused, {stats.requests} requests, "
+            f"{stats.bytes} bytes", color="blue")
+    return {'commit': commit, 'tree': tree, 'branches': list(branches), 'stats': stats.as_dict()}
+
+
+async def push_directory_via_api(client, org: str, repo_name: str, code_path, message: str, author: dict,
+                                 branches=('main', 'dev'), workers: int = DEFAULT_WORKERS,
+                                 limiter: RateLimiter = None) -> dict:
+    """push_files_via_api for the files of code_path that `git add .` would stage"""
+    files = await asyncio.to_thread(collect_files, code_path)
+    if not files:
+        raise ValueError("No files found in the directory to commit.")
+    try:
+        return await push_files_via_api(client, org, repo_name, files, message, author, branches=branches,
+                                        workers=workers, limiter=limiter)
+    except RequestFailed as e:
+        raise ValueError(f"Git Data API push failed: {e.response.status_code} - {e.response.text}")
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import re
+import struct
+import time
+import zlib
+from pathlib import Path
+
+FILE_MODE = 0o100644
+EXECUTABLE_MODE = 0o100755
+SYMLINK_MODE = 0o120000
+TREE_MODE = 0o40000
+
+
+def hash_object(data: bytes, kind: str = "blob") -> tuple:
+    """Git object id of data and the raw object it is the hash of"""
+    raw = f"{kind} {len(data)}\0".encode("ascii") + data
+    return hashlib.sha1(raw).hexdigest(), raw
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and pattern.find("]", i + 1) != -1:
+            end = pattern.find("]", i + 1)
+            chars = pattern[i + 1:end]
+            out.append("[" + ("^" + chars[1:] if chars.startswith("!") else chars) + "]")
+            i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """
+    Rules of a root .gitignore, enough for what `git add .` skips in generated projects.
+
+    Supports comments, negation, directory-only patterns, anchored patterns and *, ?, [] and ** globs.
+    Nested .gitignore files and global excludes are not read.
+    """
+
+    def __init__(self, lines=()):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            self.rules.append((re.compile(_glob_to_regex(line.lstrip("/")) + r"\Z"), negated, dir_only, anchored))
+
+    @classmethod
+    def from_directory(cls, root):
+        try:
+            with open(os.path.join(root, ".gitignore"), "r", encoding="utf-8") as f:
+                return cls(f.readlines())
+        except OSError:
+            return cls()
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        ignored = False
+        for regex, negated, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path if anchored else name):
+                ignored = not negated
+        return ignored
+
+
+def collect_files(root) -> list:
+    """(posix path, mode, stat, content) of every file `git add .` would stage, sorted by path"""
+    root = str(root)
+    ignore = GitIgnore.from_directory(root)
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        kept = []
+        for dirname in dirnames:
+            if os.path.islink(os.path.join(dirpath, dirname)):
+                filenames.append(dirname)  # A symlink to a directory is stored as a link
+            elif dirname != ".git" and not ignore.ignored(prefix + dirname, True):
+                kept.append(dirname)
+        # Pruning in place keeps os.walk out of .git and ignored directories
+        dirnames[:] = kept
+        for filename in filenames:
+            rel_path = prefix + filename
+            if ignore.ignored(rel_path, False):
+                continue
+            full = os.path.join(dirpath, filename)
+            st = os.lstat(full)
+            if os.path.islink(full):
+                mode, data = SYMLINK_MODE, os.readlink(full).encode("utf-8")
+            else:
+                mode = EXECUTABLE_MODE if st.st_mode & 0o111 else FILE_MODE
+                with open(full, "rb") as f:
+                    data = f.read()
+            files.append((rel_path, mode, st, data))
+    files.sort(key=lambda item: item[0].encode("utf-8"))
+    return files
+
+
+class GitRepoWriter:
+    """
+    Creates a non-bare repository by writing .git directly: loose objects, the index, refs and config.
+
+    Produces the same objects as `git init`, `git add .` and `git commit` without starting a process.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.git_dir = self.path / ".git"
+
+    def init(self, initial_branch: str = "main", config: dict = None):
+        for sub in ("objects/info", "objects/pack", "refs/heads", "refs/tags", "info"):
+            (self.git_dir / sub).mkdir(parents=True, exist_ok=True)
+        (self.git_dir / "HEAD").write_text(f"ref: refs/heads/{initial_branch}\n", encoding="utf-8")
+        self.write_config(config or {})
+
+    def write_config(self, sections: dict):
+        """
+        Write .git/config from {section: {key: value}} after the default [core] section.
+
+        A section name like 'remote "origin"' is written as is.
+        """
+        sections = {"core": {"repositoryformatversion": "0", "filemode": "false" if os.name == "nt" else "true",
+                             "bare": "false", "logallrefupdates": "true"}, **sections}
+        lines = []
+        for section, values in sections.items():
+            lines.append(f"[{section}]")
+            lines.extend(f"\t{key} = {value}" for key, value in values.items())
+        (self.git_dir / "config").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def write_object(self, data: bytes, kind: str = "blob") -> str:
+        sha, raw = hash_object(data, kind)
+        path = self.git_dir / "objects" / sha[:2] / sha[2:]
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"tmp_{sha[2:]}")
+            tmp_path.write_bytes(zlib.compress(raw, 1))
+            os.replace(tmp_path, path)
+        return sha
+
+    def write_tree(self, entries: list) -> str:
+        """Write nested tree objects for [(posix path, mode, blob sha)], returning the root tree id"""
+        root = {}
+        for rel_path, mode, sha in entries:
+            *dirs, name = rel_path.split("/")
+            node = root
+            for d in dirs:
+                node = node.setdefault(d, {})
+            node[name] = (mode, sha)
+
+        def write(node: dict) -> str:
+            items = []
+            for name, value in node.items():
+                if isinstance(value, dict):
+                    items.append((name + "/", TREE_MODE, name, write(value)))
+                else:
+                    items.append((name, value[0], name, value[1]))
+            # Git orders entries by name with directories compared as if they ended in "/"
+            items.sort(key=lambda item: item[0].encode("utf-8"))
+            data = b"".join(f"{mode:o} {name}".encode("utf-8") + b"\0" + bytes.fromhex(sha)
+                            for _, mode, name, sha in items)
+            return self.write_object(data, "tree")
+
+        return write(root)
+
+    def write_commit(self, tree: str, message: str, name: str, email: str, parents: list = (),
+                     timestamp: int = None) -> str:
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        offset = time.localtime(timestamp).tm_gmtoff // 60
+        tz = f"{'+' if offset >= 0 else '-'}{abs(offset) // 60:02d}{abs(offset) % 60:02d}"
+        signature = f"{name} <{email}> {timestamp} {tz}"
+        lines = [f"tree {tree}"] + [f"parent {parent}" for parent in parents]
+        lines += [f"author {signature}", f"committer {signature}", "", message]
+        return self.write_object(("\n".join(lines) + "\n").encode("utf-8"), "commit")
+
+    def set_ref(self, ref: str, sha: str):
+        path = self.git_dir / ref
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(sha + "\n", encoding="ascii")
+
+    def write_index(self, files: list, shas: list):
+        """Write a version 2 index matching the committed files so `git status` starts clean"""
+        entries = []
+        for (rel_path, mode, st, _), sha in zip(files, shas):
+            name = rel_path.encode("utf-8")
+            entry = struct.pack(
+                ">10I20sH",
+                int(st.st_ctime) & 0xFFFFFFFF, st.st_ctime_ns % 1_000_000_000,
+                int(st.st_mtime) & 0xFFFFFFFF, st.st_mtime_ns % 1_000_000_000,
+                st.st_dev & 0xFFFFFFFF, st.st_ino & 0xFFFFFFFF, mode,
+                st.st_uid & 0xFFFFFFFF, st.st_gid & 0xFFFFFFFF, st.st_size & 0xFFFFFFFF,
+                bytes.fromhex(sha), min(len(name), 0xFFF),
+            ) + name
+            # Entries are NUL padded to a multiple of 8 bytes, with at least one NUL
+            entries.append(entry + b"\0" * (8 - len(entry) % 8))
+        data = b"DIRC" + struct.pack(">II", 2, len(entries)) + b"".join(entries)
+        (self.git_dir / "index").write_bytes(data + hashlib.sha1(data).digest())
+
+
+def init_repository(path, initial_branch: str = "main") -> GitRepoWriter:
+    """In-process `git init`"""
+    writer = GitRepoWriter(path)
+    writer.init(initial_branch)
+    return writer
+
+
+def commit_directory(path, message: str, author_name: str, author_email: str, branches=("main",),
+                     remote_url: str = None, timestamp: int = None) -> str:
+    """
+    In-process `git init`, `git add .` and `git commit` of path, pointing every branch in branches at the commit.
+
+    The first branch becomes HEAD. With remote_url an `origin` remote is configured like `git remote add`.
+    Returns the commit id.
+    """
+    files = collect_files(path)
+    if not files:
+        raise ValueError("No files found in the directory to commit.")
+
+    config = {"user": {"name": author_name, "email": author_email}}
+    if remote_url:
+        config['remote "origin"'] = {"url": remote_url, "fetch": "+refs/heads/*:refs/remotes/origin/*"}
+    writer = GitRepoWriter(path)
+    writer.init(branches[0], config)
+
+    shas = [writer.write_object(data) for _, _, _, data in files]
+    tree = writer.write_tree([(rel_path, mode, sha) for (rel_path, mode, _, _), sha in zip(files, shas)])
+    commit = writer.write_commit(tree, message, author_name, author_email, timestamp=timestamp)
+    writer.write_index(files, shas)
+    for branch in branches:
+        writer.set_ref(f"refs/heads/{branch}", commit)
+    return commit
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from matrx_dream_service.matrx_microservice.content_store import ContentStore, default_store_dir
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # Unpinned dependencies pick up new releases at least weekly
+
+# The generated project's own entry, the only part of a lock that differs between projects sharing dependencies
+_ROOT_PACKAGE = re.compile(r'(\[\[package\]\]\nname = )"[^"]*"(\nversion = )"[^"]*"(\nsource = \{ virtual = "\." \})')
+
+
+def default_lock_store_dir() -> Path:
+    """MATRX_LOCK_STORE_DIR if set, else <XDG cache>/matrx-dream-service/locks"""
+    return default_store_dir("MATRX_LOCK_STORE_DIR", "locks")
+
+
+def lock_key(dependencies: list, requires_python: str) -> str:
+    """Hash of what `uv lock` resolves a generated project from, independent of dependency order"""
+    payload = {'dependencies': sorted(dep.strip() for dep in dependencies), 'requires_python': requires_python}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def normalize_name(name: str) -> str:
+    """Project name the way uv writes it to uv.lock (PEP 503)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def retarget_lock(lock: str, name: str, version: str) -> str:
+    """Point a stored lock's root package entry at another project with the same dependencies"""
+    return _ROOT_PACKAGE.sub(lambda m: f'{m.group(1)}"{normalize_name(name)}"{m.group(2)}"{version}"{m.group(3)}',
+                             lock, count=1)
+
+
+def resolve_lock(pyproject: str, timeout: float = 300) -> str:
+    """Run `uv lock` for a pyproject.toml in a scratch directory and return the lock, None if uv failed"""
+    with tempfile.TemporaryDirectory(prefix="matrx-lock-") as tmp:
+        with open(os.path.join(tmp, "pyproject.toml"), "w", encoding="utf-8") as f:
+            f.write(pyproject)
+        try:
+            subprocess.run(["uv", "lock", "--quiet"], cwd=tmp, check=True, timeout=timeout,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            with open(os.path.join(tmp, "uv.lock"), "r", encoding="utf-8") as f:
+                return f.read()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+
+class LockStore(ContentStore):
+    """
+    Resolved uv.lock files keyed by lock_key, so a dependency set is resolved once rather than once per project.
+
+    Entries are plain files named after their key. get() needs neither uv nor the network. A hit bumps the
+    file's atime, which is what prune() evicts by once the store grows past max_bytes. The mtime stays the
+    resolution time, entries older than max_age seconds are resolved again.
+    """
+
+    suffix = ".lock"
+
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        super().__init__(directory or default_lock_store_dir(), max_bytes)
+        self.max_age = max_age
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            resolved_at = path.stat().st_mtime
+            if self.max_age and time.time() - resolved_at > self.max_age:
+                raise OSError("expired")
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                lock = f.read()
+            os.utime(path, (time.time(), resolved_at))
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return lock
+
+    def put(self, key: str, lock: str):
+        self._write(key, lock.encode("utf-8"))
+
+    def lock_for(self, pyproject: str, dependencies: list, requires_python: str, name: str, version: str):
+        """uv.lock content for a generated project, resolved with uv only when the dependency set is new"""
+        key = lock_key(dependencies, requires_python)
+        lock = self.get(key)
+        if lock is None:
+            lock = resolve_lock(pyproject)
+            if lock is None:
+                return None
+            self.put(key, lock)
+            self.maybe_prune()
+        return retarget_lock(lock, name, version)
+
+    @staticmethod
+    def _last_used(stat) -> float:
+        return max(stat.st_atime, stat.st_mtime)
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+
+def _process_child_cpu() -> float:
+    # CPU of every child process the whole process reaped, including those of concurrent generations
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class GenerationMetrics:
+    """
+    Per-stage wall time, CPU time, files and bytes written for one generation.
+
+    cpu is time.process_time() of the calling process, so it covers every thread: the worker threads of the
+    async path are counted, but so is the CPU of generations running concurrently on other threads.
+    worker_cpu is the CPU time the format pool workers report for this generation. process_child_cpu comes
+    from os.times() and is process-wide too: it counts every child reaped during the stage, post-create
+    scripts and git included. Both are only exact for one generation at a time.
+
+    Stages are recorded in run order. When jsonl_path is set every stage and the final summary are also
+    appended to it as JSON lines.
+    """
+
+    def __init__(self, files=None, jsonl_path: str = None):
+        self.generation_id = uuid.uuid4().hex
+        self.files = files
+        self.jsonl_path = jsonl_path
+        self.stages = []
+        self.started_at = time.time()
+
+    def _file_counters(self):
+        if self.files is None:
+            return 0, 0
+        return self.files.writes, self.files.bytes_written
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a stage, counting what it wrote into the file tree"""
+        writes, written = self._file_counters()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        child_cpu_start = _process_child_cpu()
+        entry = {'stage': name, 'success': False}
+        try:
+            yield entry
+            entry['success'] = True
+        finally:
+            end_writes, end_written = self._file_counters()
+            entry['wall'] = round(time.perf_counter() - wall_start, 6)
+            entry['cpu'] = round(time.process_time() - cpu_start, 6)
+            entry['process_child_cpu'] = round(_process_child_cpu() - child_cpu_start, 6)
+            entry['worker_cpu'] = round(entry.get('worker_cpu', 0.0), 6)
+            # Stages that write outside the tree (flush) report their own counts through the entry
+            entry.setdefault('files', end_writes - writes)
+            entry.setdefault('bytes', end_written - written)
+            self.stages.append(entry)
+            self._emit('stage', entry)
+
+    def report(self) -> dict:
+        return {
+            'generation_id': self.generation_id,
+            'started_at': self.started_at,
+            'stages': list(self.stages),
+            'wall': round(sum(stage['wall'] for stage in self.stages), 6),
+            'cpu': round(sum(stage['cpu'] for stage in self.stages), 6),
+            'worker_cpu': round(sum(stage['worker_cpu'] for stage in self.stages), 6),
+            'process_child_cpu': round(sum(stage['process_child_cpu'] for stage in self.stages), 6),
+            'files': len(self.files) if self.files is not None else 0,
+            'bytes': sum(stage['bytes'] for stage in self.stages if stage['stage'] == 'flush_files'),
+        }
+
+    def finish(self) -> dict:
+        report = self.report()
+        self._emit('summary', {key: value for key, value in report.items() if key != 'stages'})
+        return report
+
+    def _emit(self, event: str, payload: dict):
+        if not self.jsonl_path:
+            return
+        line = json.dumps({'event': event, 'generation_id': self.generation_id, **payload}, default=str)
+        with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import os
+import shlex
+import signal
+import time
+from collections import deque
+from pathlib import Path
+
+from matrx_dream_service.matrx_microservice.event_loop import run_sync
+
+DEFAULT_TIMEOUT = 900.0  # Seconds per script, `uv sync` of a cold cache included
+DEFAULT_BUFFER_LINES = 200  # Output lines kept in memory per script, the log file has everything
+KILL_GRACE = 5.0  # Seconds between SIGTERM and SIGKILL for a timed out or cancelled script
+_READ_SIZE = 64 * 1024
+
+
+def default_log_path(cwd) -> Path:
+    """
+    Log file for the scripts run in cwd, kept outside the project so it is never committed.
+
+    MATRX_POST_CREATE_LOG_DIR if set, else <XDG state>/matrx-dream-service/post_create, one file per project
+    directory named after it.
+    """
+    configured = os.environ.get("MATRX_POST_CREATE_LOG_DIR")
+    if configured:
+        directory = Path(configured)
+    else:
+        state_home = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+        directory = Path(state_home) / "matrx-dream-service" / "post_create"
+    project = Path(cwd).resolve()
+    return directory / f"{project.name}-{hashlib.sha256(str(project).encode('utf-8')).hexdigest()[:12]}.log"
+
+
+def script_command(script) -> str:
+    """Command of a config entry or result with its whitespace collapsed, for comparing scripts"""
+    command = script['command'] if isinstance(script, dict) else script
+    return " ".join(command.split())
+
+
+def normalize_scripts(scripts: list, default_timeout: float = DEFAULT_TIMEOUT) -> list:
+    """
+    Config entries to {'command', 'timeout', 'independent'} dicts.
+
+    An entry is a command string, or an object with a command and optional timeout (seconds) and independent
+    flag. An independent script doesn't need the script before it and runs concurrently with it.
+    """
+    normalized = []
+    for script in scripts:
+        if isinstance(script, str):
+            script = {'command': script}
+        normalized.append({
+            'command': script['command'],
+            'timeout': script.get('timeout') or default_timeout,
+            'independent': bool(script.get('independent', False)),
+        })
+    return normalized
+
+
+def plan_batches(scripts: list) -> list:
+    """Group the indices of normalized scripts into batches run one after another, a batch runs concurrently"""
+    batches = []
+    for index, script in enumerate(scripts):
+        if batches and script['independent']:
+            batches[-1].append(index)
+        else:
+            batches.append([index])
+    return batches
+
+
+def _kill(process: asyncio.subprocess.Process, sig):
+    try:
+        if os.name == "posix":
+            # Scripts run in their own session, `uv run` children go down with them
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class PostCreateRunner:
+    """
+    Runs post-create scripts as subprocesses with cwd as their working directory.
+
+    Each script gets its own timeout and a ring buffer of its last buffer_lines output lines; the full output
+    of every script goes to log_path. Output is only echoed when echo is set. cancel() may be called from any
+    thread: running scripts are killed and the remaining ones are reported as cancelled.
+    """
+
+    def __init__(self, cwd, env: dict = None, log_path=None, default_timeout: float = DEFAULT_TIMEOUT,
+                 buffer_lines: int = DEFAULT_BUFFER_LINES, echo: bool = False):
+        self.cwd = str(cwd)
+        self.env = env
+        self.log_path = log_path
+        self.default_timeout = default_timeout
+        self.buffer_lines = buffer_lines
+        self.echo = echo
+        self._loop = None
+        self._cancel_event = None
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+        loop, event = self._loop, self._cancel_event
+        if loop is not None and event is not None:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # Loop already closed, nothing is running anymore
+                pass
+
+    def run_sync(self, scripts: list) -> list:
+        return run_sync(self.run(scripts))
+
+    async def run(self, scripts: list) -> list:
+        """
+        Run the scripts, returns one result per script in config order:
+        {'command', 'returncode', 'duration', 'success', 'timed_out', 'cancelled', 'output'}.
+
+        A failed script doesn't stop the ones after it, the same as running them by hand.
+        """
+        scripts = normalize_scripts(scripts, self.default_timeout)
+        self._loop = asyncio.get_running_loop()
+        self._cancel_event = asyncio.Event()
+        results = {}
+        log = open(self.log_path, "a", encoding="utf-8") if self.log_path else None
+        try:
+            for batch in plan_batches(scripts):
+                if self._cancel_requested:
+                    break
+                tasks = [asyncio.ensure_future(self._run_script(index, scripts[index], log)) for index in batch]
+                cancel_wait = asyncio.ensure_future(self._cancel_event.wait())
+                try:
+                    await asyncio.wait([asyncio.gather(*tasks), cancel_wait], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    # Cancelled scripts kill their process and still return a result
+                    cancel_wait.cancel()
+                    for task in tasks:
+                        task.cancel()
+                    finished = await asyncio.gather(*tasks, return_exceptions=True)
+                results.update(result for result in finished if isinstance(result, tuple))
+        finally:
+            self._loop = self._cancel_event = None
+            if log is not None:
+                log.close()
+
+        return [results.get(index) or {'command': script['command'], 'returncode': None, 'duration': 0.0,
+                                        'success': False, 'timed_out': False, 'cancelled': True, 'output': []}
+                for index, script in enumerate(scripts)]
+
+    def _write(self, log, index: int, line: str):
+        if log is not None:
+            log.write(f"[{index + 1}] {line}\n")
+            log.flush()
+        if self.echo:
+            print(line)
+
+    async def _run_script(self, index: int, script: dict, log) -> tuple:
+        command = script['command']
+        output = deque(maxlen=self.buffer_lines)
+        result = {'command': command, 'returncode': None, 'duration': 0.0, 'success': False, 'timed_out': False,
+                  'cancelled': False, 'output': output}
+        self._write(log, index, f"$ {command}")
+        start = time.perf_counter()
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *shlex.split(command, posix=os.name == "posix"),
+                cwd=self.cwd,
+                env=self.env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=os.name == "posix",
+            )
+            # The exit is awaited within the timeout too, a script may close its output and keep running
+            result['returncode'] = await asyncio.wait_for(self._finish(process, index, output, log),
+                                                          script['timeout'])
+        except asyncio.TimeoutError:
+            result['timed_out'] = True
+            result['returncode'] = await self._stop(process)
+            self._write(log, index, f"Timed out after {script['timeout']}s")
+        except asyncio.CancelledError:
+            result['cancelled'] = True
+            if process is not None:
+                result['returncode'] = await self._stop(process)
+            self._write(log, index, "Cancelled")
+        except OSError as e:  # Command not found, bad cwd
+            output.append(str(e))
+            self._write(log, index, str(e))
+        result['duration'] = round(time.perf_counter() - start, 6)
+        result['success'] = result['returncode'] == 0 and not result['timed_out'] and not result['cancelled']
+        result['output'] = list(output)
+        self._write(log, index, f"Exit code {result['returncode']} after {result['duration']:.2f}s")
+        return index, result
+
+    async def _finish(self, process, index: int, output: deque, log) -> int:
+        await self._consume(process, index, output, log)
+        return await process.wait()
+
+    async def _consume(self, process, index: int, output: deque, log):
+        pending = b""
+        while True:
+            chunk = await process.stdout.read(_READ_SIZE)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                text = line.decode("utf-8", errors="replace").rstrip()
+                output.append(text)
+                self._write(log, index, text)
+        if pending:
+            text = pending.decode("utf-8", errors="replace").rstrip()
+            output.append(text)
+            self._write(log, index, text)
+
+    @staticmethod
+    async def _stop(process) -> int:
+        _kill(process, signal.SIGTERM)
+        try:
+            return await asyncio.wait_for(process.wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            _kill(process, signal.SIGKILL)
+            return await process.wait()
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+import weakref
+
+from githubkit.exception import RequestFailed
+from matrx_utils import vcprint
+
+DEFAULT_TTL = 300  # Seconds an org listing is trusted before it is fetched again
+PER_PAGE = 100
+
+
+class RepoNameCache:
+    """
+    Repository names of one org, listed once and kept for `ttl` seconds.
+
+    Name candidates are checked against the cached set locally. Only the chosen name gets an authoritative
+    `repos.get`; if the cache was stale and it exists after all, it's recorded and the next candidate is tried.
+    GitHub repo names are case-insensitive, so names are stored lowercased.
+    """
+
+    def __init__(self, client, org: str, ttl: float = DEFAULT_TTL):
+        self.client = client
+        self.org = org
+        self.ttl = ttl
+        self._names = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        # asyncio locks belong to one loop and the cache is shared by every thread's loop, so one lock per loop
+        self._async_locks = weakref.WeakKeyDictionary()
+        self.refreshes = 0
+
+    def _expired(self) -> bool:
+        return self._names is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _store(self, names: set):
+        self._names = names
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        vcprint(f"[matrx-dream-service] Cached {len(names)} repository names of {self.org}", color="blue")
+
+    @staticmethod
+    def _page_names(response) -> list:
+        # The raw JSON is enough here, skip validating thousands of repository models
+        return [repo["name"].lower() for repo in response.json()]
+
+    def refresh(self) -> set:
+        names = set()
+        page = 1
+        while True:
+            response = self.client.rest.repos.list_for_org(org=self.org, type="all", per_page=PER_PAGE, page=page)
+            batch = self._page_names(response)
+            names.update(batch)
+            if len(batch) < PER_PAGE:
+                break
+            page += 1
+        self._store(names)
+        return names
+
+    async def async_refresh(self) -> set:
+        names = set()
+        page = 1
+        while True:
+            response = await self.client.rest.repos.async_list_for_org(org=self.org, type="all", per_page=PER_PAGE,
+                                                                       page=page)
+            batch = self._page_names(response)
+            names.update(batch)
+            if len(batch) < PER_PAGE:
+                break
+            page += 1
+        self._store(names)
+        return names
+
+    def names(self) -> set:
+        if self._expired():
+            with self._lock:
+                if self._expired():
+                    self.refresh()
+        return self._names
+
+    def _async_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._async_locks.get(loop)
+            if lock is None:
+                lock = self._async_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def async_names(self) -> set:
+        if self._expired():
+            async with self._async_lock():
+                if self._expired():
+                    await self.async_refresh()
+        return self._names
+
+    def invalidate(self):
+        self._names = None
+
+    def mark_taken(self, name: str):
+        """Record a name created (or found) after the listing was fetched"""
+        if self._names is not None:
+            self._names.add(name.lower())
+
+    def _exists(self, name: str) -> bool:
+        try:
+            self.client.rest.repos.get(owner=self.org, repo=name)
+            return True
+        except RequestFailed as e:
+            if e.response.status_code == 404:
+                return False
+            raise
+
+    async def _async_exists(self, name: str) -> bool:
+        try:
+            await self.client.rest.repos.async_get(owner=self.org, repo=name)
+            return True
+        except RequestFailed as e:
+            if e.response.status_code == 404:
+                return False
+            raise
+
+    def available_name(self, candidates) -> str:
+        """First candidate that's free in the org"""
+        for candidate in candidates:
+            if candidate.lower() in self.names():
+                continue
+            if not self._exists(candidate):
+                return candidate
+            self.mark_taken(candidate)
+        raise ValueError("Could not find a repo name")
+
+    async def async_available_name(self, candidates) -> str:
+        for candidate in candidates:
+            if candidate.lower() in await self.async_names():
+                continue
+            if not await self._async_exists(candidate):
+                return candidate
+            self.mark_taken(candidate)
+        raise ValueError("Could not find a repo name")
@@ -0,0 +1,77 @@
+def parse_ref(ref) -> str:
+    """Return the definition name of a 'definitions/NAME' or '#/definitions/NAME' ref, None otherwise"""
+    if not isinstance(ref, str):
+        return None
+    parts = ref.lstrip('#').strip('/').split('/')
+    if len(parts) == 2 and parts[0] == 'definitions' and parts[1]:
+        return parts[1]
+    return None
+
+
+def clean_service_name(service_name: str) -> str:
+    """SCRAPER_SERVICE -> scraper"""
+    return service_name.lower().replace('_service', '')
+
+
+class TaskIR:
+    def __init__(self, name: str, definition, definitions: dict):
+        self.name = name
+        self.method_name = name.lower()
+        self.is_mic_check = self.method_name == 'mic_check'
+        self.definition = definition
+
+        # Resolve the task's fields, either declared inline or through a $ref into schema definitions
+        self.ref = None
+        self.ref_name = None
+        self.is_dangling = False
+        self.fields = {}
+        if isinstance(definition, dict):
+            if '$ref' in definition:
+                self.ref = definition['$ref']
+                self.ref_name = parse_ref(self.ref)
+                resolved = definitions.get(self.ref_name) if self.ref_name else None
+                self.is_dangling = not isinstance(resolved, dict)
+                self.fields = resolved if isinstance(resolved, dict) else {}
+            else:
+                self.fields = definition
+
+
+class ServiceIR:
+    def __init__(self, name: str, tasks: dict, definitions: dict, primary_service_name: str = None):
+        self.name = name
+        self.key = name.lower()
+        self.clean_name = clean_service_name(name)
+        self.module_name = self.clean_name + '_service'
+        self.file_name = self.module_name + '.py'
+        self.class_name = self.clean_name.capitalize() + 'Service'
+        self.orchestrator_class_name = self.clean_name.capitalize() + 'Orchestrator'
+        self.is_admin = 'admin' in self.key
+        self.is_primary = primary_service_name is not None and name == f"{primary_service_name.upper()}_SERVICE"
+        self.tasks = [TaskIR(task_name, task_def, definitions) for task_name, task_def in (tasks or {}).items()]
+
+        # Every service handles mic_check, so its message is always an attribute
+        field_names = {'mic_check_message'}
+        for task in self.tasks:
+            field_names.update(task.fields.keys())
+        self.field_names = sorted(field_names)
+
+
+class SchemaIR:
+    """Services, tasks, resolved fields and derived identifiers of a config schema, compiled once per generation"""
+
+    def __init__(self, schema: dict, primary_service_name: str = None):
+        self.schema = schema or {}
+        self.definitions = self.schema.get('definitions', {}) or {}
+        self.services = [ServiceIR(service_name, tasks, self.definitions, primary_service_name)
+                         for service_name, tasks in (self.schema.get('tasks', {}) or {}).items()]
+
+    def __iter__(self):
+        return iter(self.services)
+
+    def __len__(self):
+        return len(self.services)
+
+
+def compile_schema(config: dict) -> SchemaIR:
+    settings = config.get('settings', {}) or {}
+    return SchemaIR(config.get('schema', {}), settings.get('app_primary_service_name', 'default'))
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from matrx_dream_service.matrx_microservice.content_store import ContentStore, default_store_dir
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # Unpinned dependencies pick up new releases at least weekly
+_META = "meta.json"
+
+
+def default_venv_cache_dir() -> Path:
+    """MATRX_VENV_CACHE_DIR if set, else <XDG cache>/matrx-dream-service/venvs"""
+    return default_store_dir("MATRX_VENV_CACHE_DIR", "venvs")
+
+
+def environment_key(dependencies: list, requires_python: str, python_version: str = None) -> str:
+    """
+    Hash of everything `uv sync` resolves a generated project's environment from.
+
+    Dependency order doesn't change the resolution, so the list is sorted. The platform is part of the key
+    because a virtual environment only runs where it was built.
+    """
+    payload = {
+        'dependencies': sorted(dep.strip() for dep in dependencies),
+        'requires_python': requires_python,
+        'python_version': python_version,
+        'platform': [sys.platform, platform.machine()],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _link_tree(source: Path, target: Path) -> int:
+    """Recreate source at target with hardlinked files (copies across devices), returns the bytes linked"""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(source):
+        rel = Path(dirpath).relative_to(source)
+        (target / rel).mkdir(parents=True, exist_ok=True)
+        for name in dirnames + filenames:
+            src, dst = Path(dirpath) / name, target / rel / name
+            if src.is_symlink():
+                os.symlink(os.readlink(src), dst)
+                if name in dirnames:
+                    dirnames.remove(name)  # Not followed, the link itself was recreated
+            elif name in filenames:
+                try:
+                    os.link(src, dst)
+                except OSError:
+                    shutil.copy2(src, dst)
+                total += src.stat().st_size
+    return total
+
+
+def _relocate(venv: Path, old_prefix: str, new_prefix: str):
+    """
+    Point a linked venv's absolute paths (activate scripts, console script shebangs, pyvenv.cfg, .pth files) at
+    its new location. Files are rewritten as new inodes so the cached copy they were linked from stays intact.
+    """
+    if old_prefix == new_prefix:
+        return
+    old, new = old_prefix.encode("utf-8"), new_prefix.encode("utf-8")
+    candidates = [venv / "pyvenv.cfg"]
+    for scripts in ("bin", "Scripts"):
+        if (venv / scripts).is_dir():
+            candidates.extend(path for path in (venv / scripts).iterdir() if not path.is_symlink())
+    candidates.extend(venv.glob("lib*/python*/site-packages/*.pth"))
+    candidates.extend(venv.glob("Lib/site-packages/*.pth"))
+    for path in candidates:
+        if not path.is_file() or path.stat().st_size > 1024 * 1024:
+            continue
+        data = path.read_bytes()
+        if old not in data:
+            continue
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp_path.write_bytes(data.replace(old, new))
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+
+
+class VenvCache(ContentStore):
+    """
+    Prepared virtual environments of generated projects, keyed by environment_key.
+
+    Each entry is <key>/venv plus <key>/meta.json recording where the venv was built and its size. restore()
+    hardlinks a cached venv into a project, so a hit costs a directory walk instead of a resolve and install.
+    A hit bumps meta.json's mtime; prune() removes the least recently used entries once the cache grows past
+    max_bytes. Entries older than max_age seconds are rebuilt.
+    """
+
+    tmp_pattern = ".*.tmp"
+
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        super().__init__(directory or default_venv_cache_dir(), max_bytes)
+        self.max_age = max_age
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key
+
+    def _meta(self, key: str):
+        try:
+            with open(self._entry(key) / _META, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.max_age and time.time() - meta['created'] > self.max_age:
+            return None
+        return meta
+
+    def restore(self, key: str, venv_path) -> bool:
+        """Link the cached venv for key to venv_path, False on a miss"""
+        venv_path = Path(venv_path)
+        meta = self._meta(key)
+        if meta is None or venv_path.exists():
+            self.misses += 1
+            return False
+        try:
+            _link_tree(self._entry(key) / "venv", venv_path)
+            _relocate(venv_path, meta['prefix'], str(venv_path.resolve()))
+            os.utime(self._entry(key) / _META)
+        except OSError:
+            shutil.rmtree(venv_path, ignore_errors=True)
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key: str, venv_path) -> bool:
+        """Add a freshly synced venv under key. Another process storing the same key first wins."""
+        venv_path = Path(venv_path)
+        if self._meta(key) is not None or not venv_path.is_dir():
+            return False
+        tmp_entry = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            size = _link_tree(venv_path, tmp_entry / "venv")
+            with open(tmp_entry / _META, "w", encoding="utf-8") as f:
+                json.dump({'prefix': str(venv_path.resolve()), 'size': size, 'created': time.time()}, f)
+            # An expired entry is replaced, a fresh one from a concurrent store makes the rename fail
+            stale = self._entry(key)
+            if stale.exists():
+                shutil.rmtree(stale, ignore_errors=True)
+            os.rename(tmp_entry, stale)
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+        self._added(size)
+        self.maybe_prune()
+        return True
+
+    def _entries(self):
+        for meta_path in self.directory.glob(f"*/{_META}"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    size = json.load(f)['size']
+                yield meta_path.stat().st_mtime, size, meta_path.parent
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def _remove(self, entry):
+        shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+import httpx
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.api_trace import ApiTrace, JsonLinesExporter, endpoint_template, \
+    trace_api_calls, tracing_github
+from matrx_dream_service.matrx_microservice.collaborators import add_collaborators_concurrently
+
+assert endpoint_template("/repos/acme/billing/git/refs/heads/main") == "/repos/{owner}/{repo}/git/refs/{ref}"
+assert endpoint_template("/orgs/acme/repos") == "/orgs/{org}/repos"
+
+# One request refused three times: each resend is one retry, its spans hold the attempt index
+trace = ApiTrace()
+request = httpx.Request("PUT", "https://api.github.com/repos/acme/service/collaborators/dev0", json={"x": 1})
+for status in (403, 403, 429, 201):
+    trace.record(request, httpx.Response(status, request=request), 0.0, 0.01)
+assert [span["retries"] for span in trace.spans] == [0, 1, 2, 3]
+assert trace.summary()["retries"] == 3 and trace.summary()["round_trips"] == 4
+
+access = [{"username": f"dev{i}", "permission": {"push": True}} for i in range(20)]
+
+# More than 3 requests in flight get a secondary rate limit, and the primary budget is nearly spent
+with FakeGitHub(org="acme", repos=["service"], latency=0.1, max_concurrent=3) as fake, \
+        tempfile.TemporaryDirectory() as tmp:
+    fake.rate_limit_remaining = 450
+    client = tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=False)
+    spans_path = os.path.join(tmp, "spans.jsonl")
+
+    with trace_api_calls(exporters=[JsonLinesExporter(spans_path)]) as trace:
+        result = asyncio.run(add_collaborators_concurrently(client, "acme", "service", access, workers=8))
+    assert len(result["success"]) == 20, result
+
+    summary = trace.summary()
+    assert summary["round_trips"] == len(fake.calls) == 20 + fake.rate_limited, summary["round_trips"]
+    # Every refused request was sent again once it was its turn, each resend counts as a retry
+    assert fake.rate_limited and summary["retries"] == fake.rate_limited, (summary["retries"], fake.rate_limited)
+    assert summary["rate_limit_remaining"] == fake.rate_limit_remaining
+    spans = summary["spans"]
+    assert {span["endpoint"] for span in spans} == {"PUT /repos/{owner}/{repo}/collaborators/{username}"}
+    assert sorted(span["status"] for span in spans if span["status"] == 403) == [403] * fake.rate_limited
+    assert all(span["latency"] >= 0.1 and span["rate_limit"]["limit"] == 5000 for span in spans)
+    print(f"{summary['round_trips']} requests, {summary['retries']} retries, "
+          f"{summary['rate_limit_remaining']} requests of budget left")
+
+    with open(spans_path, encoding="utf-8") as f:
+        exported = [json.loads(line) for line in f]
+    assert [span["span_id"] for span in exported] == [span["span_id"] for span in spans]
+    assert {span["trace_id"] for span in exported} == {trace.trace_id}
+
+    # Requests outside a trace are not recorded
+    asyncio.run(add_collaborators_concurrently(client, "acme", "service", access[:1]))
+    assert trace.round_trips == summary["round_trips"]
+
+print("ok")
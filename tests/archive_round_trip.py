@@ -0,0 +1,72 @@
+import asyncio
+import io
+import tarfile
+import zipfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+CHUNK_SIZE = 4096
+
+
+class NonSeekableSink(io.RawIOBase):
+    """Like a socket or pipe: append only, no seek and no tell"""
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+
+def extract(data: bytes, archive_format: str) -> dict:
+    if archive_format == "zip":
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            return {name: archive.read(name).decode("utf-8") for name in archive.namelist()}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        return {member.name: tar.extractfile(member).read().decode("utf-8") for member in tar.getmembers()}
+
+
+async def collect_async(generator: MicroserviceGenerator, archive_format: str) -> list:
+    return [chunk async for chunk in generator.aiter_archive(archive_format, root="svc", chunk_size=CHUNK_SIZE)]
+
+
+generator = MicroserviceGenerator(config=make_synthetic_config(services=3, tasks=40), use_format_cache=False,
+                                  use_lock_store=False)
+generator._render_files()
+expected = {f"svc/{path}": content for path, content in generator.files.items()}
+assert len(expected) > 20
+
+for archive_format in ("tar.gz", "zip"):
+    chunks = list(generator.iter_archive(archive_format, root="svc", chunk_size=CHUNK_SIZE))
+    assert len(chunks) > 1 and all(0 < len(chunk) <= CHUNK_SIZE for chunk in chunks), [len(c) for c in chunks]
+    assert extract(b"".join(chunks), archive_format) == expected
+
+    async_chunks = asyncio.run(collect_async(generator, archive_format))
+    assert all(0 < len(chunk) <= CHUNK_SIZE for chunk in async_chunks)
+    assert extract(b"".join(async_chunks), archive_format) == expected
+
+    seekable = io.BytesIO()
+    generator.generate_archive(seekable, archive_format, root="svc")
+    assert extract(seekable.getvalue(), archive_format) == expected
+
+    sink = NonSeekableSink()
+    generator.generate_archive(sink, archive_format, root="svc")
+    assert extract(bytes(sink.data), archive_format) == expected
+    print(f"{archive_format}: {len(expected)} files in {len(chunks)} chunks of at most {CHUNK_SIZE} bytes")
+
+try:
+    generator.generate_archive(io.BytesIO(), "rar")
+    raise AssertionError("an unsupported format was accepted")
+except ValueError:
+    pass
+
+print("ok")
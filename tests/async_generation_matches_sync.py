@@ -0,0 +1,61 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator, formatting
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+
+def read_tree(root: str) -> dict:
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def generator(config_path: str, output_dir: str) -> MicroserviceGenerator:
+    return MicroserviceGenerator(config_path=config_path, output_dir=output_dir, run_post_create=False,
+                                 use_format_cache=False, use_lock_store=False)
+
+
+async def generate_concurrently(config_path: str, root: str) -> list:
+    # Two generations on one loop, each keeps the loop free while rendering and formatting
+    generators = [generator(config_path, os.path.join(root, f"async_{i}")) for i in range(2)]
+    await asyncio.gather(*(gen.generate_microservice_async() for gen in generators))
+    return generators
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    config_path = os.path.join(tmp, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(make_synthetic_config(services=4, tasks=60), f)
+
+    sync_generator = generator(config_path, os.path.join(tmp, "sync"))
+    sync_generator.generate_microservice()
+    expected = read_tree(os.path.join(tmp, "sync"))
+    assert len(expected) > 20
+
+    async_generators = asyncio.run(generate_concurrently(config_path, tmp))
+    # Both generations formatted on the shared pool, a later one reuses its workers instead of forking again
+    pool = formatting._pool
+    workers = set(pool._processes)
+    asyncio.run(generate_concurrently(config_path, os.path.join(tmp, "again")))
+    assert formatting._pool is pool and set(pool._processes) == workers
+    for gen in async_generators:
+        assert read_tree(str(gen.output_dir)) == expected, gen.output_dir
+        report = gen.last_metrics
+        assert report == gen.metrics.report()
+        assert [stage["stage"] for stage in report["stages"]] == \
+               [stage["stage"] for stage in sync_generator.metrics.report()["stages"]]
+        # The async path formats in a process pool, its workers report their CPU to this generation only
+        format_stage = next(stage for stage in report["stages"] if stage["stage"] == "format_project")
+        assert format_stage["worker_cpu"] > 0 and report["worker_cpu"] == format_stage["worker_cpu"], report
+    print(f"async output of {len(expected)} files is byte-identical to the sync path")
+
+print("ok")
@@ -0,0 +1,65 @@
+import asyncio
+import io
+import json
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.audit import AuditCache, iter_collaborator_audit
+from matrx_dream_service.matrx_microservice.collaborators import RateLimiter
+
+
+async def audit(client, cache, repo_names=None):
+    limiter = RateLimiter(4)
+    records = [record async for record in iter_collaborator_audit(client, "acme", repo_names, cache=cache,
+                                                                  limiter=limiter)]
+    return records, limiter.requests
+
+
+repos = [f"service_{i:03d}" for i in range(300)]
+with FakeGitHub(org="acme", repos=repos) as fake, tempfile.TemporaryDirectory() as cache_dir:
+    for i, repo in enumerate(repos):
+        for j in range(3 + i % 5):
+            fake.add_collaborator(repo, f"user{j}", ("pull", "push", "admin")[j % 3])
+    for j in range(250):  # One repo with several pages of collaborators
+        fake.add_collaborator("service_007", f"contractor{j:03d}", "pull")
+
+    client = GitHub("token", base_url=fake.url, http_cache=False, auto_retry=False)
+    records, queries = asyncio.run(audit(client, AuditCache("acme", cache_dir)))
+    by_repo = {record["repo"]: record for record in records}
+    # 3 listing pages + 12 batches of 25 + 2 follow-up pages for service_007, instead of 300+ REST calls
+    assert queries == 3 + 12 + 2, queries
+    assert len(by_repo) == 300 and all(record["changed"] for record in records)
+    assert len(by_repo["service_007"]["collaborators"]) == 3 + 7 % 5 + 250
+    assert {"username": "user2", "permission": "admin"} in by_repo["service_001"]["collaborators"]
+    print(f"audited 300 repos with {queries} GraphQL queries")
+
+    # Next audit: only the repo whose access changed is flagged, ETags of the others are stable
+    fake.add_collaborator("service_042", "newcomer", "push")
+    records, _ = asyncio.run(audit(client, AuditCache("acme", cache_dir)))
+    assert [record["repo"] for record in records if record["changed"]] == ["service_042"]
+
+    # Within max_age nothing is fetched, unknown repos are reported instead of failing the batch
+    records, queries = asyncio.run(audit(client, AuditCache("acme", cache_dir, max_age=3600),
+                                         ["service_001", "service_002", "ghost"]))
+    assert queries == 1 and [r["cached"] for r in records] == [True, True, False], (queries, records)
+    assert records[-1]["error"] == "not found"
+
+    # A failing query fails only its batch, every repo of it is reported and the other batches complete
+    fake.failing_graphql_repos = {"service_030"}
+    partial, _ = asyncio.run(audit(client, None, repos[:100]))
+    failed = {record["repo"]: record["error"] for record in partial if record["error"]}
+    assert sorted(failed) == repos[25:50], sorted(failed)
+    assert all(error.startswith("RequestFailed") for error in failed.values()), failed
+    assert len(partial) == 100 and all(record["collaborators"] for record in partial if not record["error"])
+    fake.failing_graphql_repos = set()
+
+    out = io.StringIO()
+    for record in records:
+        out.write(json.dumps(record) + "\n")
+    assert all(json.loads(line)["repo"] for line in out.getvalue().splitlines())
+
+print("ok")
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice.batch import find_configs, generate_batch
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+with tempfile.TemporaryDirectory() as tmp:
+    config_dir = os.path.join(tmp, "configs")
+    os.makedirs(config_dir)
+    configs = {
+        "a_large": make_synthetic_config(services=6, tasks=120),  # Finishes last, still reported first
+        "b_restricted": {"schema": {"tasks": {"ADMIN": {"run": {"url": {}}}}}},
+        "c_small": make_synthetic_config(services=1, tasks=2),
+        "e_medium": make_synthetic_config(services=2, tasks=20),
+    }
+    for name, config in configs.items():
+        with open(os.path.join(config_dir, f"{name}.json"), "w") as f:
+            json.dump(config, f)
+    with open(os.path.join(config_dir, "d_truncated.json"), "w") as f:
+        f.write('{"settings": {')
+
+    config_paths = find_configs(config_dir)
+    output_root = os.path.join(tmp, "out")
+    results = generate_batch(config_paths, output_root, workers=4, run_post_create=False, use_format_cache=False,
+                             use_venv_cache=False, use_lock_store=False)
+
+    assert [result["config"] for result in results] == config_paths
+    by_name = {os.path.basename(result["config"])[:-len(".json")]: result for result in results}
+    assert [name for name, result in by_name.items() if result["success"]] == ["a_large", "c_small", "e_medium"]
+    assert by_name["b_restricted"]["error"].startswith("ConfigValidationError") and \
+           "ADMIN" in by_name["b_restricted"]["error"], by_name["b_restricted"]
+    assert by_name["d_truncated"]["error"].startswith("JSONDecodeError"), by_name["d_truncated"]
+
+    for name in ("a_large", "c_small", "e_medium"):
+        result = by_name[name]
+        assert result["error"] is None and result["output_dir"] == os.path.join(output_root, name)
+        assert os.path.isfile(os.path.join(result["output_dir"], "pyproject.toml"))
+        assert result["metrics"]["files"] > 0 and result["duration"] > 0
+    assert not os.path.exists(os.path.join(output_root, "b_restricted"))
+    assert not os.path.exists(os.path.join(output_root, "d_truncated"))
+
+print("ok")
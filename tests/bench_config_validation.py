@@ -0,0 +1,22 @@
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import validate_config
+from matrx_dream_service.matrx_microservice.config_validator import get_config_validator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+
+start = time.perf_counter()
+get_config_validator()
+print(f"validator build: {(time.perf_counter() - start) * 1000:.2f}ms (once per process)")
+
+for services, tasks in [(10, 1000), (100, 10000), (200, 50000)]:
+    config = make_synthetic_config(services, tasks)
+    runs = 5
+    start = time.perf_counter()
+    for _ in range(runs):
+        errors = validate_config(config)
+    elapsed = (time.perf_counter() - start) / runs
+    assert not errors, errors[:5]
+    print(f"{tasks:>7} tasks: {elapsed * 1000:8.2f}ms per validation")
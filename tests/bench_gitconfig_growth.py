@@ -0,0 +1,102 @@
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from matrx_dream_service.matrx_microservice.git_config import prune_safe_directories, safe_directories
+from matrx_dream_service.matrx_microservice.git_writer import commit_directory
+
+GENERATIONS = 1000
+CHECKPOINT = 250
+LEGACY_ENTRIES = 5000
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def git_latency(repo: str, runs: int = 40) -> float:
+    """Median wall time of a git command that does little more than read its config, in ms"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        git("-C", repo, "rev-parse", "--git-dir")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def generate_and_push(root: str, i: int):
+    """What a generation does to git: in-process commit, then a push with safe.directory scoped to the command"""
+    project = os.path.join(root, f"project_{i}")
+    os.makedirs(project)
+    with open(os.path.join(project, "run.py"), "w") as f:
+        f.write(f"print({i})\n")
+    bare = os.path.join(root, f"remote_{i}.git")
+    git("init", "--bare", "-q", bare)
+    commit_directory(project, "Initial commit", "matrx-bot", "bot@example.com", branches=("main", "dev"),
+                     remote_url=bare)
+    safe_path = os.path.normpath(project).replace('\\', '/')
+    git("-c", f"safe.directory={safe_path}", "-C", project, "push", "-q", "origin", "main", "dev")
+    # Generated directories are temporary, like the ones push_code_to_repo cleans up
+    shutil.rmtree(project)
+    shutil.rmtree(bare)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    gitconfig = os.path.join(tmp, "gitconfig")
+    os.environ["GIT_CONFIG_GLOBAL"] = gitconfig
+    probe = os.path.join(tmp, "probe")
+    git("init", "-q", probe)
+
+    latencies = [git_latency(probe)]
+    print(f"{0:>6} generations: git {latencies[0]:.2f}ms")
+    for i in range(1, GENERATIONS + 1):
+        generate_and_push(tmp, i)
+        if i % CHECKPOINT == 0:
+            latencies.append(git_latency(probe))
+            print(f"{i:>6} generations: git {latencies[-1]:.2f}ms")
+    assert not os.path.exists(gitconfig) and not safe_directories(), "a generation wrote the global gitconfig"
+    assert max(latencies) < min(latencies) * 1.5 + 2, latencies
+
+    # What older versions left behind: one global entry per generation, most of them long deleted
+    kept = os.path.join(tmp, "still_here")
+    os.makedirs(kept)
+    with open(gitconfig, "w") as f:
+        f.write("[user]\n\tname = Someone\n[safe]\n")
+        for i in range(LEGACY_ENTRIES):
+            f.write(f"\tdirectory = {tmp}/temp/{i:08x}\n")
+        f.write(f"\tdirectory = {kept}\n\tdirectory = {kept}\n\tdirectory = *\n")
+    legacy = git_latency(probe)
+    assert prune_safe_directories(dry_run=True) == {'total': LEGACY_ENTRIES + 3, 'kept': 2,
+                                                   'removed': LEGACY_ENTRIES + 1}
+
+    # A concurrent git config write holds the lock: nothing is touched, the caller sees the conflict
+    with open(gitconfig) as f:
+        before = f.read()
+    open(gitconfig + ".lock", "w").close()
+    try:
+        prune_safe_directories()
+        raise AssertionError("pruned while another writer held the config lock")
+    except FileExistsError:
+        pass
+    os.unlink(gitconfig + ".lock")
+    with open(gitconfig) as f:
+        assert f.read() == before
+
+    inode = os.stat(gitconfig).st_ino
+    start = time.perf_counter()
+    summary = prune_safe_directories()
+    pruned_in = time.perf_counter() - start
+    assert safe_directories() == [kept, "*"], safe_directories()
+    # Written to the lock file and renamed over the config in one step, other settings kept
+    assert os.stat(gitconfig).st_ino != inode and not os.path.exists(gitconfig + ".lock")
+    assert subprocess.run(["git", "config", "--global", "user.name"], capture_output=True,
+                          text=True).stdout.strip() == "Someone"
+    pruned = git_latency(probe)
+    print(f"{LEGACY_ENTRIES} legacy entries: git {legacy:.2f}ms, after pruning {summary['removed']} in "
+          f"{pruned_in:.2f}s: git {pruned:.2f}ms")
+    assert pruned < legacy
+
+print("ok")
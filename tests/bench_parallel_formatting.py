@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+from matrx_dream_service.matrx_microservice import formatting
+from matrx_dream_service.matrx_microservice.formatting import POOL_MIN_FILES, format_sources
+
+with tempfile.TemporaryDirectory() as tmp:
+    config_path = os.path.join(tmp, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(make_synthetic_config(services=60, tasks=1500), f)
+
+    generator = MicroserviceGenerator(config_path=config_path, output_dir=os.path.join(tmp, "out"),
+                                      use_lock_store=False)
+    generator._render_sources()  # render without formatting
+    sources = {path: generator.files.read(path) for path in generator.files.paths(".py")}
+
+print(f"{len(sources)} files, {sum(len(code) for code in sources.values()) // 1024} KiB of python")
+
+serial = None
+workers = 1
+while True:
+    start = time.perf_counter()
+    formatted = format_sources(sources, workers=workers)
+    elapsed = time.perf_counter() - start
+    if serial is None:
+        serial = formatted, elapsed
+    assert formatted == serial[0], f"output with {workers} workers differs from serial output"
+    print(f"workers={workers:<3} {elapsed:7.2f}s  speedup x{serial[1] / elapsed:.2f}")
+    if workers >= (os.cpu_count() or 1):
+        break
+    workers = min(workers * 2, os.cpu_count() or 1)
+
+# The pool outlives the calls: asking for as many workers again reuses it, a handful of files skips it
+pool = formatting._pool
+stats = {}
+assert format_sources(sources, workers=workers, stats=stats) == serial[0] and formatting._pool is pool
+assert stats["worker_cpu"] > 0 or workers == 1
+few = dict(list(sources.items())[:POOL_MIN_FILES - 1])
+format_sources(few, workers=workers, use_pool=True, stats=stats)
+assert stats["worker_cpu"] == 0.0 and formatting._pool is pool
+
+print("ok")
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.collaborators import RateLimiter, add_collaborators_concurrently, \
+    remove_collaborators_concurrently
+
+team = [{"username": f"dev{i}", "permission": {"push": True}} for i in range(40)]
+access = team + [{"username": "lead", "permission": {"admin": True, "push": True}},
+                 {"username": "observer", "permission": {}},  # no permission, skipped
+                 {"permission": {"pull": True}}]  # no username, failed
+
+# Each call takes 250ms, more than 6 in flight get a secondary rate limit with retry-after: 1
+with FakeGitHub(org="acme", repos=["service"], latency=0.25, max_concurrent=6) as fake:
+    client = GitHub("token", base_url=fake.url, http_cache=False, auto_retry=False)
+    limiter = RateLimiter(workers=8)
+
+    start = time.perf_counter()
+    result = asyncio.run(add_collaborators_concurrently(client, "acme", "service", access,
+                                                        limiter=limiter))
+    elapsed = time.perf_counter() - start
+    print(f"added 41 collaborators in {elapsed:.2f}s (serial would be ~10.3s), "
+          f"{fake.rate_limited} rate limited responses, {limiter.backoffs} backoffs, "
+          f"peak {fake.peak_in_flight} in flight")
+    assert result == {"success": [entry["username"] for entry in team] + ["lead"], "failed": [None]}, result
+    assert fake.collaborators["service"]["lead"] == "admin"
+    assert "observer" not in fake.collaborators["service"]
+    assert fake.peak_in_flight <= 8
+
+    result = asyncio.run(remove_collaborators_concurrently(client, "acme", "service",
+                                                           [f"dev{i}" for i in range(40)], workers=6))
+    assert result["failed"] == [] and len(result["success"]) == 40, result
+    assert list(fake.collaborators["service"]) == ["lead"]
+
+    # Non rate-limit errors are reported per user without retries
+    fake.max_concurrent = None
+    result = asyncio.run(remove_collaborators_concurrently(client, "acme", "missing_repo", ["lead"]))
+    assert result == {"success": [], "failed": ["lead"]}, result
+
+print("ok")
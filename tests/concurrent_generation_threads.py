@@ -0,0 +1,78 @@
+import copy
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+from matrx_dream_service.matrx_microservice.default_template import default_config
+
+GENERATIONS = 8
+# Skipped in the byte comparison, they differ per run by design
+VOLATILE = {"post_create.log", "cwd.txt"}
+
+
+def config_for(i: int) -> dict:
+    config = make_synthetic_config(services=1 + i % 4, tasks=3 + i)
+    config["settings"]["app_name"] = f"service_{i}"
+    config["dependencies"] = [f"extra-package-{i}"]
+    # Records the cwd the scripts actually ran in
+    config["post_create_scripts"] = [f'{sys.executable} -c "import os; open(\'cwd.txt\', \'w\').write(os.getcwd())"']
+    return config
+
+
+def generate(i: int, root: str) -> str:
+    output_dir = os.path.join(root, f"project_{i}")
+    generator = MicroserviceGenerator(config=config_for(i), output_dir=output_dir, use_format_cache=False,
+                                      use_venv_cache=False, use_lock_store=False)
+    # Defaults are copied per instance, nothing written here reaches default_config or other generators
+    assert not [key for key, value in default_config.items() if generator.config[key] is value]
+    generator.config["settings"]["mutated_by"] = i
+    generator.config["dependencies"].append(f"mutated-{i}")
+    generator.generate_microservice()
+    return output_dir
+
+
+def snapshot(output_dir: str) -> dict:
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(output_dir):
+        dirnames[:] = [name for name in dirnames if name != ".git"]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name not in VOLATILE:
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, output_dir)] = f.read()
+    return files
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    # git must not touch the global config from any thread
+    global_gitconfig = os.path.join(tmp, "gitconfig")
+    os.environ["GIT_CONFIG_GLOBAL"] = global_gitconfig
+    defaults = copy.deepcopy(default_config)
+    cwd = os.getcwd()
+
+    serial = {i: snapshot(generate(i, os.path.join(tmp, "serial"))) for i in range(GENERATIONS)}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outputs = list(pool.map(lambda i: generate(i, os.path.join(tmp, "threads")), range(GENERATIONS)))
+
+    for i, output_dir in enumerate(outputs):
+        files = snapshot(output_dir)
+        assert files == serial[i], f"project {i} differs from its serial generation: " + \
+            str(sorted(set(files.items()) ^ set(serial[i].items()))[:3])
+        with open(os.path.join(output_dir, "cwd.txt")) as f:
+            assert f.read() == os.path.realpath(output_dir)
+        pyproject = files["pyproject.toml"].decode()
+        assert f'name = "service_{i}"' in pyproject and f'"extra-package-{i}"' in pyproject
+        assert not [j for j in range(GENERATIONS) if j != i and f'"extra-package-{j}"' in pyproject]
+        assert os.path.isdir(os.path.join(output_dir, ".git"))
+
+    assert os.getcwd() == cwd
+    assert default_config == defaults, "a generation mutated default_config"
+    assert not os.path.exists(global_gitconfig)
+    print(f"{GENERATIONS} concurrent generations isolated")
+
+print("ok")
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+load_dotenv()
+
+tmp = tempfile.TemporaryDirectory()
+# Everything below talks to the fake server, never to a real org; generated repos go under BASE_DIR/temp
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme", GITHUB_BOT_ACCOUNT_USERNAME="matrx-bot",
+                  GITHUB_BOT_EMAIL="bot@example.com", BASE_DIR=tmp.name,
+                  GIT_CONFIG_GLOBAL=os.path.join(tmp.name, "gitconfig"))
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator, github_utils
+from matrx_dream_service.matrx_microservice.api_trace import tracing_github
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+GENERATIONS = 8
+
+
+def generate(i: int) -> tuple:
+    access = [{"username": f"gen{i}_dev{j}", "permission": {"push": True}} for j in range(3)]
+    generator = MicroserviceGenerator(config=make_synthetic_config(services=1 + i % 3, tasks=5 + i),
+                                      create_github_repo=True, github_project_name=f"service {i % 4}",
+                                      github_access=access, github_push_mode="api",
+                                      pipeline_repo_creation=bool(i % 2), use_format_cache=False,
+                                      use_venv_cache=False, use_lock_store=False)
+    return generator.generate_microservice(), access, generator
+
+
+# Two generations per project name, half of them pipelined, all on the shared GitHub clients at once
+with FakeGitHub(org="acme", latency=0.05) as fake:
+    github_utils._github_clients.update({
+        auto_retry: tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=auto_retry)
+        for auto_retry in (True, False)})
+    cwd = os.getcwd()
+
+    with ThreadPoolExecutor(max_workers=GENERATIONS) as pool:
+        futures = [pool.submit(generate, i) for i in range(GENERATIONS)]
+        outputs = [future.result(timeout=120) for future in futures]
+
+    repo_names = [result["repo_name"] for result, _, _ in outputs]
+    assert len(set(repo_names)) == GENERATIONS, repo_names
+    assert sorted(fake.repos) == sorted(repo_names)
+    for i, (result, access, generator) in enumerate(outputs):
+        repo = result["repo_name"]
+        assert repo.startswith(f"service_{i % 4}_") and result["repo_id"] == fake.repos[repo]["id"]
+        refs = fake.refs[repo]
+        assert refs["refs/heads/main"] and refs["refs/heads/main"] == refs["refs/heads/dev"], refs
+        assert sorted(fake.collaborators[repo]) == sorted(entry["username"] for entry in access)
+        # Each generation's trace holds its own repo's requests, next to the org-wide name lookups
+        paths = {span["path"] for span in result["api_trace"]["spans"]}
+        assert not [path for path in paths if path.startswith("/repos/acme/") and
+                    path.split("/")[3] != repo], (repo, sorted(paths))
+        assert any(path.startswith(f"/repos/acme/{repo}/") for path in paths)
+        stages = [stage["stage"] for stage in generator.metrics.report()["stages"]]
+        assert ("push_repo" in stages) == bool(i % 2), stages
+
+    assert os.getcwd() == cwd
+    assert not os.path.exists(os.environ["GIT_CONFIG_GLOBAL"])
+    print(f"{GENERATIONS} concurrent generations created {GENERATIONS} repos")
+
+tmp.cleanup()
+print("ok")
@@ -0,0 +1,67 @@
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import validate_config
+from matrx_dream_service.matrx_microservice.config_validator import ConfigValidationError, get_config_validator
+
+
+def tasks(service_tasks: dict) -> dict:
+    return {"schema": {"tasks": service_tasks}}
+
+
+VALID_TASK = {"url": {"type": "string"}}
+
+# One invalid config per error code, with the JSON path the error must point at
+CASES = [
+    ("restricted_env_var", {"env": {"PATH": "/bin"}}, "$.env.PATH"),
+    ("restricted_definition_name", {"schema": {"definitions": {"MIC_CHECK": {}}}}, "$.schema.definitions.MIC_CHECK"),
+    ("invalid_definition", {"schema": {"definitions": {"page": ["url"]}}}, "$.schema.definitions.page"),
+    ("restricted_field_name", {"schema": {"definitions": {"page": {"stream_handler": {}}}}},
+     "$.schema.definitions.page.stream_handler"),
+    ("invalid_field_name", {"schema": {"definitions": {"page": {"page-url": {}}}}},
+     '$.schema.definitions.page["page-url"]'),
+    ("restricted_service_name", tasks({"ADMIN": {"run": VALID_TASK}}), "$.schema.tasks.ADMIN"),
+    ("invalid_service_name", tasks({"2fast": {"run": VALID_TASK}}), '$.schema.tasks["2fast"]'),
+    ("duplicate_service_class", tasks({"SCRAPER": {"run": VALID_TASK}, "SCRAPER_SERVICE": {"run": VALID_TASK}}),
+     "$.schema.tasks.SCRAPER_SERVICE"),
+    ("invalid_service", tasks({"SCRAPER": ["run"]}), "$.schema.tasks.SCRAPER"),
+    ("restricted_task_name", tasks({"SCRAPER": {"MIC_CHECK": VALID_TASK}}), "$.schema.tasks.SCRAPER.MIC_CHECK"),
+    ("invalid_task_name", tasks({"SCRAPER": {"get page": VALID_TASK}}), '$.schema.tasks.SCRAPER["get page"]'),
+    ("duplicate_task_method", tasks({"SCRAPER": {"get_page": VALID_TASK, "GET_PAGE": VALID_TASK}}),
+     "$.schema.tasks.SCRAPER.GET_PAGE"),
+    ("invalid_task", tasks({"SCRAPER": {"run": "url"}}), "$.schema.tasks.SCRAPER.run"),
+    ("dangling_ref", tasks({"SCRAPER": {"run": {"$ref": "definitions/missing"}}}),
+     '$.schema.tasks.SCRAPER.run["$ref"]'),
+    ("restricted_field_name", tasks({"SCRAPER": {"run": {"stream_handler": {}}}}),
+     "$.schema.tasks.SCRAPER.run.stream_handler"),
+    ("invalid_post_create_script", {"post_create_scripts": ["uv sync", {"timeout": 5}]}, "$.post_create_scripts[1]"),
+    ("invalid_post_create_script", {"post_create_scripts": [["uv", "sync"]]}, "$.post_create_scripts[0]"),
+    ("invalid_post_create_timeout", {"post_create_scripts": [{"command": "uv sync", "timeout": 0}]},
+     "$.post_create_scripts[0].timeout"),
+    ("invalid_post_create_timeout", {"post_create_scripts": [{"command": "uv sync", "timeout": "1m"}]},
+     "$.post_create_scripts[0].timeout"),
+]
+
+for code, config, path in CASES:
+    errors = validate_config(config)
+    assert [(error["code"], error["path"]) for error in errors] == [(code, path)], (code, errors)
+    assert errors[0]["message"]
+
+# Valid shapes produce nothing
+assert validate_config({
+    "env": {"API_KEY": "x"},
+    "schema": {"definitions": {"page": {"url": {}}},
+               "tasks": {"SCRAPER": {"get_page": {"$ref": "#/definitions/page"}, "run": VALID_TASK}}},
+    "post_create_scripts": ["uv sync", {"command": "uv run lint.py", "timeout": 30, "independent": True}],
+}) == []
+
+# Every error of a config is reported at once, in document order
+errors = validate_config({"env": {"HOME": "/"}, **tasks({"SCRAPER": {"MIC_CHECK": VALID_TASK, "run": "url"}})})
+assert [error["code"] for error in errors] == ["restricted_env_var", "restricted_task_name", "invalid_task"]
+try:
+    get_config_validator().check({"env": {"HOME": "/"}})
+    raise AssertionError("check() accepted an invalid config")
+except ConfigValidationError as e:
+    assert e.errors == validate_config({"env": {"HOME": "/"}}) and "HOME" in str(e)
+
+print(f"{len(CASES)} invalid configs rejected with the expected code and path")
+print("ok")
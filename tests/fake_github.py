@@ -0,0 +1,413 @@
+"""
+Minimal in-process fake of the GitHub REST API for exercising github_utils without the network.
+
+Only the endpoints the package calls are implemented. State lives on the FakeGitHub instance and every
+request is recorded in `calls` as (method, path) so scripts can assert on round trips. Set `max_concurrent`
+to answer requests beyond that many in flight with a secondary rate limit (403 + retry-after).
+
+    with FakeGitHub(org="acme", repos=["existing"]) as fake:
+        client = GitHub("token", base_url=fake.url, http_cache=False)
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _repo_payload(org: str, name: str, repo_id: int, private: bool = True) -> dict:
+    return {
+        "id": repo_id,
+        "node_id": f"R_{repo_id}",
+        "name": name,
+        "full_name": f"{org}/{name}",
+        "private": private,
+        "html_url": f"https://github.com/{org}/{name}",
+        "url": f"https://api.github.com/repos/{org}/{name}",
+    }
+
+
+def _git_object(kind: str, data: bytes) -> str:
+    return hashlib.sha1(f"{kind} {len(data)}\0".encode("ascii") + data).hexdigest()
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 256  # The default backlog of 5 resets connections when many clients connect at once
+
+
+class FakeGitHub:
+    def __init__(self, org: str = "acme", repos: list = None, latency: float = 0.0, max_concurrent: int = None):
+        self.org = org
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rate_limited = 0
+        self.rate_limit_remaining = 5000
+        self.failing_graphql_repos = set()  # Aliased repository queries naming one of these answer 502
+        self.repos = {}
+        self.collaborators = {}
+        self.invitations = {}
+        self.objects = {}  # repo -> {sha: (kind, content)}
+        self.refs = {}  # repo -> {"refs/heads/main": sha}
+        self.calls = []
+        self.lock = threading.Lock()
+        self._next_id = 1
+        for name in repos or []:
+            self.add_repo(name)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_repo(self, name: str, private: bool = True) -> dict:
+        with self.lock:
+            repo = _repo_payload(self.org, name, self._next_id, private)
+            self._next_id += 1
+            self.repos[name.lower()] = repo
+            self.collaborators[name.lower()] = {}
+            self.invitations[name.lower()] = {}
+            self.objects[name.lower()] = {}
+            self.refs[name.lower()] = {}
+            return repo
+
+    def auto_init(self, repo: str) -> str:
+        """Give a repo the README commit on main that GitHub's auto_init creates"""
+        blob = self.store_object(repo, "blob", f"# {repo}\n".encode("utf-8"))
+        tree = self.store_object(repo, "tree", b"100644 README.md\0" + bytes.fromhex(blob))
+        commit = self.store_object(repo, "commit", f"tree {tree}\n\nInitial commit\n".encode("utf-8"))
+        self.refs[repo.lower()]["refs/heads/main"] = commit
+        return commit
+
+    def store_object(self, repo: str, kind: str, data: bytes) -> str:
+        sha = _git_object(kind, data)
+        with self.lock:
+            self.objects[repo.lower()][sha] = (kind, data)
+        return sha
+
+    def tree_paths(self, repo: str, tree: str, prefix: str = "") -> dict:
+        """{path: (mode, blob content)} of every file below a stored tree"""
+        objects = self.objects[repo.lower()]
+        data = objects[tree][1]
+        paths = {}
+        while data:
+            header, data = data.split(b"\0", 1)
+            sha, data = data[:20].hex(), data[20:]
+            mode, name = header.decode("utf-8").split(" ", 1)
+            if mode == "40000":
+                paths.update(self.tree_paths(repo, sha, prefix + name + "/"))
+            else:
+                paths[prefix + name] = (mode, objects[sha][1])
+        return paths
+
+    def add_invitation(self, repo: str, login: str, permissions: str = "write") -> int:
+        with self.lock:
+            invitation_id = self._next_id
+            self._next_id += 1
+            self.invitations[repo.lower()][invitation_id] = {"login": login, "permissions": permissions}
+            return invitation_id
+
+    def add_collaborator(self, repo: str, login: str, permission: str = "push"):
+        with self.lock:
+            self.collaborators[repo.lower()][login] = permission
+
+    def count(self, method: str = None, pattern: str = None) -> int:
+        """Recorded calls matching method and a regex on the path"""
+        return sum(1 for m, path in self.calls
+                   if (method is None or m == method) and (pattern is None or re.search(pattern, path)))
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", 0), _make_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Routes return (status, payload, headers)
+
+    def list_org_repos(self, query: dict, body: dict):
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        repos = sorted(self.repos.values(), key=lambda repo: repo["id"])
+        return 200, repos[(page - 1) * per_page:page * per_page], {}
+
+    def get_repo(self, query: dict, body: dict, repo: str):
+        found = self.repos.get(repo.lower())
+        if not found:
+            return 404, {"message": "Not Found"}, {}
+        return 200, found, {}
+
+    def create_repo(self, query: dict, body: dict):
+        if body["name"].lower() in self.repos:
+            return 422, {"message": "Repository creation failed.",
+                         "errors": [{"field": "name", "message": "name already exists on this account"}]}, {}
+        repo = self.add_repo(body["name"], body.get("private", True))
+        if body.get("auto_init"):
+            self.auto_init(body["name"])
+        return 201, repo, {}
+
+    def delete_repo(self, query: dict, body: dict, repo: str):
+        with self.lock:
+            self.repos.pop(repo.lower(), None)
+        return 204, None, {}
+
+    def list_collaborators(self, query: dict, body: dict, repo: str):
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        roles = ["pull", "triage", "push", "maintain", "admin"]
+        collaborators = sorted(self.collaborators.get(repo.lower(), {}).items())
+        payload = [{
+            "login": login,
+            "id": index,
+            "type": "User",
+            "role_name": {"pull": "read", "push": "write"}.get(permission, permission),
+            "permissions": {role: roles.index(role) <= roles.index(permission) for role in roles},
+        } for index, (login, permission) in enumerate(collaborators, start=1)]
+        return 200, payload[(page - 1) * per_page:page * per_page], {}
+
+    def put_collaborator(self, query: dict, body: dict, repo: str, login: str):
+        if repo.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        existing = self.collaborators[repo.lower()].get(login)
+        self.add_collaborator(repo, login, (body or {}).get("permission", "push"))
+        if existing:
+            return 204, None, {}
+        return 201, {"id": len(self.calls), "permissions": body.get("permission", "push")}, {}
+
+    def delete_collaborator(self, query: dict, body: dict, repo: str, login: str):
+        if repo.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        with self.lock:
+            self.collaborators[repo.lower()].pop(login, None)
+        return 204, None, {}
+
+    def list_invitations(self, query: dict, body: dict, repo: str):
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        payload = [{"id": invitation_id, "invitee": {"login": invitation["login"]},
+                    "permissions": invitation["permissions"]}
+                   for invitation_id, invitation in sorted(self.invitations.get(repo.lower(), {}).items())]
+        return 200, payload[(page - 1) * per_page:page * per_page], {}
+
+    def update_invitation(self, query: dict, body: dict, repo: str, invitation_id: str):
+        invitation = self.invitations.get(repo.lower(), {}).get(int(invitation_id))
+        if not invitation:
+            return 404, {"message": "Not Found"}, {}
+        invitation["permissions"] = body["permissions"]
+        return 200, {"id": int(invitation_id), "permissions": body["permissions"]}, {}
+
+    def delete_invitation(self, query: dict, body: dict, repo: str, invitation_id: str):
+        with self.lock:
+            self.invitations.get(repo.lower(), {}).pop(int(invitation_id), None)
+        return 204, None, {}
+
+    def _git_repo(self, repo: str):
+        """Error response for Git Data writes GitHub refuses: unknown or empty repositories"""
+        if repo.lower() not in self.repos:
+            return 404, {"message": "Not Found"}, {}
+        if not self.refs[repo.lower()]:
+            return 409, {"message": "Git Repository is empty."}, {}
+        return None
+
+    def create_blob(self, query: dict, body: dict, repo: str):
+        error = self._git_repo(repo)
+        if error:
+            return error
+        if body.get("encoding") == "base64":
+            content = base64.b64decode(body["content"])
+        else:
+            content = body["content"].encode("utf-8")
+        return 201, {"sha": self.store_object(repo, "blob", content), "url": ""}, {}
+
+    def create_tree(self, query: dict, body: dict, repo: str):
+        error = self._git_repo(repo)
+        if error:
+            return error
+        objects = self.objects[repo.lower()]
+        root = {}
+        for entry in body["tree"]:
+            if entry["sha"] not in objects:
+                return 422, {"message": f"Invalid tree info: {entry['sha']} not found"}, {}
+            *dirs, name = entry["path"].split("/")
+            node = root
+            for d in dirs:
+                node = node.setdefault(d, {})
+            node[name] = (entry["mode"], entry["sha"])
+
+        def write(node: dict) -> str:
+            # Git orders entries by name with directories compared as if they ended in "/"
+            items = sorted(((name + "/" if isinstance(value, dict) else name), name, value)
+                           for name, value in node.items())
+            data = b""
+            for _, name, value in items:
+                mode, sha = ("40000", write(value)) if isinstance(value, dict) else value
+                data += f"{mode} {name}".encode("utf-8") + b"\0" + bytes.fromhex(sha)
+            return self.store_object(repo, "tree", data)
+
+        return 201, {"sha": write(root), "url": "", "tree": [], "truncated": False}, {}
+
+    def create_commit(self, query: dict, body: dict, repo: str):
+        error = self._git_repo(repo)
+        if error:
+            return error
+        lines = [f"tree {body['tree']}"] + [f"parent {parent}" for parent in body.get("parents", [])]
+        author = body.get("author") or {"name": "fake", "email": "fake@example.com"}
+        lines += [f"author {author['name']} <{author['email']}> 0 +0000", "", body["message"]]
+        sha = self.store_object(repo, "commit", "\n".join(lines).encode("utf-8"))
+        return 201, {"sha": sha, "tree": {"sha": body["tree"]}, "message": body["message"]}, {}
+
+    def create_ref(self, query: dict, body: dict, repo: str):
+        error = self._git_repo(repo)
+        if error:
+            return error
+        refs = self.refs[repo.lower()]
+        if body["ref"] in refs:
+            return 422, {"message": "Reference already exists"}, {}
+        refs[body["ref"]] = body["sha"]
+        return 201, {"ref": body["ref"], "object": {"sha": body["sha"], "type": "commit"}}, {}
+
+    def update_ref(self, query: dict, body: dict, repo: str, ref: str):
+        error = self._git_repo(repo)
+        if error:
+            return error
+        refs = self.refs[repo.lower()]
+        if f"refs/{ref}" not in refs:
+            return 422, {"message": "Reference does not exist"}, {}
+        refs[f"refs/{ref}"] = body["sha"]
+        return 200, {"ref": f"refs/{ref}", "object": {"sha": body["sha"], "type": "commit"}}, {}
+
+    def graphql(self, query: dict, body: dict):
+        """Answers the two query shapes of the audit module: the org repo listing and aliased repositories"""
+        text, variables = body["query"], body.get("variables") or {}
+        if "organization(login:" in text:
+            first = int(re.search(r"repositories\(first: (\d+)", text).group(1))
+            offset = int(variables.get("after") or 0)
+            names = sorted(repo["name"] for repo in self.repos.values())
+            page = names[offset:offset + first]
+            return 200, {"data": {"organization": {"repositories": {
+                "pageInfo": {"hasNextPage": offset + first < len(names), "endCursor": str(offset + first)},
+                "nodes": [{"name": name} for name in page]}}}}, {}
+
+        if self.failing_graphql_repos & {name.lower() for name in variables.values() if isinstance(name, str)}:
+            return 502, {"message": "Server Error"}, {}
+        first = int(re.search(r"collaborators\(first: (\d+)", text).group(1))
+        roles = {"pull": "READ", "triage": "TRIAGE", "push": "WRITE", "maintain": "MAINTAIN", "admin": "ADMIN"}
+        data, errors = {}, []
+        for key, name in variables.items():
+            if not re.fullmatch(r"n\d+", key):
+                continue
+            alias = f"r{key[1:]}"
+            if name.lower() not in self.repos:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias],
+                               "message": f"Could not resolve to a Repository with the name '{name}'."})
+                continue
+            offset = int(variables.get(f"a{key[1:]}") or 0)
+            collaborators = sorted(self.collaborators[name.lower()].items())
+            page = collaborators[offset:offset + first]
+            data[alias] = {"collaborators": {
+                "pageInfo": {"hasNextPage": offset + first < len(collaborators), "endCursor": str(offset + first)},
+                "edges": [{"permission": roles[permission], "node": {"login": login}} for login, permission in page]}}
+        return 200, {"data": data, **({"errors": errors} if errors else {})}, {}
+
+    def routes(self) -> list:
+        org = re.escape(self.org)
+        return [
+            ("POST", r"/graphql", self.graphql),
+            ("POST", rf"/repos/{org}/([^/]+)/git/blobs", self.create_blob),
+            ("POST", rf"/repos/{org}/([^/]+)/git/trees", self.create_tree),
+            ("POST", rf"/repos/{org}/([^/]+)/git/commits", self.create_commit),
+            ("POST", rf"/repos/{org}/([^/]+)/git/refs", self.create_ref),
+            ("PATCH", rf"/repos/{org}/([^/]+)/git/refs/(.+)", self.update_ref),
+            ("GET", rf"/repos/{org}/([^/]+)/invitations", self.list_invitations),
+            ("PATCH", rf"/repos/{org}/([^/]+)/invitations/(\d+)", self.update_invitation),
+            ("DELETE", rf"/repos/{org}/([^/]+)/invitations/(\d+)", self.delete_invitation),
+            ("GET", rf"/repos/{org}/([^/]+)/collaborators", self.list_collaborators),
+            ("PUT", rf"/repos/{org}/([^/]+)/collaborators/([^/]+)", self.put_collaborator),
+            ("DELETE", rf"/repos/{org}/([^/]+)/collaborators/([^/]+)", self.delete_collaborator),
+            ("GET", rf"/orgs/{org}/repos", self.list_org_repos),
+            ("POST", rf"/orgs/{org}/repos", self.create_repo),
+            ("GET", rf"/repos/{org}/([^/]+)", self.get_repo),
+            ("DELETE", rf"/repos/{org}/([^/]+)", self.delete_repo),
+        ]
+
+
+def _make_handler(fake: FakeGitHub):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _dispatch(self, method: str):
+            parsed = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"null") if length else {}
+            with fake.lock:
+                fake.calls.append((method, parsed.path))
+                fake.in_flight += 1
+                fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                limited = fake.max_concurrent is not None and fake.in_flight > fake.max_concurrent
+                fake.rate_limit_remaining = max(0, fake.rate_limit_remaining - 1)
+                remaining = fake.rate_limit_remaining
+            try:
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if limited:
+                    fake.rate_limited += 1
+                    status, payload, headers = 403, {"message": "You have exceeded a secondary rate limit."}, {
+                        "retry-after": "1"}
+                else:
+                    for route_method, pattern, handler in fake.routes():
+                        match = re.fullmatch(pattern, parsed.path)
+                        if route_method == method and match:
+                            status, payload, headers = handler(query, body, *match.groups())
+                            break
+                    else:
+                        status, payload, headers = 404, {"message": f"No fake route for {method} {parsed.path}"}, {}
+            finally:
+                with fake.lock:
+                    fake.in_flight -= 1
+            headers = {"x-ratelimit-limit": "5000", "x-ratelimit-remaining": str(remaining),
+                       "x-ratelimit-reset": str(int(time.time()) + 3600), **headers}
+
+            data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
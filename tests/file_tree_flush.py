@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+from matrx_dream_service.matrx_microservice import file_tree
+from matrx_dream_service.matrx_microservice.file_tree import VirtualFileTree
+
+
+def read_tree(root: str) -> dict:
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return files
+
+
+def existing_project(root: str) -> str:
+    project = os.path.join(root, "project")
+    os.makedirs(os.path.join(project, ".venv", "bin"))
+    for path, content in {"run.py": "old\n", "notes.txt": "keep me\n", ".venv/bin/python": "interpreter"}.items():
+        with open(os.path.join(project, path), "w") as f:
+            f.write(content)
+    return project
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    # Missing target: the staged tree is renamed into place
+    tree = VirtualFileTree()
+    tree.write("run.py", "new\n")
+    tree.write("core/app.py", "app = 1\n")
+    tree.flush(os.path.join(tmp, "fresh"))
+    assert read_tree(os.path.join(tmp, "fresh")) == {"run.py": "new\n", "core/app.py": "app = 1\n"}
+
+    # Non-empty target: generated files replace old ones, everything else survives the swap
+    project = existing_project(tmp)
+    tree.flush(project)
+    assert read_tree(project) == {"run.py": "new\n", "core/app.py": "app = 1\n", "notes.txt": "keep me\n",
+                                  ".venv/bin/python": "interpreter"}
+    assert sorted(os.listdir(tmp)) == ["fresh", "project"], os.listdir(tmp)
+
+    # A failing render leaves the target untouched
+    broken = VirtualFileTree()
+    broken.write("run.py", "broken\n")
+    broken.write("run.py/inner.py", "a file can't be a directory\n")
+    try:
+        broken.flush(project)
+        raise AssertionError("flush of a conflicting tree succeeded")
+    except OSError:
+        pass
+    assert read_tree(project)["run.py"] == "new\n" and sorted(os.listdir(tmp)) == ["fresh", "project"]
+
+    # So does a failing swap, the previous directory is moved back
+    rename = os.rename
+
+    def failing_rename(src, dst):
+        if ".staging-" in str(src):
+            raise OSError("rename failed")
+        return rename(src, dst)
+
+    file_tree.os.rename = failing_rename
+    try:
+        tree.write("run.py", "newer\n")
+        tree.flush(project)
+        raise AssertionError("flush with a failing swap succeeded")
+    except OSError:
+        pass
+    finally:
+        file_tree.os.rename = rename
+    assert read_tree(project)["run.py"] == "new\n" and sorted(os.listdir(tmp)) == ["fresh", "project"]
+
+print("ok")
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+
+import black
+
+from matrx_dream_service.matrx_microservice import content_store
+from matrx_dream_service.matrx_microservice.format_cache import FormatCache
+from matrx_dream_service.matrx_microservice.formatting import format_sources, get_black_mode
+
+SOURCE = "x = {  'a':1 }\n"
+FORMATTED = 'x = {"a": 1}\n'
+
+with tempfile.TemporaryDirectory() as tmp:
+    cache = FormatCache(tmp)
+
+    # Miss, then hit with the same output black produced
+    assert cache.get(SOURCE) is None and cache.misses == 1
+    assert format_sources({"a.py": SOURCE}, cache=cache) == {"a.py": FORMATTED}
+    assert cache.get(SOURCE) == FORMATTED and cache.hits == 1
+    assert FormatCache(tmp).get(SOURCE) == FORMATTED  # Shared between instances through the directory
+
+    # Another mode or black version never reads this entry
+    other_mode = black.FileMode(target_versions=get_black_mode().target_versions, line_length=120)
+    assert FormatCache(tmp, mode=other_mode).key(SOURCE) != cache.key(SOURCE)
+    assert FormatCache(tmp, mode=other_mode).get(SOURCE) is None
+    version = black.__version__
+    black.__version__ = version + ".post1"
+    try:
+        assert FormatCache(tmp).get(SOURCE) is None
+    finally:
+        black.__version__ = version
+
+    # Damaged entries read as misses and are replaced by the next put
+    path = cache._path(cache.key(SOURCE))
+    for damage in (b"", b"not a checksum\nx = 1\n", path.read_bytes()[:-3], b"\xff\xfe" * 10):
+        path.write_bytes(damage)
+        assert cache.get(SOURCE) is None, damage
+    assert format_sources({"a.py": SOURCE}, cache=cache) == {"a.py": FORMATTED}
+    assert cache.get(SOURCE) == FORMATTED
+
+    # prune() evicts the least recently used entries first
+    sources = [f"value_{i} = {i}\n" for i in range(5)]
+    for i, source in enumerate(sources):
+        cache.put(source, source)
+        old = time.time() - 100 + i
+        os.utime(cache._path(cache.key(source)), (old, old))
+    cache.get(sources[0])  # Recently used again
+    entry_size = cache._path(cache.key(sources[4])).stat().st_size
+    cache.max_bytes = cache._path(cache.key(SOURCE)).stat().st_size + 2 * entry_size
+    assert cache.prune() == 3
+    assert [cache.get(source) is not None for source in sources] == [True, False, False, False, True]
+    assert cache.get(SOURCE) == FORMATTED
+
+    # maybe_prune() scans once, then only every PRUNE_INTERVAL puts or once the estimate passes max_bytes
+    cache = FormatCache(tmp)
+    assert cache.maybe_prune() == 0 and cache._size is not None
+    scans = []
+    prune = cache.prune
+    cache.prune = lambda: scans.append(1) or prune()
+    for i in range(content_store.PRUNE_INTERVAL - 1):
+        cache.put(f"throttled_{i} = {i}\n", f"throttled_{i} = {i}\n")
+        cache.maybe_prune()
+    assert not scans
+    cache.put("throttled = 0\n", "throttled = 0\n")
+    cache.maybe_prune()
+    assert len(scans) == 1
+    cache.max_bytes = cache._size + entry_size
+    cache.put("over_0 = 0\n", "over_0 = 0\n")
+    cache.maybe_prune()
+    assert len(scans) == 1
+    cache.put("over_1 = 1\n", "over_1 = 1\n")
+    assert cache.maybe_prune() > 0 and len(scans) == 2
+
+    # prune() also removes temporary files left behind by writers that died before renaming them
+    stale = cache.directory / "ab" / ".stale.py.dead.tmp"
+    fresh = cache.directory / "ab" / ".fresh.py.live.tmp"
+    stale.parent.mkdir(exist_ok=True)
+    for path in (stale, fresh):
+        path.write_bytes(b"partial")
+    old = time.time() - content_store.STALE_TMP_AGE - 1
+    os.utime(stale, (old, old))
+    cache.prune()
+    assert not stale.exists() and fresh.exists()
+
+print("ok")
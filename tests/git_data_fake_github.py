@@ -0,0 +1,81 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.contents import get_entrypoint_sh_content, get_gitignore_content, \
+    get_system_logger_content
+from matrx_dream_service.matrx_microservice.git_data import blob_sha, push_directory_via_api
+from matrx_dream_service.matrx_microservice.git_writer import collect_files, commit_directory
+
+AUTHOR = {"name": "matrx-bot", "email": "bot@example.com"}
+
+
+def write(root: str, path: str, content, mode: int = 0o644):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as f:
+        f.write(content.encode("utf-8") if isinstance(content, str) else content)
+    os.chmod(full, mode)
+
+
+def push(client, repo: str, path: str) -> dict:
+    return asyncio.run(push_directory_via_api(client, "acme", repo, path, "Initial commit", AUTHOR))
+
+
+with FakeGitHub(org="acme") as fake, tempfile.TemporaryDirectory() as tmp:
+    project = os.path.join(tmp, "project")
+    write(project, ".gitignore", get_gitignore_content())
+    write(project, "core/system_logger.py", get_system_logger_content())
+    write(project, "entrypoint.sh", get_entrypoint_sh_content(), 0o755)
+    write(project, "src/a/__init__.py", "")
+    write(project, "src/b/__init__.py", "")  # Same blob as src/a/__init__.py
+    write(project, "static/logo.bin", bytes(range(256)))
+    write(project, "__pycache__/run.cpython-311.pyc", b"ignored")
+
+    client = GitHub("token", base_url=fake.url, http_cache=False, auto_retry=False)
+
+    # GitHub refuses Git Data writes to repositories without a branch
+    fake.add_repo("empty")
+    try:
+        push(client, "empty", project)
+        raise AssertionError("push to an empty repo succeeded")
+    except ValueError as e:
+        assert "409" in str(e), e
+
+    fake.add_repo("service")
+    fake.auto_init("service")
+    result = push(client, "service", project)
+    files = collect_files(project)
+    unique_blobs = len({blob_sha(data) for _, _, _, data in files})
+    # One request per distinct blob, then tree, commit, main and dev
+    assert result["stats"]["requests"] == unique_blobs + 4, result
+    assert result["stats"]["blobs_reused"] == len(files) - unique_blobs == 1, result
+    assert fake.count("POST", r"/service/git/blobs$") == unique_blobs
+    refs = fake.refs["service"]
+    assert refs["refs/heads/main"] == refs["refs/heads/dev"] == result["commit"], refs
+
+    # The remote tree is the tree git itself builds from the directory
+    reference = os.path.join(tmp, "reference")
+    shutil.copytree(project, reference)
+    commit_directory(reference, "Initial commit", AUTHOR["name"], AUTHOR["email"])
+    local_tree = subprocess.check_output(["git", "-C", reference, "rev-parse", "HEAD^{tree}"]).decode().strip()
+    assert result["tree"] == local_tree, (result["tree"], local_tree)
+    remote = fake.tree_paths("service", result["tree"])
+    assert remote["entrypoint.sh"][0] == "100755" and remote["static/logo.bin"][1] == bytes(range(256))
+    assert "__pycache__/run.cpython-311.pyc" not in remote
+
+    # The same files pushed to another repo give the same tree
+    fake.add_repo("service_2")
+    fake.auto_init("service_2")
+    second = push(client, "service_2", project)
+    assert second["tree"] == result["tree"]
+    print(f"pushed {len(files)} files in {result['stats']['requests']} requests, {result['stats']['bytes']} bytes")
+
+print("ok")
@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+from matrx_dream_service.matrx_microservice.git_writer import commit_directory
+
+
+def git(*args, cwd=None) -> str:
+    return subprocess.check_output(["git", *args], cwd=cwd).decode("utf-8").strip()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    project = os.path.join(tmp, "project")
+    config_path = os.path.join(tmp, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(make_synthetic_config(services=5, tasks=40), f)
+    generator = MicroserviceGenerator(config_path=config_path, output_dir=project, run_post_create=False)
+    generator.generate_microservice()
+    # Things `git add .` must skip or keep according to the generated .gitignore
+    os.makedirs(os.path.join(project, "__pycache__"))
+    open(os.path.join(project, "__pycache__", "run.cpython-311.pyc"), "w").close()
+    os.makedirs(os.path.join(project, ".venv", "lib"))
+    open(os.path.join(project, ".venv", "lib", "site.py"), "w").close()
+    os.chmod(os.path.join(project, "entrypoint.sh"), 0o755)
+    reference = os.path.join(tmp, "reference")
+    shutil.copytree(project, reference, symlinks=True)
+
+    bare = os.path.join(tmp, "remote.git")
+    git("init", "--bare", "-q", "--initial-branch=main", bare)
+
+    start = time.perf_counter()
+    commit = commit_directory(project, "Initial commit", "matrx-bot", "bot@example.com", branches=("main", "dev"),
+                              remote_url=bare, timestamp=1700000000)
+    in_process = time.perf_counter() - start
+
+    start = time.perf_counter()
+    git("init", "-q", "--initial-branch=main", cwd=reference)
+    git("add", ".", cwd=reference)
+    git("-c", "user.name=matrx-bot", "-c", "user.email=bot@example.com", "commit", "-q", "-m", "Initial commit",
+        cwd=reference)
+    cli = time.perf_counter() - start
+    print(f"in-process commit {in_process * 1000:.1f}ms, git CLI {cli * 1000:.1f}ms")
+
+    # Same tree as git itself, a clean working tree and a valid object database
+    assert git("rev-parse", "HEAD^{tree}", cwd=project) == git("rev-parse", "HEAD^{tree}", cwd=reference)
+    assert git("status", "--porcelain", cwd=project) == ""
+    git("fsck", "--strict", "--no-dangling", cwd=project)
+    assert git("rev-parse", "dev", cwd=project) == commit
+    assert "100755 blob" in git("ls-tree", "HEAD", "entrypoint.sh", cwd=project)
+
+    # git only runs for the push, both branches in one go
+    git("-C", project, "push", "-q", "origin", "main", "dev")
+    assert git("--git-dir", bare, "rev-parse", "main") == git("--git-dir", bare, "rev-parse", "dev") == commit
+    git("--git-dir", bare, "fsck", "--strict")
+
+print("ok")
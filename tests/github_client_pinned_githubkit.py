@@ -0,0 +1,48 @@
+import asyncio
+import importlib.metadata
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+# The GitHub clients and their traces on the githubkit release uv.lock pins, which predates event hooks
+if len(sys.argv) == 1:
+    with open(os.path.join(os.path.dirname(__file__), "..", "uv.lock"), encoding="utf-8") as f:
+        lock = f.read()
+    pins = ["{}=={}".format(name, re.search(rf'name = "{name}"\nversion = "([^"]+)"', lock).group(1))
+            for name in ("githubkit", "hishel")]
+    with tempfile.TemporaryDirectory() as target:
+        subprocess.run([sys.executable, "-m", "pip", "install", "-q", "--no-deps", "--target", target, *pins],
+                       check=True)
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([target, os.environ.get("PYTHONPATH", "")])}
+        subprocess.run([sys.executable, __file__, pins[0].split("==")[1]], env=env, check=True)
+    sys.exit()
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme")
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import github_utils
+from matrx_dream_service.matrx_microservice.api_trace import trace_api_calls, tracing_github
+from matrx_dream_service.matrx_microservice.collaborators import add_collaborators_concurrently
+
+version = importlib.metadata.version("githubkit")
+assert version == sys.argv[1], version
+assert github_utils.get_github_client() is github_utils.get_github_client(), "the shared client is built once"
+
+access = [{"username": f"dev{i}", "permission": {"push": True}} for i in range(3)]
+with FakeGitHub(org="acme", repos=["service"]) as fake:
+    client = tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=False)
+    with trace_api_calls() as trace:
+        response = client.rest.repos.add_collaborator("acme", "service", "dev0", data={"permission": "push"})
+        assert response.status_code == 201
+        result = asyncio.run(add_collaborators_concurrently(client, "acme", "service", access[1:], workers=2))
+    assert result["success"] == ["dev1", "dev2"], result
+    # Both the sync and the async requests were recorded
+    assert trace.round_trips == len(fake.calls) == 3, (trace.round_trips, len(fake.calls))
+    assert {span["status"] for span in trace.summary()["spans"]} == {201}, trace.summary()["spans"]
+    print(f"githubkit {version}: {trace.round_trips} requests traced")
+
+print("ok")
@@ -0,0 +1,50 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+load_dotenv()
+# Everything below talks to the fake server, never to a real org
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme")
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import github_utils
+from matrx_dream_service.matrx_microservice.api_trace import trace_api_calls, tracing_github
+
+THREADS = 8
+repos = [f"service_{i}" for i in range(THREADS)]
+
+# The shared clients of github_utils, used from several threads at once, each call on its own event loop
+with FakeGitHub(org="acme", repos=repos, latency=0.02) as fake:
+    github_utils._github_clients.update({
+        auto_retry: tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=auto_retry)
+        for auto_retry in (True, False)})
+    results, traces, errors = {}, {}, []
+
+    def add(repo: str):
+        try:
+            access = [{"username": f"{repo}_dev{i}", "permission": {"push": True}} for i in range(6)]
+            with trace_api_calls() as trace:
+                for _ in range(3):  # Later calls reuse the clients after earlier ones closed their connections
+                    results[repo] = github_utils.add_collaborators(repo, access)
+                assert github_utils.repo_exists_in_org(repo)
+            traces[repo] = trace.summary()
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add, args=(repo,), daemon=True) for repo in repos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads), "a thread hung on the shared GitHub clients"
+    assert not errors, errors
+
+    for repo in repos:
+        assert results[repo]["failed"] == [] and len(results[repo]["success"]) == 6, results[repo]
+        assert len(fake.collaborators[repo]) == 6
+        # Each thread's trace holds its own requests only, sync and async ones alike
+        paths = {span["path"].split("/")[3] for span in traces[repo]["spans"]}
+        assert paths == {repo} and traces[repo]["round_trips"] == 3 * 6 + 1, (paths, traces[repo]["round_trips"])
+    assert len(fake.calls) == THREADS * (3 * 6 + 1)
+
+print("ok")
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+from matrx_dream_service.matrx_microservice.lock_store import LockStore, lock_key, retarget_lock
+
+# Stand-in for uv: `uv lock` writes a lock whose root entry carries the project's name and version
+FAKE_UV = """#!/bin/sh
+[ "$1" = "lock" ] || exit 0
+echo lock >> "$UV_CALLS"
+[ -z "$UV_FAIL" ] || exit 1
+name=$(sed -n 's/^name = "\\(.*\\)"/\\1/p' pyproject.toml | tr '_A-Z' '-a-z')
+version=$(sed -n 's/^version = "\\(.*\\)"/\\1/p' pyproject.toml)
+cat > uv.lock <<LOCK
+version = 1
+requires-python = ">=3.12"
+
+[[package]]
+name = "$name"
+version = "$version"
+source = { virtual = "." }
+dependencies = [
+    { name = "uvicorn" },
+]
+
+[[package]]
+name = "uvicorn"
+version = "0.30.0"
+source = { registry = "https://pypi.org/simple" }
+LOCK
+"""
+
+
+def generate(tmp: str, name: str, app_name: str, dependencies: list = None) -> str:
+    config = make_synthetic_config(services=1, tasks=2)
+    config["settings"]["app_name"] = app_name
+    if dependencies is not None:
+        config["dependencies"] = dependencies
+    config_path = os.path.join(tmp, f"{name}.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    project = os.path.join(tmp, name)
+    MicroserviceGenerator(config_path=config_path, output_dir=project, use_format_cache=False, run_post_create=False,
+                          lock_store_dir=os.path.join(tmp, "locks")).generate_microservice()
+    with open(os.path.join(project, "uv.lock")) as f:
+        return f.read()
+
+
+assert lock_key(["a", "b"], ">=3.12") == lock_key(["b", "a"], ">=3.12")
+assert 'name = "other-app"\nversion = "2.0"\nsource = { virtual = "." }' in \
+       retarget_lock('[[package]]\nname = "app"\nversion = "1.0"\nsource = { virtual = "." }\n', "Other_App", "2.0")
+
+with tempfile.TemporaryDirectory() as tmp:
+    bin_dir = os.path.join(tmp, "bin")
+    os.makedirs(bin_dir)
+    with open(os.path.join(bin_dir, "uv"), "w") as f:
+        f.write(FAKE_UV)
+    os.chmod(os.path.join(bin_dir, "uv"), 0o755)
+    calls = os.path.join(tmp, "uv_calls")
+    path = os.environ["PATH"]
+    os.environ.update(PATH=bin_dir + os.pathsep + path, UV_CALLS=calls)
+
+    first = generate(tmp, "first", "billing_service")
+    assert 'name = "billing-service"' in first, first
+
+    # Same dependency set without uv on the PATH: served from the store, retargeted to the new project
+    os.environ["PATH"] = path
+    second = generate(tmp, "second", "Search_Service")
+    assert 'name = "search-service"' in second and 'name = "billing-service"' not in second, second
+    assert second.replace("search-service", "billing-service") == first
+    with open(calls) as f:
+        assert f.read().split() == ["lock"]
+
+    # A new dependency set needs uv, without it the project ships without a lock
+    try:
+        generate(tmp, "third", "other", dependencies=["httpx"])
+        raise AssertionError("a lock was shipped for an unresolved dependency set")
+    except FileNotFoundError:
+        pass
+    os.environ["PATH"] = bin_dir + os.pathsep + path
+    generate(tmp, "fourth", "other", dependencies=["httpx"])
+    with open(calls) as f:
+        assert f.read().split() == ["lock", "lock"]
+
+    # Archives never run uv, they ship without a lock
+    config = make_synthetic_config(services=1, tasks=2)
+    config["dependencies"] = ["never-resolves"]
+    generator = MicroserviceGenerator(config=config, use_format_cache=False, lock_store_dir=os.path.join(tmp, "locks"))
+    for _ in range(2):
+        assert b"".join(generator.iter_archive("tar.gz"))
+        assert not generator.files.exists("uv.lock")
+    with open(calls) as f:
+        assert f.read().split() == ["lock", "lock"]
+
+    store = LockStore(os.path.join(tmp, "locks"))
+    assert store.prune() == 0 and len(list(store.directory.glob("*/*.lock"))) == 2
+    store.max_bytes = len(first)
+    assert store.prune() == 1
+
+print("ok")
@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+
+tmp = tempfile.TemporaryDirectory()
+# Everything below talks to the fake server, never to a real org; generated repos go under BASE_DIR/temp
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme", GITHUB_BOT_ACCOUNT_USERNAME="matrx-bot",
+                  GITHUB_BOT_EMAIL="bot@example.com", BASE_DIR=tmp.name)
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator, github_utils
+from matrx_dream_service.matrx_microservice.api_trace import tracing_github
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+
+LATENCY = 0.3
+
+
+def generator(name: str) -> MicroserviceGenerator:
+    return MicroserviceGenerator(config=make_synthetic_config(services=3, tasks=30), create_github_repo=True,
+                                 github_project_name=name, github_push_mode="api", pipeline_repo_creation=True,
+                                 use_format_cache=False)
+
+
+with FakeGitHub(org="acme", latency=LATENCY) as fake:
+    github_utils._github_clients.update({
+        auto_retry: tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=auto_retry)
+        for auto_retry in (True, False)})
+
+    gen = generator("pipelined")
+    result = gen.generate_microservice()
+    stages = {stage["stage"]: stage["wall"] for stage in gen.metrics.report()["stages"]}
+    provisioning = 3 * LATENCY  # org listing, name check, create
+    local = sum(wall for name, wall in stages.items() if name not in ("await_repo_provisioning", "push_repo"))
+    print(f"local stages {local:.2f}s, waited {stages['await_repo_provisioning']:.2f}s for "
+          f"{provisioning:.2f}s of provisioning, push {stages['push_repo']:.2f}s")
+    # Name lookup and creation ran behind formatting, the push only waited for whatever was left
+    assert stages["await_repo_provisioning"] < max(0.05, provisioning - local + 0.1), stages
+    assert result["repo_name"] in fake.refs and fake.refs[result["repo_name"]]["refs/heads/dev"]
+    assert fake.count("GET", rf"/repos/acme/{result['repo_name']}$") == 1
+
+    # A failing local build deletes the repo created next to it
+    gen = generator("failing")
+
+    def broken_flush():
+        raise OSError("disk full")
+
+    gen._flush_files = broken_flush
+    try:
+        gen.generate_microservice()
+        raise AssertionError("generation with a failing flush succeeded")
+    except OSError as e:
+        assert "disk full" in str(e)
+    assert fake.count("POST", r"/orgs/acme/repos$") == 2
+    assert not [name for name in fake.repos if name.startswith("failing")], fake.repos
+
+tmp.cleanup()
+print("ok")
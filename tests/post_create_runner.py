@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from matrx_dream_service.matrx_microservice.post_create import PostCreateRunner, default_log_path, plan_batches, \
+    normalize_scripts, script_command
+
+PY = sys.executable
+CHATTY = f'{PY} -c "[print(i) for i in range(5000)]"'
+
+assert plan_batches(normalize_scripts(["a", {"command": "b", "independent": True}, "c",
+                                       {"command": "d", "independent": True}])) == [[0, 1], [2, 3]]
+assert {script_command(script) for script in ("uv sync", " uv  sync\n", {"command": "uv sync", "timeout": 60})} == \
+       {"uv sync"}
+
+with tempfile.TemporaryDirectory() as tmp:
+    cwd = os.getcwd()
+    log_path = os.path.join(tmp, "post_create.log")
+    runner = PostCreateRunner(tmp, log_path=log_path, buffer_lines=10)
+
+    # Independent scripts run next to each other, the chatty one keeps only its tail in memory
+    start = time.perf_counter()
+    results = runner.run_sync([
+        f'{PY} -c "import time; time.sleep(1)"',
+        {"command": f'{PY} -c "import time; time.sleep(1)"', "independent": True},
+        CHATTY,
+        {"command": f'{PY} -c "import os; print(os.getcwd())"', "independent": True},
+        "definitely-not-a-command",
+    ])
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.8, elapsed
+    assert [result["success"] for result in results] == [True, True, True, True, False], results
+    assert all(result["duration"] >= 1 for result in results[:2])
+    assert results[2]["output"] == [str(i) for i in range(4990, 5000)]
+    assert os.path.realpath(results[3]["output"][0]) == os.path.realpath(tmp)
+    assert os.getcwd() == cwd
+    with open(log_path) as f:
+        log = f.read()
+    assert "[3] 0\n" in log and "[3] 4999\n" in log and "[5] $ definitely-not-a-command" in log
+
+    # A script over its timeout is killed together with the processes it started
+    pid_file = os.path.join(tmp, "child.pid")
+    start = time.perf_counter()
+    [result] = PostCreateRunner(tmp).run_sync([{
+        "command": f'{PY} -c "import subprocess, sys, time; '
+                   f'p = subprocess.Popen([sys.executable, \'-c\', \'import time; time.sleep(30)\']); '
+                   f'open(\'child.pid\', \'w\').write(str(p.pid)); time.sleep(30)"',
+        "timeout": 1}])
+    assert result["timed_out"] and not result["success"] and time.perf_counter() - start < 5, result
+    time.sleep(0.2)
+    with open(pid_file) as f:
+        child = int(f.read())
+    try:
+        with open(f"/proc/{child}/stat") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+    except FileNotFoundError:
+        state = None
+    assert state in (None, "Z"), f"the script's child survived the timeout ({state})"  # Zombies are dead
+
+    # Closing its output doesn't end a script's timeout, the exit is waited for within it
+    start = time.perf_counter()
+    [result] = PostCreateRunner(tmp).run_sync([{
+        "command": f'{PY} -c "import os, time; os.close(1); os.close(2); time.sleep(30)"', "timeout": 1}])
+    assert result["timed_out"] and time.perf_counter() - start < 5, result
+
+    # The default log lives outside the project, one file per project directory
+    os.environ["MATRX_POST_CREATE_LOG_DIR"] = os.path.join(tmp, "logs")
+    project = os.path.join(tmp, "project")
+    assert default_log_path(project) == default_log_path(project + "/")
+    assert default_log_path(project).parent == default_log_path(os.path.join(tmp, "other")).parent
+    assert default_log_path(project) != default_log_path(os.path.join(tmp, "nested", "project"))
+    assert not str(default_log_path(project)).startswith(project + os.sep)
+    del os.environ["MATRX_POST_CREATE_LOG_DIR"]
+
+    # cancel() from another thread stops the running script and skips the rest
+    runner = PostCreateRunner(tmp)
+    threading.Timer(0.5, runner.cancel).start()
+    start = time.perf_counter()
+    results = runner.run_sync([f'{PY} -c "import time; time.sleep(30)"', "echo never"])
+    assert time.perf_counter() - start < 5
+    assert [result["cancelled"] for result in results] == [True, True], results
+    assert results[1]["returncode"] is None
+
+print("ok")
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+# Everything below talks to the fake server, never to a real org
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme", GITHUB_BOT_ACCOUNT_USERNAME="matrx-bot",
+                  GITHUB_BOT_EMAIL="bot@example.com")
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import github_utils
+from matrx_dream_service.matrx_microservice.api_trace import tracing_github
+
+access = [{"username": f"dev{i}", "permission": {"push": True}} for i in range(5)]
+
+with FakeGitHub(org="acme", repos=["billing_abc"], latency=0.05) as fake, tempfile.TemporaryDirectory() as tmp:
+    github_utils._github_clients.update({
+        auto_retry: tracing_github("token", base_url=fake.url, http_cache=False, auto_retry=auto_retry)
+        for auto_retry in (True, False)})
+    for path, content in {".gitignore": "__pycache__/\n", "run.py": "print('hi')\n", "core/__init__.py": "",
+                          "src/__init__.py": ""}.items():
+        os.makedirs(os.path.join(tmp, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(tmp, path), "w") as f:
+            f.write(content)
+
+    result = github_utils.orchestrate_repo_creation("billing", "Billing service", tmp, access=access,
+                                                    push_mode="api")
+    trace = result["api_trace"]
+    calls = [(call["method"], call["path"]) for call in trace["spans"]]
+    repo = result["repo_name"]
+    assert result["repo_id"] == fake.repos[repo]["id"] and result["repo_url"].endswith(f"/acme/{repo}")
+
+    # Org listing, the chosen name's check, create, 3 distinct blobs + tree + commit + main + dev, 5 invites
+    assert trace["round_trips"] == 3 + 3 + 4 + 5 == len(fake.calls), calls
+    # The repo id comes from the create response, dev is created with main, nothing reads refs back
+    assert calls.count(("GET", f"/repos/acme/{repo}")) == 1  # only the availability check, before creation
+    assert not [call for call in calls if call[0] == "GET" and "/git/" in call[1]]
+    # Invites run next to the push instead of after it
+    first_invite = next(i for i, call in enumerate(calls) if call[0] == "PUT")
+    assert first_invite < calls.index(("POST", f"/repos/acme/{repo}/git/commits")), calls
+    assert sorted(fake.collaborators[repo]) == [f"dev{i}" for i in range(5)]
+    assert all(call["latency"] >= 0.05 and call["status"] for call in trace["spans"])
+    assert [call["status"] for call in trace["spans"] if call["status"] >= 400] == [404]  # the free name
+    print(f"repo created in {trace['round_trips']} round trips, {trace['latency']:.2f}s of API latency")
+
+    # A failed push still deletes the repo
+    empty = os.path.join(tmp, "empty")
+    os.makedirs(empty)
+    try:
+        github_utils.orchestrate_repo_creation("broken", "", empty, push_mode="api")
+        raise AssertionError("push of an empty directory succeeded")
+    except ValueError as e:
+        assert "No files" in str(e), e
+    assert not [name for name in fake.repos if name.startswith("broken")]
+
+print("ok")
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.repo_names import RepoNameCache
+
+existing = [f"repo_{i}" for i in range(2500)] + [f"billing_{suffix}" for suffix in ("abc", "x1y", "q9z2")]
+
+with FakeGitHub(org="acme", repos=existing) as fake:
+    client = GitHub("token", base_url=fake.url, http_cache=False)
+    cache = RepoNameCache(client, "acme", ttl=60)
+
+    # Colliding candidates are rejected locally, only the winner is checked against the API
+    start = time.perf_counter()
+    name = cache.available_name(["billing_abc", "BILLING_X1Y", "billing_q9z2", "billing_new"])
+    assert name == "billing_new", name
+    assert fake.count("GET", r"/orgs/acme/repos$") == 26, fake.calls  # 2504 repos over 100 per page
+    assert fake.count("GET", r"/repos/acme/") == 1
+    print(f"first lookup: {(time.perf_counter() - start) * 1000:.1f}ms, {len(fake.calls)} calls")
+
+    # Within the TTL the listing is reused
+    calls = len(fake.calls)
+    fake.add_repo("billing_new")
+    cache.mark_taken("billing_new")
+    start = time.perf_counter()
+    assert cache.available_name(["billing_new", "billing_abc", "billing_next"]) == "billing_next"
+    assert len(fake.calls) == calls + 1 and cache.refreshes == 1
+    print(f"cached lookup: {(time.perf_counter() - start) * 1000:.1f}ms, 1 call")
+
+    # A stale cache is corrected by the authoritative check
+    fake.add_repo("billing_stale")
+    assert cache.available_name(["billing_stale", "billing_fresh"]) == "billing_fresh"
+    assert "billing_stale" in cache.names()
+
+    # Invalidated listings are fetched again, the async path shares the same cache
+    cache.invalidate()
+    name = asyncio.run(cache.async_available_name(["repo_1", "repo_99999"]))
+    assert name == "repo_99999" and cache.refreshes == 2, (name, cache.refreshes)
+
+    # Concurrent coroutines on an expired cache share one listing
+    async def lookup_concurrently():
+        return await asyncio.gather(*(cache.async_names() for _ in range(20)))
+
+    cache.invalidate()
+    listings = fake.count("GET", r"/orgs/acme/repos$")
+    results = asyncio.run(lookup_concurrently())
+    assert all(names is results[0] for names in results) and cache.refreshes == 3, cache.refreshes
+    assert fake.count("GET", r"/orgs/acme/repos$") == listings + 26
+
+print("ok")
@@ -0,0 +1,45 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+
+from dotenv import load_dotenv
+load_dotenv()
+# Everything below talks to the fake server, never to a real org
+os.environ.update(GITHUB_PAT="token", GITHUB_ORG_NAME="acme")
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice import github_utils
+from matrx_dream_service.matrx_microservice.post_create import PostCreateRunner
+
+access = [{"username": f"dev{i}", "permission": {"push": True}} for i in range(5)]
+
+
+async def from_a_running_loop(tmp: str):
+    # A notebook cell or an async web handler calling the sync API
+    assert github_utils.add_collaborators("service", access) == {"success": [e["username"] for e in access],
+                                                                 "failed": []}
+    assert github_utils.remove_collaborators("service", ["dev4"]) == {"success": ["dev4"], "failed": []}
+    plan = github_utils.sync_collaborators("service", access[:3], dry_run=True)
+    assert [entry["username"] for entry in plan["removed"]] == ["dev3"], plan
+    output = io.StringIO()
+    summary = github_utils.audit_collaborators(output, ["service"], cache_dir=tmp)
+    assert summary["repos"] == 1 and json.loads(output.getvalue())["repo"] == "service", summary
+
+    results = PostCreateRunner(tmp).run_sync(["echo hi"])
+    assert results[0]["success"] and results[0]["output"] == ["hi"], results
+
+    # The sync calls blocked this loop like any blocking call, it is still usable afterwards
+    return await github_utils.async_remove_collaborators("service", ["dev3"])
+
+
+with FakeGitHub(org="acme", repos=["service"]) as fake, tempfile.TemporaryDirectory() as tmp:
+    github_utils._github_clients.update({
+        auto_retry: GitHub("token", base_url=fake.url, http_cache=False, auto_retry=auto_retry)
+        for auto_retry in (True, False)})
+    assert asyncio.run(from_a_running_loop(tmp)) == {"success": ["dev3"], "failed": []}
+    assert sorted(fake.collaborators["service"]) == ["dev0", "dev1", "dev2"]
+
+print("ok")
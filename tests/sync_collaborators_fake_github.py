@@ -0,0 +1,54 @@
+import asyncio
+
+from dotenv import load_dotenv
+load_dotenv()
+from githubkit import GitHub
+
+from fake_github import FakeGitHub
+from matrx_dream_service.matrx_microservice.collaborators import fetch_collaborators, sync_collaborators_concurrently
+
+with FakeGitHub(org="acme", repos=["service"]) as fake:
+    # 130 existing collaborators, more than one page even at 100 per page
+    for i in range(130):
+        fake.add_collaborator("service", f"dev{i:03d}", "push")
+    fake.add_collaborator("service", "Lead", "maintain")
+    pending = fake.add_invitation("service", "newcomer", "read")
+    stale = fake.add_invitation("service", "contractor", "write")
+
+    desired = [{"username": f"dev{i:03d}", "permission": {"push": True}} for i in range(125)]  # dev125-129 removed
+    desired[0] = {"username": "dev000", "permission": {"admin": True}}  # permission change
+    # Every role a push user holds, as GitHub reports it, is still push and needs no update
+    desired[1] = {"username": "dev001", "permission": {"push": True, "triage": True, "pull": True}}
+    desired += [{"username": "lead", "permission": {"maintain": True}},  # case-insensitive, unchanged
+                {"username": "newcomer", "permission": {"push": True}},  # pending invite upgraded
+                {"username": "fresh", "permission": {"pull": True}}]  # new
+
+    client = GitHub("token", base_url=fake.url, http_cache=False, auto_retry=False)
+    current = asyncio.run(fetch_collaborators(client, "acme", "service"))
+    assert len(current) == 133 and current["newcomer"]["invitation_id"] == pending, len(current)
+
+    calls = len(fake.calls)
+    plan = asyncio.run(sync_collaborators_concurrently(client, "acme", "service", desired, dry_run=True))
+    assert len(fake.calls) == calls + 3, "a dry run only lists collaborators (2 pages) and invitations"
+    assert [c["username"] for c in plan["added"]] == ["fresh"], plan["added"]
+    assert plan["updated"] == [{"username": "dev000", "from": "push", "to": "admin"},
+                               {"username": "newcomer", "from": "pull", "to": "push"}], plan["updated"]
+    assert [c["username"] for c in plan["removed"]] == [f"dev{i}" for i in range(125, 130)] + ["contractor"]
+    assert len(plan["unchanged"]) == 125 and "Lead" in plan["unchanged"] and "dev001" in plan["unchanged"]
+
+    calls = len(fake.calls)
+    report = asyncio.run(sync_collaborators_concurrently(client, "acme", "service", desired))
+    writes = len(fake.calls) - calls - 3
+    assert writes == 1 + 2 + 6 and not report["failed"], (writes, report["failed"])
+    assert {key: report[key] for key in ("added", "updated", "removed")} == \
+           {key: plan[key] for key in ("added", "updated", "removed")}
+    assert fake.collaborators["service"]["dev000"] == "admin" and "dev127" not in fake.collaborators["service"]
+    assert fake.collaborators["service"]["dev001"] == "push"
+    assert fake.invitations["service"] == {pending: {"login": "newcomer", "permissions": "write"}}
+
+    # Converged: the next sync only reads
+    calls = len(fake.calls)
+    report = asyncio.run(sync_collaborators_concurrently(client, "acme", "service", desired))
+    assert len(fake.calls) == calls + 3 and len(report["unchanged"]) == 128, report
+
+print("ok")
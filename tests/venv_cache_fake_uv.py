@@ -0,0 +1,88 @@
+import json
+import os
+import stat
+import tempfile
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+from matrx_dream_service.matrx_microservice import MicroserviceGenerator
+from matrx_dream_service.matrx_microservice.bench import make_synthetic_config
+from matrx_dream_service.matrx_microservice.content_store import STALE_TMP_AGE
+from matrx_dream_service.matrx_microservice.venv_cache import VenvCache, environment_key
+
+# Stand-in for uv: `uv sync` builds a small venv with absolute paths in it, `uv run` does nothing
+FAKE_UV = """#!/bin/sh
+[ "$1" = "sync" ] || exit 0
+echo sync >> "$UV_CALLS"
+mkdir -p .venv/bin .venv/lib/python3.13/site-packages
+ln -s lib .venv/lib64
+echo "VIRTUAL_ENV=\\"$PWD/.venv\\"" > .venv/bin/activate
+printf '#!%s/.venv/bin/python\\nimport uvicorn\\n' "$PWD" > .venv/bin/uvicorn
+chmod +x .venv/bin/uvicorn
+echo "home = /usr/bin" > .venv/pyvenv.cfg
+head -c 200000 /dev/zero > .venv/lib/python3.13/site-packages/uvicorn.py
+sleep 0.5
+"""
+
+assert environment_key(["a", "b"], ">=3.12") == environment_key(["b", "a"], ">=3.12")
+assert environment_key(["a"], ">=3.12") != environment_key(["a"], ">=3.13")
+
+with tempfile.TemporaryDirectory() as tmp:
+    bin_dir = os.path.join(tmp, "bin")
+    os.makedirs(bin_dir)
+    with open(os.path.join(bin_dir, "uv"), "w") as f:
+        f.write(FAKE_UV)
+    os.chmod(os.path.join(bin_dir, "uv"), 0o755)
+    calls = os.path.join(tmp, "uv_calls")
+    os.environ.update(PATH=bin_dir + os.pathsep + os.environ["PATH"], UV_CALLS=calls,
+                      MATRX_POST_CREATE_LOG_DIR=os.path.join(tmp, "logs"))
+
+    config_path = os.path.join(tmp, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(make_synthetic_config(services=2, tasks=5), f)
+    cache_dir = os.path.join(tmp, "venvs")
+
+    durations = []
+    for name in ("first", "second"):
+        project = os.path.join(tmp, name)
+        start = time.perf_counter()
+        MicroserviceGenerator(config_path=config_path, output_dir=project, use_format_cache=False,
+                              venv_cache_dir=cache_dir).generate_microservice()
+        durations.append(time.perf_counter() - start)
+    print(f"cold {durations[0]:.2f}s, warm {durations[1]:.2f}s")
+
+    with open(calls) as f:
+        assert f.read().split() == ["sync"], "uv sync ran for a cached dependency set"
+    # The script log stays out of the projects, which would otherwise commit it
+    assert not os.path.exists(os.path.join(tmp, "second", "post_create.log"))
+    logs = sorted(os.listdir(os.path.join(tmp, "logs")))
+    assert [name.split("-")[0] for name in logs] == ["first", "second"], logs
+    with open(os.path.join(tmp, "logs", logs[0])) as f:
+        assert "$ uv sync" in f.read()
+
+    # uv sync is recognised as an object entry too, and skipped once the venv was restored
+    generator = MicroserviceGenerator(config_path=config_path, output_dir=os.path.join(tmp, "third"))
+    generator.config["post_create_scripts"] = [{"command": "uv  sync", "timeout": 60}, "uv run lint.py"]
+    assert generator._scripts_to_run(venv_restored=True) == ["uv run lint.py"]
+    first, second = (os.path.join(tmp, name, ".venv") for name in ("first", "second"))
+    module = os.path.join("lib", "python3.13", "site-packages", "uvicorn.py")
+    # Package files are shared with the cache, paths inside scripts point at the new project
+    assert os.stat(os.path.join(first, module)).st_ino == os.stat(os.path.join(second, module)).st_ino
+    assert os.path.islink(os.path.join(second, "lib64"))
+    with open(os.path.join(second, "bin", "activate")) as f:
+        assert f.read().strip() == f'VIRTUAL_ENV="{os.path.realpath(second)}"'
+    with open(os.path.join(second, "bin", "uvicorn")) as f:
+        assert f.readline().strip() == f"#!{os.path.realpath(second)}/bin/python"
+    assert os.stat(os.path.join(second, "bin", "uvicorn")).st_mode & stat.S_IXUSR
+    with open(os.path.join(first, "bin", "activate")) as f:
+        assert os.path.realpath(first) in f.read()
+
+    # Least recently used environments are evicted past max_bytes, with environments a dead store left half built
+    stale = os.path.join(cache_dir, f".{'0' * 64}.dead.tmp")
+    os.makedirs(os.path.join(stale, "venv"))
+    os.utime(stale, (time.time() - STALE_TMP_AGE - 1,) * 2)
+    cache = VenvCache(cache_dir, max_bytes=0)
+    assert cache.prune() == 1 and not os.listdir(cache_dir)
+
+print("ok")